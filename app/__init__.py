@@ -1,19 +1,25 @@
 from flask import Flask, render_template
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
 from datetime import datetime
 
 db = SQLAlchemy()
+migrate = Migrate()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
 
-    app.config['SQLALCHEMY_DATABASE_URI'] = (
-        'mssql+pyodbc://@localhost/InventarioRestaurante?driver=ODBC+Driver+17+for+SQL+Server&trusted_connection=yes'
-    )
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.secret_key = 'clave-secreta'
+    # Configuración por perfil y variables de entorno (ver app/config.py)
+    from app.config import cargar_configuracion, opciones_motor
+    app.config.update(cargar_configuracion())
 
+    # Configuración adicional (pruebas de carga, base de datos local, etc.)
+    if config:
+        app.config.update(config)
+
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opciones_motor(app.config)
     db.init_app(app)
+    migrate.init_app(app, db)
 
     # Ruta de inicio CON DASHBOARD
     @app.route('/')
@@ -21,24 +27,12 @@ def create_app():
         # Importar modelos aquí para evitar importaciones circulares
         from app.models.productos import Producto
         from app.models.movimientos import Movimiento
+        from app.services.dashboard import obtener_kpis
+        from sqlalchemy.orm import joinedload
         
         try:
-            # KPIs principales
-            total_productos = Producto.query.filter_by(Activo=True).count()
-            
-            productos_bajo_stock = Producto.query.filter(
-                Producto.CantidadActual <= Producto.StockMinimo,
-                Producto.Activo == True
-            ).count()
-            
-            productos_sin_stock = Producto.query.filter(
-                Producto.CantidadActual == 0,
-                Producto.Activo == True
-            ).count()
-            
-            # Calcular valor total del inventario
-            productos = Producto.query.filter_by(Activo=True).all()
-            valor_total = sum(producto.CantidadActual * float(producto.PrecioUnitario) for producto in productos)
+            # KPIs principales (un solo agregado, servido desde el snapshot)
+            kpis = obtener_kpis()
             
             # Widget: Productos bajo stock (máximo 10)
             productos_bajo_stock_lista = Producto.query.filter(
@@ -47,14 +41,15 @@ def create_app():
             ).order_by(Producto.CantidadActual.asc()).limit(10).all()
             
             # Widget: Últimos movimientos (últimos 5)
-            ultimos_movimientos = Movimiento.query.order_by(Movimiento.FechaCreacion.desc()).limit(5).all()
+            ultimos_movimientos = Movimiento.query.options(joinedload(Movimiento.producto_rel))\
+                .order_by(Movimiento.FechaCreacion.desc()).limit(5).all()
             
             return render_template('inicio.html', 
                                  kpis={
-                                     'total_productos': total_productos,
-                                     'productos_bajo_stock': productos_bajo_stock,
-                                     'productos_sin_stock': productos_sin_stock,
-                                     'valor_total_inventario': f"{valor_total:,.2f}"
+                                     'total_productos': kpis['total_productos'],
+                                     'productos_bajo_stock': kpis['productos_bajo_stock'],
+                                     'productos_sin_stock': kpis['productos_sin_stock'],
+                                     'valor_total_inventario': f"{kpis['valor_total_inventario']:,.2f}"
                                  },
                                  productos_bajo_stock=productos_bajo_stock_lista,
                                  ultimos_movimientos=ultimos_movimientos,
@@ -79,20 +74,71 @@ def create_app():
     from app.routes.proveedores import proveedores_bp
     from app.routes.productos import productos_bp
     from app.routes.movimientos import movimientos_bp
+    from app.routes.sistema import sistema_bp, metricas_bp
+    from app.routes.api import api_bp
+    from app.routes.alertas import alertas_bp
+    from app.routes.recomendaciones import recomendaciones_bp
+    from app.routes.recetas import recetas_bp
+    from app.routes.reportes import reportes_bp
+    from app.routes.conteos import conteos_bp
+    from app.routes.compras import compras_bp
     
     app.register_blueprint(categorias_bp)
     app.register_blueprint(proveedores_bp)
     app.register_blueprint(productos_bp)
     app.register_blueprint(movimientos_bp)
+    app.register_blueprint(sistema_bp)
+    app.register_blueprint(metricas_bp)
+    app.register_blueprint(api_bp)
+    app.register_blueprint(alertas_bp)
+    app.register_blueprint(recomendaciones_bp)
+    app.register_blueprint(recetas_bp)
+    app.register_blueprint(reportes_bp)
+    app.register_blueprint(conteos_bp)
+    app.register_blueprint(compras_bp)
+
+    # Registrar comandos de línea de comandos
+    from app.cli import registrar_comandos
+    registrar_comandos(app)
 
     with app.app_context():
-        # Importar modelos para que SQLAlchemy los reconozca
+        # PRAGMAs de SQLite (WAL, busy_timeout...) en cada conexión nueva
+        from app.utils.base_datos import configurar_sqlite
+        configurar_sqlite(db.engine, app.config)
+
+        # Métricas por request (consultas, tiempo de BD y de renderizado)
+        from app.services.metricas import iniciar_metricas
+        iniciar_metricas(app, db.engine)
+
+        # Alertas de stock en vivo (canal de archivo si hay varios workers)
+        from app.services.alertas import iniciar_alertas
+        iniciar_alertas(app)
+
+        # Importar modelos para que SQLAlchemy y las migraciones los reconozcan.
+        # El esquema se administra con migraciones (flask db upgrade): el
+        # arranque no crea ni revisa tablas.
         from app.models.categorias import Categoria
         from app.models.proveedores import Proveedor
         from app.models.productos import Producto
         from app.models.movimientos import Movimiento
-        
-        # Crear todas las tablas
-        db.create_all()
+        from app.models.idempotencia import ClaveIdempotencia
+        from app.models.versiones import VersionDatos
+        from app.models.snapshots import SnapshotStock
+        from app.models.cambios import Cambio
+        from app.models.recomendaciones import RecomendacionStock
+        from app.models.recetas import Receta, RecetaIngrediente
+        from app.models.archivo import MovimientoArchivo, SaldoApertura
+        from app.models.consumo import ConsumoDiario
+        from app.models.conteos import ConteoInventario, ConteoDetalle
+        from app.models.compras import OrdenCompra, OrdenCompraLinea
+        from app.models.lotes import Lote
+
+        # Construir los índices de búsqueda en memoria
+        if app.config.get('BUSQUEDA_CONSTRUIR_AL_INICIO', True):
+            from app.services.busqueda import construir_indices
+            try:
+                construir_indices()
+            except Exception as e:
+                print(f"Error construyendo índices de búsqueda: {e}")
 
     return app
\ No newline at end of file
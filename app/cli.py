@@ -0,0 +1,181 @@
+from flask.cli import with_appcontext
+from datetime import datetime, timedelta
+import click
+import time
+
+# ========================
+# Comandos de línea de comandos (flask <comando>)
+# ========================
+
+@click.command('importar-productos')
+@click.argument('archivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--lote', 'tamano_lote', default=1000, show_default=True,
+              help='Filas insertadas por lote.')
+@click.option('--rechazos', type=click.Path(dir_okay=False),
+              help='Archivo CSV donde se escriben las filas rechazadas.')
+@click.option('--delimitador', default=',', show_default=True)
+@with_appcontext
+def importar_productos_comando(archivo, tamano_lote, rechazos, delimitador):
+    """Importa productos desde un archivo CSV."""
+    from app.services.importacion import importar_productos_csv, ImportacionError
+
+    archivo_rechazos = open(rechazos, 'w', newline='', encoding='utf-8') if rechazos else None
+    try:
+        with open(archivo, newline='', encoding='utf-8-sig') as entrada:
+            resultado = importar_productos_csv(entrada, tamano_lote=tamano_lote,
+                                               rechazos=archivo_rechazos,
+                                               delimitador=delimitador)
+    except ImportacionError as e:
+        raise click.ClickException(str(e))
+    finally:
+        if archivo_rechazos:
+            archivo_rechazos.close()
+
+    velocidad = resultado.procesadas / resultado.segundos if resultado.segundos else 0
+    click.echo(f'{resultado.insertadas} productos insertados, {resultado.rechazadas} rechazados '
+               f'de {resultado.procesadas} filas en {resultado.segundos:.2f}s '
+               f'({velocidad:,.0f} filas/s).')
+
+
+@click.command('generar-snapshot')
+@click.option('--fecha', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Día del corte (por defecto hoy). El corte es el inicio del día.')
+@with_appcontext
+def generar_snapshot_comando(fecha):
+    """Genera el snapshot de stock de todos los productos (programar a diario)."""
+    from app.services.snapshots import generar_snapshot, inicio_de_dia
+
+    resultado = generar_snapshot(inicio_de_dia(fecha or datetime.utcnow()))
+    if resultado.omitido:
+        click.echo(f'El snapshot del {resultado.fecha_corte:%Y-%m-%d} ya existe.')
+    else:
+        click.echo(f'Snapshot del {resultado.fecha_corte:%Y-%m-%d}: {resultado.productos} productos.')
+
+
+@click.command('reconstruir-snapshots')
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Primer corte (por defecto el día del primer movimiento).')
+@click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Último corte (por defecto hoy).')
+@click.option('--intervalo', 'intervalo_dias', default=1, show_default=True,
+              help='Días entre cortes.')
+@with_appcontext
+def reconstruir_snapshots_comando(desde, hasta, intervalo_dias):
+    """Borra y regenera los snapshots de stock a partir de los movimientos."""
+    from app.services.snapshots import reconstruir_snapshots
+
+    inicio = time.perf_counter()
+    resultados = reconstruir_snapshots(desde=desde, hasta=hasta, intervalo_dias=intervalo_dias)
+    click.echo(f'{len(resultados)} snapshots generados en {time.perf_counter() - inicio:.2f}s.')
+
+
+@click.command('purgar-cambios')
+@click.option('--dias', default=30, show_default=True,
+              help='Se conservan los cambios de los últimos N días.')
+@with_appcontext
+def purgar_cambios_comando(dias):
+    """Borra el registro de cambios antiguo (los clientes más atrasados se resincronizan)."""
+    from app.services.cambios import purgar_cambios
+
+    borrados = purgar_cambios(datetime.utcnow() - timedelta(days=dias))
+    click.echo(f'{borrados} cambios borrados.')
+
+
+@click.command('calcular-recomendaciones')
+@click.option('--dias', default=90, show_default=True, help='Días de historial de salidas.')
+@click.option('--plazo', 'plazo_dias', default=2.0, show_default=True,
+              help='Plazo de entrega del proveedor en días.')
+@click.option('--cobertura', 'cobertura_dias', default=7.0, show_default=True,
+              help='Días entre pedidos.')
+@click.option('--factor-servicio', default=1.65, show_default=True,
+              help='Factor z del nivel de servicio (1.65 ≈ 95%).')
+@with_appcontext
+def calcular_recomendaciones_comando(dias, plazo_dias, cobertura_dias, factor_servicio):
+    """Calcula el stock mínimo sugerido de cada producto a partir de su consumo."""
+    from app.services.recomendaciones import calcular_recomendaciones
+
+    resultado = calcular_recomendaciones(dias=dias, plazo_dias=plazo_dias,
+                                         cobertura_dias=cobertura_dias,
+                                         factor_servicio=factor_servicio)
+    click.echo(f'{resultado.productos} recomendaciones ({resultado.dias} días): '
+               f'consulta {resultado.segundos_consulta:.2f}s, cálculo {resultado.segundos_calculo:.2f}s.')
+
+
+@click.command('conciliar-stock')
+@click.option('--bloque', 'tamano_bloque', default=1_000_000, show_default=True,
+              help='Movimientos (rango de Id) por consulta.')
+@click.option('--trabajadores', default=1, show_default=True,
+              help='Consultas en paralelo, cada una con su conexión.')
+@click.option('--tolerancia', default=0.005, show_default=True,
+              help='Diferencia máxima que no se reporta.')
+@click.option('--reporte', type=click.Path(dir_okay=False),
+              help='Archivo CSV con las diferencias (por defecto en la carpeta de instancia).')
+@click.option('--ajustar', is_flag=True,
+              help='Registra movimientos de ajuste para que el libro coincida con el stock.')
+@with_appcontext
+def conciliar_stock_comando(tamano_bloque, trabajadores, tolerancia, reporte, ajustar):
+    """Compara CantidadActual con la suma de los movimientos de cada producto."""
+    from app.services.conciliacion import conciliar, escribir_reporte
+    from flask import current_app
+    import os
+
+    resultado = conciliar(tamano_bloque=tamano_bloque, trabajadores=trabajadores,
+                          tolerancia=tolerancia, ajustar=ajustar)
+    click.echo(f'{resultado.productos} productos conciliados contra los movimientos hasta el Id '
+               f'{resultado.movimientos_hasta} en {resultado.segundos:.2f}s: '
+               f'{len(resultado.diferencias)} con diferencias.')
+
+    if resultado.diferencias:
+        if not reporte:
+            carpeta = os.path.join(current_app.instance_path, 'conciliacion')
+            os.makedirs(carpeta, exist_ok=True)
+            reporte = os.path.join(carpeta, f"conciliacion_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+        with open(reporte, 'w', newline='', encoding='utf-8') as archivo:
+            escribir_reporte(resultado.diferencias, archivo)
+        click.echo(f'Reporte de diferencias: {reporte}')
+    if ajustar:
+        click.echo(f'{resultado.ajustados} movimientos de ajuste registrados.')
+
+
+@click.command('archivar-movimientos')
+@click.option('--meses', default=12, show_default=True,
+              help='Meses completos que se conservan en la tabla de movimientos.')
+@click.option('--lote', 'tamano_lote', default=50_000, show_default=True,
+              help='Movimientos por transacción.')
+@with_appcontext
+def archivar_movimientos_comando(meses, tamano_lote):
+    """Mueve los movimientos antiguos al archivo mensual y actualiza los saldos de apertura."""
+    from app.services.archivo import archivar_movimientos, inicio_de_mes
+
+    corte = inicio_de_mes(datetime.utcnow())
+    for _ in range(meses):
+        corte = inicio_de_mes(corte - timedelta(days=1))
+
+    resultado = archivar_movimientos(corte, tamano_lote=tamano_lote)
+    click.echo(f'{resultado.movimientos} movimientos archivados de {resultado.meses} meses.')
+    if resultado.horizonte:
+        click.echo(f"La tabla de movimientos conserva desde {resultado.horizonte.strftime('%Y-%m')}.")
+
+
+@click.command('reconstruir-consumo')
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Primer día a recalcular (por defecto todo el historial).')
+@with_appcontext
+def reconstruir_consumo_comando(desde):
+    """Recalcula el consumo diario por producto a partir de los movimientos."""
+    from app.services.consumo import reconstruir_consumo
+
+    inicio = time.perf_counter()
+    filas = reconstruir_consumo(desde)
+    click.echo(f'{filas} filas de consumo diario generadas en {time.perf_counter() - inicio:.2f}s.')
+
+
+def registrar_comandos(app):
+    app.cli.add_command(importar_productos_comando)
+    app.cli.add_command(generar_snapshot_comando)
+    app.cli.add_command(reconstruir_snapshots_comando)
+    app.cli.add_command(purgar_cambios_comando)
+    app.cli.add_command(calcular_recomendaciones_comando)
+    app.cli.add_command(conciliar_stock_comando)
+    app.cli.add_command(archivar_movimientos_comando)
+    app.cli.add_command(reconstruir_consumo_comando)
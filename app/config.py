@@ -0,0 +1,100 @@
+from sqlalchemy.engine import make_url
+import os
+
+# ========================
+# Configuración por perfil
+# ========================
+# El perfil se elige con INVENTARIO_PERFIL ('sqlserver' por defecto o 'sqlite')
+# y cualquier valor puede sobrescribirse con variables de entorno. DATABASE_URL
+# reemplaza la URI del perfil. Las opciones DB_* se traducen a opciones del
+# motor de SQLAlchemy en opciones_motor().
+
+URI_SQLSERVER = (
+    'mssql+pyodbc://@localhost/InventarioRestaurante?driver=ODBC+Driver+17+for+SQL+Server&trusted_connection=yes'
+)
+
+PERFILES = {
+    'sqlserver': {
+        'SQLALCHEMY_DATABASE_URI': URI_SQLSERVER,
+        # Dimensionado para varios workers de gunicorn contra un mismo servidor
+        'DB_POOL_SIZE': 10,
+        'DB_MAX_OVERFLOW': 20,
+        'DB_POOL_TIMEOUT': 30,
+        'DB_POOL_RECYCLE': 1800,
+        'DB_POOL_PRE_PING': True,
+        'DB_FAST_EXECUTEMANY': True,
+    },
+    'sqlite': {
+        # Base de datos local para pruebas de carga y desarrollo
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///inventario.db',
+        'DB_POOL_SIZE': 5,
+        'DB_MAX_OVERFLOW': 10,
+        'DB_POOL_TIMEOUT': 30,
+        'DB_POOL_RECYCLE': -1,
+        'DB_POOL_PRE_PING': False,
+        'DB_FAST_EXECUTEMANY': False,
+        'SQLITE_BUSY_TIMEOUT_MS': 5000,
+        'SQLITE_CACHE_KB': 64000,
+    },
+}
+
+# Variables de entorno reconocidas y su conversión
+VARIABLES_ENTORNO = {
+    'DATABASE_URL': ('SQLALCHEMY_DATABASE_URI', str),
+    'SECRET_KEY': ('SECRET_KEY', str),
+    'DB_POOL_SIZE': ('DB_POOL_SIZE', int),
+    'DB_MAX_OVERFLOW': ('DB_MAX_OVERFLOW', int),
+    'DB_POOL_TIMEOUT': ('DB_POOL_TIMEOUT', float),
+    'DB_POOL_RECYCLE': ('DB_POOL_RECYCLE', int),
+    'DB_POOL_PRE_PING': ('DB_POOL_PRE_PING', lambda v: v.lower() in ('1', 'true', 'si', 'sí')),
+    'DB_FAST_EXECUTEMANY': ('DB_FAST_EXECUTEMANY', lambda v: v.lower() in ('1', 'true', 'si', 'sí')),
+    # Archivo compartido para repartir alertas entre varios workers
+    'ALERTAS_CANAL_ARCHIVO': ('ALERTAS_CANAL_ARCHIVO', str),
+    'ALERTAS_CANAL_MAX_BYTES': ('ALERTAS_CANAL_MAX_BYTES', int),
+}
+
+
+def cargar_configuracion(perfil=None):
+    perfil = perfil or os.environ.get('INVENTARIO_PERFIL', 'sqlserver')
+    if perfil not in PERFILES:
+        raise ValueError(f'Perfil de configuración desconocido: {perfil}')
+
+    config = {
+        'INVENTARIO_PERFIL': perfil,
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'SECRET_KEY': 'clave-secreta',
+    }
+    config.update(PERFILES[perfil])
+
+    for variable, (clave, convertir) in VARIABLES_ENTORNO.items():
+        valor = os.environ.get(variable)
+        if valor:
+            config[clave] = convertir(valor)
+    return config
+
+
+def opciones_motor(config):
+    # Opciones de create_engine según el dialecto de la URI
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    opciones = {}
+
+    # SQLite en memoria usa un pool propio de una conexión
+    en_memoria = url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+    if not en_memoria:
+        from app.utils.base_datos import PoolMedido
+        opciones.update({
+            'poolclass': PoolMedido,
+            'pool_size': config.get('DB_POOL_SIZE', 5),
+            'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+            'pool_recycle': config.get('DB_POOL_RECYCLE', -1),
+            'pool_pre_ping': config.get('DB_POOL_PRE_PING', False),
+        })
+
+    # pyodbc envía los executemany en un solo viaje
+    if url.get_backend_name() == 'mssql' and url.get_driver_name() == 'pyodbc':
+        opciones['fast_executemany'] = config.get('DB_FAST_EXECUTEMANY', True)
+
+    # Las opciones explícitas tienen prioridad
+    opciones.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return opciones
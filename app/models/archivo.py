@@ -0,0 +1,36 @@
+from app import db
+
+# Movimientos archivados, agrupados por mes (Periodo = AAAAMM). La clave
+# primaria empieza por Periodo, así cada mes queda contiguo en disco.
+class MovimientoArchivo(db.Model):
+    __tablename__ = 'MovimientosArchivo'
+    __table_args__ = (
+        db.Index('IX_MovimientosArchivo_ProductoId_FechaCreacion', 'ProductoId', 'FechaCreacion'),
+        db.Index('IX_MovimientosArchivo_FechaCreacion_Id', 'FechaCreacion', 'Id'),
+    )
+    
+    Periodo = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    Id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    ProductoId = db.Column(db.Integer, db.ForeignKey('Productos.Id'), nullable=False)
+    Tipo = db.Column(db.String(20), nullable=False)
+    Cantidad = db.Column(db.Numeric(10, 2), nullable=False)
+    Motivo = db.Column(db.String(200), nullable=True)
+    Notas = db.Column(db.Text, nullable=True)
+    Usuario = db.Column(db.String(100), nullable=True)
+    FechaCreacion = db.Column(db.DateTime, nullable=False)
+    EsAjuste = db.Column(db.Boolean, nullable=False, default=False)
+    
+    def __repr__(self):
+        return f'<MovimientoArchivo {self.Periodo} {self.Tipo} - {self.Cantidad} unidades>'
+
+
+# Suma con signo de los movimientos archivados de cada producto
+class SaldoApertura(db.Model):
+    __tablename__ = 'SaldosApertura'
+    
+    ProductoId = db.Column(db.Integer, db.ForeignKey('Productos.Id'), primary_key=True, autoincrement=False)
+    Cantidad = db.Column(db.Float, nullable=False, default=0)
+    FechaCorte = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<SaldoApertura {self.ProductoId} @ {self.FechaCorte}: {self.Cantidad}>'
@@ -0,0 +1,24 @@
+from app import db
+from datetime import datetime
+
+class Cambio(db.Model):
+    __tablename__ = 'Cambios'
+    __table_args__ = (
+        # Lectura de los clientes: 'Numero > N' en orden
+        db.Index('IX_Cambios_Numero_Secuencia', 'Numero', 'Secuencia'),
+        # En SQLite AUTOINCREMENT evita reutilizar secuencias tras una purga
+        {'sqlite_autoincrement': True},
+    )
+    
+    Secuencia = db.Column(db.Integer, primary_key=True)
+    # Número de la transacción que lo registró, en orden de confirmación
+    # (contador 'Cambios' de VersionesDatos); los clientes sincronizan desde
+    # el último visto
+    Numero = db.Column(db.Integer, nullable=False)
+    Tabla = db.Column(db.String(30), nullable=False)
+    RegistroId = db.Column(db.Integer, nullable=False)
+    Operacion = db.Column(db.String(20), nullable=False)
+    FechaCreacion = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Cambio {self.Numero}/{self.Secuencia} {self.Tabla}:{self.RegistroId} {self.Operacion}>'
@@ -0,0 +1,41 @@
+from app import db
+from datetime import datetime
+
+# Orden de compra a un proveedor
+class OrdenCompra(db.Model):
+    __tablename__ = 'OrdenesCompra'
+    __table_args__ = (
+        db.Index('IX_OrdenesCompra_Estado_FechaCreacion', 'Estado', 'FechaCreacion'),
+    )
+
+    Id = db.Column(db.Integer, primary_key=True)
+    ProveedorId = db.Column(db.Integer, db.ForeignKey('Proveedores.Id'), nullable=False)
+    Estado = db.Column(db.String(20), nullable=False, default='borrador')  # borrador, recibida, cancelada
+    Usuario = db.Column(db.String(100))
+    FechaCreacion = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    FechaRecepcion = db.Column(db.DateTime)
+
+    proveedor = db.relationship('Proveedor')
+
+    def __repr__(self):
+        return f'<OrdenCompra {self.Id} ({self.Estado})>'
+
+
+# Producto pedido en una orden; CantidadRecibida se guarda al recibir
+class OrdenCompraLinea(db.Model):
+    __tablename__ = 'OrdenesCompraLineas'
+    __table_args__ = (
+        db.UniqueConstraint('OrdenId', 'ProductoId', name='UQ_OrdenesCompraLineas_Orden_Producto'),
+        # Productos con una orden en borrador (se excluyen al generar)
+        db.Index('IX_OrdenesCompraLineas_ProductoId', 'ProductoId'),
+    )
+
+    Id = db.Column(db.Integer, primary_key=True)
+    OrdenId = db.Column(db.Integer, db.ForeignKey('OrdenesCompra.Id'), nullable=False)
+    ProductoId = db.Column(db.Integer, db.ForeignKey('Productos.Id'), nullable=False)
+    Cantidad = db.Column(db.Float, nullable=False)
+    CantidadRecibida = db.Column(db.Float)
+    PrecioUnitario = db.Column(db.Numeric(10, 2), nullable=False)
+
+    def __repr__(self):
+        return f'<OrdenCompraLinea {self.OrdenId}/{self.ProductoId}: {self.Cantidad}>'
@@ -0,0 +1,18 @@
+from app import db
+
+# Totales diarios por producto, mantenidos por las rutas de movimientos
+class ConsumoDiario(db.Model):
+    __tablename__ = 'ConsumoDiario'
+    __table_args__ = (
+        # Reportes por rango de fechas de todos los productos
+        db.Index('IX_ConsumoDiario_Dia_ProductoId', 'Dia', 'ProductoId'),
+    )
+    
+    ProductoId = db.Column(db.Integer, db.ForeignKey('Productos.Id'), primary_key=True, autoincrement=False)
+    Dia = db.Column(db.Date, primary_key=True)
+    Entradas = db.Column(db.Float, nullable=False, default=0)
+    Salidas = db.Column(db.Float, nullable=False, default=0)
+    Movimientos = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ConsumoDiario {self.ProductoId} {self.Dia}: +{self.Entradas} -{self.Salidas}>'
@@ -0,0 +1,39 @@
+from app import db
+from datetime import datetime
+
+# Sesión de conteo físico de inventario
+class ConteoInventario(db.Model):
+    __tablename__ = 'ConteosInventario'
+    __table_args__ = (
+        db.Index('IX_ConteosInventario_Estado_FechaCreacion', 'Estado', 'FechaCreacion'),
+    )
+    
+    Id = db.Column(db.Integer, primary_key=True)
+    Nombre = db.Column(db.String(150), nullable=False)
+    Estado = db.Column(db.String(20), nullable=False, default='abierto')  # abierto, cerrado, cancelado
+    Usuario = db.Column(db.String(100))
+    FechaCreacion = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    FechaCierre = db.Column(db.DateTime)
+    Ajustes = db.Column(db.Integer)
+    
+    def __repr__(self):
+        return f'<ConteoInventario {self.Nombre} ({self.Estado})>'
+
+
+# Cantidad contada de un producto; CantidadSistema y Diferencia se guardan al cerrar
+class ConteoDetalle(db.Model):
+    __tablename__ = 'ConteosDetalle'
+    __table_args__ = (
+        db.UniqueConstraint('ConteoId', 'ProductoId', name='UQ_ConteosDetalle_Conteo_Producto'),
+    )
+    
+    Id = db.Column(db.Integer, primary_key=True)
+    ConteoId = db.Column(db.Integer, db.ForeignKey('ConteosInventario.Id'), nullable=False)
+    ProductoId = db.Column(db.Integer, db.ForeignKey('Productos.Id'), nullable=False)
+    CantidadContada = db.Column(db.Float, nullable=False)
+    CantidadSistema = db.Column(db.Float)
+    Diferencia = db.Column(db.Float)
+    FechaConteo = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<ConteoDetalle {self.ConteoId}/{self.ProductoId}: {self.CantidadContada}>'
@@ -0,0 +1,11 @@
+from app import db
+from datetime import datetime
+
+class ClaveIdempotencia(db.Model):
+    __tablename__ = 'ClavesIdempotencia'
+    
+    Clave = db.Column(db.String(100), primary_key=True)
+    FechaCreacion = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ClaveIdempotencia {self.Clave}>'
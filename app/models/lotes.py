@@ -0,0 +1,28 @@
+from app import db
+from datetime import datetime
+
+# Lote de un producto: lo que entró en una entrada y lo que queda de ello.
+# La suma de CantidadDisponible por producto es Producto.CantidadActual.
+class Lote(db.Model):
+    __tablename__ = 'Lotes'
+    __table_args__ = (
+        # Asignación FEFO: lotes con saldo de un producto, el que vence primero
+        db.Index('IX_Lotes_ProductoId_FechaVencimiento', 'ProductoId', 'FechaVencimiento', 'Id',
+                 mssql_where=db.text('CantidadDisponible > 0'), sqlite_where=db.text('CantidadDisponible > 0')),
+        # Lotes con saldo próximos a vencer
+        db.Index('IX_Lotes_FechaVencimiento', 'FechaVencimiento', 'ProductoId',
+                 mssql_where=db.text('CantidadDisponible > 0 AND FechaVencimiento IS NOT NULL'),
+                 sqlite_where=db.text('CantidadDisponible > 0 AND FechaVencimiento IS NOT NULL')),
+    )
+
+    Id = db.Column(db.Integer, primary_key=True)
+    ProductoId = db.Column(db.Integer, db.ForeignKey('Productos.Id'), nullable=False)
+    FechaVencimiento = db.Column(db.Date)  # NULL: no perecedero, se usa al final
+    CantidadInicial = db.Column(db.Float, nullable=False)
+    CantidadDisponible = db.Column(db.Float, nullable=False)
+    # Sin llave foránea: el movimiento puede pasar al archivo
+    MovimientoId = db.Column(db.Integer)
+    FechaCreacion = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Lote {self.Id} producto {self.ProductoId}: {self.CantidadDisponible}>'
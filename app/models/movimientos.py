@@ -1,8 +1,15 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import case
 
 class Movimiento(db.Model):
     __tablename__ = 'Movimientos'
+    __table_args__ = (
+        # Filtros por tipo, del más reciente al más antiguo
+        db.Index('IX_Movimientos_Tipo_FechaCreacion', 'Tipo', 'FechaCreacion'),
+        # Paginación por cursor (FechaCreacion, Id) sin filtros
+        db.Index('IX_Movimientos_FechaCreacion_Id', 'FechaCreacion', 'Id'),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     ProductoId = db.Column(db.Integer, db.ForeignKey('Productos.Id'), nullable=False)
@@ -12,9 +19,22 @@ class Movimiento(db.Model):
     Notas = db.Column(db.Text, nullable=True)
     Usuario = db.Column(db.String(100), nullable=True)
     FechaCreacion = db.Column(db.DateTime, nullable=True)
+    # Corrección del saldo (saldo inicial, edición del producto, conteo físico,
+    # conciliación), no una entrada o salida real: los reportes de consumo y
+    # las recomendaciones la excluyen
+    EsAjuste = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     
     # Relación
     producto_rel = db.relationship('Producto', backref='movimientos_rel')
     
     def __repr__(self):
-        return f'<Movimiento {self.Tipo} - {self.Cantidad} unidades>'
\ No newline at end of file
+        return f'<Movimiento {self.Tipo} - {self.Cantidad} unidades>'
+
+
+# Historial por producto, del más reciente al más antiguo
+db.Index('IX_Movimientos_ProductoId_FechaCreacion', Movimiento.ProductoId, Movimiento.FechaCreacion.desc())
+
+
+def cantidad_firmada(modelo=Movimiento):
+    # Cantidad con signo: positiva para entradas, negativa para salidas
+    return case((modelo.Tipo == 'entrada', modelo.Cantidad), else_=-modelo.Cantidad)
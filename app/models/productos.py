@@ -1,8 +1,16 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import case
 
 class Producto(db.Model):
     __tablename__ = 'Productos'
+    __table_args__ = (
+        # KPIs y listas de bajo stock del dashboard
+        db.Index('IX_Productos_Activo_CantidadActual_StockMinimo', 'Activo', 'CantidadActual', 'StockMinimo'),
+        # Listas y desplegables de productos activos ordenados por nombre
+        db.Index('IX_Productos_Nombre_Activos', 'Nombre',
+                 mssql_where=db.text('Activo = 1'), sqlite_where=db.text('Activo = 1')),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     Nombre = db.Column(db.String(150), nullable=False)
@@ -31,4 +39,23 @@ class Producto(db.Model):
             return 'normal'
     
     def __repr__(self):
-        return f'<Producto {self.Nombre}>'
\ No newline at end of file
+        return f'<Producto {self.Nombre}>'
+
+
+# Expresiones SQL equivalentes a estado_stock()
+def expresion_estado(modelo=Producto):
+    return case(
+        (modelo.CantidadActual == 0, 'critico'),
+        (modelo.CantidadActual <= modelo.StockMinimo, 'bajo'),
+        else_='normal'
+    )
+
+
+def filtro_estado(estado, modelo=Producto):
+    if estado == 'normal':
+        return modelo.CantidadActual > modelo.StockMinimo
+    if estado == 'bajo':
+        return (modelo.CantidadActual <= modelo.StockMinimo) & (modelo.CantidadActual > 0)
+    if estado == 'critico':
+        return modelo.CantidadActual == 0
+    return None
@@ -3,6 +3,10 @@ from datetime import datetime
 
 class Proveedor(db.Model):
     __tablename__ = 'Proveedores'
+    __table_args__ = (
+        db.Index('IX_Proveedores_Nombre_Activos', 'Nombre',
+                 mssql_where=db.text('Activo = 1'), sqlite_where=db.text('Activo = 1')),
+    )
     
     Id = db.Column(db.Integer, primary_key=True)
     Nombre = db.Column(db.String(150), nullable=False)
@@ -0,0 +1,37 @@
+from app import db
+from datetime import datetime
+
+class Receta(db.Model):
+    __tablename__ = 'Recetas'
+    
+    Id = db.Column(db.Integer, primary_key=True)
+    Nombre = db.Column(db.String(150), nullable=False, unique=True)
+    Descripcion = db.Column(db.String(200))
+    Activo = db.Column(db.Boolean, default=True)
+    FechaCreacion = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Relación
+    ingredientes = db.relationship('RecetaIngrediente', backref='receta', lazy=True,
+                                   cascade='all, delete-orphan')
+    
+    def __repr__(self):
+        return f'<Receta {self.Nombre}>'
+
+
+# Ingredientes de una receta: producto y cantidad por porción
+class RecetaIngrediente(db.Model):
+    __tablename__ = 'RecetaIngredientes'
+    __table_args__ = (
+        db.UniqueConstraint('RecetaId', 'ProductoId', name='UQ_RecetaIngredientes_Receta_Producto'),
+    )
+    
+    Id = db.Column(db.Integer, primary_key=True)
+    RecetaId = db.Column(db.Integer, db.ForeignKey('Recetas.Id'), nullable=False)
+    ProductoId = db.Column(db.Integer, db.ForeignKey('Productos.Id'), nullable=False)
+    CantidadPorPorcion = db.Column(db.Float, nullable=False)
+    
+    # Relación
+    producto_rel = db.relationship('Producto', lazy=True)
+    
+    def __repr__(self):
+        return f'<RecetaIngrediente {self.RecetaId}: {self.ProductoId} x {self.CantidadPorPorcion}>'
@@ -0,0 +1,25 @@
+from app import db
+
+class RecomendacionStock(db.Model):
+    __tablename__ = 'RecomendacionesStock'
+    __table_args__ = (
+        db.Index('IX_RecomendacionesStock_Estado_ProductoId', 'Estado', 'ProductoId'),
+    )
+    
+    Id = db.Column(db.Integer, primary_key=True)
+    ProductoId = db.Column(db.Integer, db.ForeignKey('Productos.Id'), nullable=False)
+    FechaCalculo = db.Column(db.DateTime, nullable=False)
+    DiasHistoria = db.Column(db.Integer, nullable=False)
+    ConsumoDiario = db.Column(db.Float, nullable=False)
+    DesviacionDiaria = db.Column(db.Float, nullable=False)
+    StockMinimoActual = db.Column(db.Float)
+    PuntoReorden = db.Column(db.Float, nullable=False)
+    CantidadSugerida = db.Column(db.Float, nullable=False)
+    Estado = db.Column(db.String(20), nullable=False, default='pendiente')  # pendiente, aplicada, descartada
+    FechaAplicacion = db.Column(db.DateTime)
+    
+    # Relación
+    producto_rel = db.relationship('Producto', backref='recomendaciones', lazy=True)
+    
+    def __repr__(self):
+        return f'<RecomendacionStock {self.ProductoId}: {self.PuntoReorden}>'
@@ -0,0 +1,16 @@
+from app import db
+
+class SnapshotStock(db.Model):
+    __tablename__ = 'SnapshotsStock'
+    __table_args__ = (
+        db.UniqueConstraint('ProductoId', 'FechaCorte', name='UQ_SnapshotsStock_Producto_Fecha'),
+        db.Index('IX_SnapshotsStock_FechaCorte', 'FechaCorte'),
+    )
+    
+    Id = db.Column(db.Integer, primary_key=True)
+    ProductoId = db.Column(db.Integer, db.ForeignKey('Productos.Id'), nullable=False)
+    FechaCorte = db.Column(db.DateTime, nullable=False)
+    Cantidad = db.Column(db.Float, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<SnapshotStock {self.ProductoId} @ {self.FechaCorte}: {self.Cantidad}>'
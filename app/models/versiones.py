@@ -0,0 +1,10 @@
+from app import db
+
+class VersionDatos(db.Model):
+    __tablename__ = 'VersionesDatos'
+    
+    Tabla = db.Column(db.String(50), primary_key=True)
+    Version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<VersionDatos {self.Tabla} v{self.Version}>'
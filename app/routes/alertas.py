@@ -0,0 +1,50 @@
+from flask import Blueprint, Response, current_app, jsonify, stream_with_context
+from app.services.alertas import broker
+from queue import Empty
+import json
+
+# Blueprint Alertas (eventos de stock en vivo para el dashboard)
+alertas_bp = Blueprint('alertas', __name__, url_prefix='/alertas')
+
+
+def _formato_sse(evento):
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {json.dumps(evento, ensure_ascii=False)}\n\n"
+
+
+# ========================
+# Stream de alertas (Server-Sent Events)
+# ========================
+# Cada conexión ocupa un hilo mientras está abierta: con gunicorn usar
+# workers con hilos (--threads) o gevent. No se consulta la base de datos.
+@alertas_bp.route('/stream')
+def stream_alertas():
+    latido = current_app.config.get('ALERTAS_LATIDO_S', 15)
+    cola = broker.suscribir()
+
+    def eventos():
+        try:
+            # Reintento del navegador si se corta la conexión
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    evento = cola.get(timeout=latido)
+                except Empty:
+                    # Comentario SSE para mantener viva la conexión en proxies
+                    yield ': latido\n\n'
+                    continue
+                yield _formato_sse(evento)
+        finally:
+            broker.desuscribir(cola)
+
+    return Response(stream_with_context(eventos()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+# ========================
+# API: Estadísticas del broker
+# ========================
+@alertas_bp.route('/api/estadisticas')
+def estadisticas_alertas():
+    return jsonify(broker.estadisticas())
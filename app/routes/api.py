@@ -0,0 +1,283 @@
+from flask import Blueprint, request, jsonify
+from app import db
+from app.models.categorias import Categoria
+from app.models.movimientos import Movimiento
+from app.models.productos import Producto, expresion_estado, filtro_estado
+from app.models.proveedores import Proveedor
+from app.services.archivo import paginar_historial
+from app.services.cambios import LIMITE_DEFECTO, LIMITE_MAXIMO, cambios_desde, cargar_registros
+from app.services.lotes import consulta_por_vencer, consulta_lotes_producto
+from app.services.versiones import version_de
+from app.utils.http import argumentos_normalizados, calcular_etag, respuesta_json, respuesta_no_modificada
+from app.utils.paginacion import leer_por_pagina, paginar_por_id
+from sqlalchemy import select
+from datetime import date
+
+# Blueprint API v1 (JSON para tabletas y clientes externos)
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# ========================
+# Campos disponibles por recurso
+# ========================
+# Solo se seleccionan en SQL los campos pedidos con ?fields=a,b,c
+CAMPOS_PRODUCTO = {
+    'id': Producto.Id,
+    'nombre': Producto.Nombre,
+    'codigo_sku': Producto.CodigoSKU,
+    'descripcion': Producto.Descripcion,
+    'cantidad': Producto.CantidadActual,
+    'unidad_medida': Producto.UnidadMedida,
+    'stock_minimo': Producto.StockMinimo,
+    'precio_unitario': Producto.PrecioUnitario,
+    'categoria_id': Producto.CategoriaId,
+    'proveedor_id': Producto.ProveedorId,
+    'activo': Producto.Activo,
+    'estado': expresion_estado(),
+    'fecha_creacion': Producto.FechaCreacion,
+}
+CAMPOS_PRODUCTO_DEFECTO = ('id', 'nombre', 'codigo_sku', 'cantidad', 'unidad_medida', 'stock_minimo', 'estado')
+
+CAMPOS_MOVIMIENTO = {
+    'id': Movimiento.Id,
+    'producto_id': Movimiento.ProductoId,
+    'tipo': Movimiento.Tipo,
+    'cantidad': Movimiento.Cantidad,
+    'motivo': Movimiento.Motivo,
+    'notas': Movimiento.Notas,
+    'usuario': Movimiento.Usuario,
+    'fecha_creacion': Movimiento.FechaCreacion,
+    'producto_nombre': Producto.Nombre,
+    'codigo_sku': Producto.CodigoSKU,
+}
+CAMPOS_MOVIMIENTO_DEFECTO = ('id', 'producto_id', 'tipo', 'cantidad', 'motivo', 'usuario', 'fecha_creacion')
+
+CAMPOS_CATEGORIA = {
+    'id': Categoria.Id,
+    'nombre': Categoria.Nombre,
+    'descripcion': Categoria.Descripcion,
+    'activo': Categoria.Activo,
+}
+
+CAMPOS_PROVEEDOR = {
+    'id': Proveedor.Id,
+    'nombre': Proveedor.Nombre,
+    'contacto': Proveedor.Contacto,
+    'telefono': Proveedor.Telefono,
+    'email': Proveedor.Email,
+    'activo': Proveedor.Activo,
+}
+
+# Campos enviados por el registro de cambios: (clave en la respuesta, campos)
+CAMPOS_CAMBIOS = {
+    'Productos': ('productos', CAMPOS_PRODUCTO, CAMPOS_PRODUCTO_DEFECTO + (
+        'precio_unitario', 'categoria_id', 'proveedor_id', 'activo')),
+    'Categorias': ('categorias', CAMPOS_CATEGORIA, tuple(CAMPOS_CATEGORIA)),
+    'Proveedores': ('proveedores', CAMPOS_PROVEEDOR, tuple(CAMPOS_PROVEEDOR)),
+    'Movimientos': ('movimientos', CAMPOS_MOVIMIENTO, CAMPOS_MOVIMIENTO_DEFECTO),
+}
+
+
+class ParametroInvalido(ValueError):
+    pass
+
+
+def _leer_campos(disponibles, por_defecto):
+    valor = request.args.get('fields', '').strip()
+    if not valor:
+        return list(por_defecto)
+    campos = []
+    for campo in valor.split(','):
+        campo = campo.strip()
+        if campo not in disponibles:
+            raise ParametroInvalido(f'Campo desconocido: {campo}')
+        if campo not in campos:
+            campos.append(campo)
+    return campos
+
+
+def _valor(valor):
+    # Decimal -> float, fechas -> ISO 8601
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    if valor is not None and not isinstance(valor, (int, float, str, bool)):
+        return float(valor)
+    return valor
+
+
+def _serializar(filas, campos, propios):
+    # propios: campos leídos de las columnas del modelo que siempre se seleccionan
+    return [
+        {campo: _valor(fila._mapping[propios.get(campo, campo)]) for campo in campos}
+        for fila in filas
+    ]
+
+
+@api_bp.errorhandler(ParametroInvalido)
+def _parametro_invalido(error):
+    return jsonify({'error': str(error)}), 400
+
+
+# ========================
+# Productos
+# ========================
+@api_bp.route('/productos')
+def api_productos():
+    # ETag a partir de las versiones (catálogo y stock) y de los parámetros
+    etag = calcular_etag('productos', version_de('Productos', 'Movimientos'), argumentos_normalizados())
+    no_modificada = respuesta_no_modificada(etag)
+    if no_modificada:
+        return no_modificada
+
+    campos = _leer_campos(CAMPOS_PRODUCTO, CAMPOS_PRODUCTO_DEFECTO)
+    por_pagina = leer_por_pagina(request.args.get('por_pagina'))
+    estado = request.args.get('estado', '')
+    categoria_id = request.args.get('categoria_id', type=int)
+    activo = request.args.get('activo', '1') != '0'
+
+    # Id siempre se selecciona para construir el cursor
+    columnas = [CAMPOS_PRODUCTO[c].label(c) for c in campos if c != 'id']
+    consulta = select(*columnas, Producto.Id).where(Producto.Activo == activo)
+    if categoria_id is not None:
+        consulta = consulta.where(Producto.CategoriaId == categoria_id)
+    if estado:
+        condicion = filtro_estado(estado)
+        if condicion is None:
+            raise ParametroInvalido(f'Estado desconocido: {estado}')
+        consulta = consulta.where(condicion)
+
+    try:
+        filas, siguiente = paginar_por_id(consulta, Producto.Id, request.args.get('cursor'), por_pagina)
+    except ValueError:
+        raise ParametroInvalido('Cursor inválido')
+
+    datos = _serializar(filas, campos, {'id': 'Id'})
+    return respuesta_json({'datos': datos, 'siguiente': siguiente, 'por_pagina': por_pagina}, etag)
+
+
+# ========================
+# Movimientos
+# ========================
+@api_bp.route('/movimientos')
+def api_movimientos():
+    etag = calcular_etag('movimientos', version_de('Movimientos', 'ArchivoHasta'), argumentos_normalizados())
+    no_modificada = respuesta_no_modificada(etag)
+    if no_modificada:
+        return no_modificada
+
+    campos = _leer_campos(CAMPOS_MOVIMIENTO, CAMPOS_MOVIMIENTO_DEFECTO)
+    por_pagina = leer_por_pagina(request.args.get('por_pagina'))
+    producto_id = request.args.get('producto_id', type=int)
+    tipo = request.args.get('tipo', '')
+
+    # Id y FechaCreacion siempre se seleccionan para construir los cursores;
+    # m es la tabla caliente o el archivo, según la página
+    def construir(m):
+        columnas = [
+            (getattr(m, CAMPOS_MOVIMIENTO[c].key) if CAMPOS_MOVIMIENTO[c].class_ is Movimiento
+             else CAMPOS_MOVIMIENTO[c]).label(c)
+            for c in campos if c not in ('id', 'fecha_creacion')
+        ]
+        consulta = select(*columnas, m.Id, m.FechaCreacion)
+        if 'producto_nombre' in campos or 'codigo_sku' in campos:
+            consulta = consulta.join(Producto, m.ProductoId == Producto.Id)
+        if producto_id is not None:
+            consulta = consulta.where(m.ProductoId == producto_id)
+        if tipo:
+            consulta = consulta.where(m.Tipo == tipo)
+        return consulta
+
+    try:
+        filas, siguiente, anterior = paginar_historial(
+            construir,
+            cursor=request.args.get('cursor'),
+            direccion=request.args.get('direccion', 'siguiente'),
+            por_pagina=por_pagina
+        )
+    except ValueError:
+        raise ParametroInvalido('Cursor inválido')
+
+    datos = _serializar(filas, campos, {'id': 'Id', 'fecha_creacion': 'FechaCreacion'})
+    return respuesta_json({
+        'datos': datos,
+        'siguiente': siguiente,
+        'anterior': anterior,
+        'por_pagina': por_pagina
+    }, etag)
+
+
+# ========================
+# Cambios desde un número (sincronización incremental)
+# ========================
+@api_bp.route('/cambios')
+def api_cambios():
+    desde = request.args.get('desde', 0, type=int)
+    limite = max(1, min(request.args.get('limite', LIMITE_DEFECTO, type=int), LIMITE_MAXIMO))
+
+    resultado = cambios_desde(desde, limite)
+    respuesta = {'hasta': resultado.hasta, 'mas': resultado.mas, 'reinicio': resultado.reinicio}
+
+    # Un cliente al día recibe solo el número: una consulta de rango y
+    # ninguna lectura de las tablas de datos
+    for tabla, operaciones in resultado.cambios.items():
+        clave, disponibles, campos = CAMPOS_CAMBIOS[tabla]
+        columnas = [disponibles[c].label(c) for c in campos if c != 'id']
+        registros = _serializar(cargar_registros(tabla, operaciones, columnas), campos, {'id': 'Id'})
+        for registro in registros:
+            registro['operacion'] = operaciones[registro['id']]
+        respuesta[clave] = registros
+
+    return respuesta_json(respuesta)
+
+
+# ========================
+# Lotes y vencimientos
+# ========================
+DIAS_POR_VENCER_MAXIMO = 365
+
+@api_bp.route('/lotes/por-vencer')
+def api_lotes_por_vencer():
+    dias = request.args.get('dias', 7, type=int)
+    if not 0 <= dias <= DIAS_POR_VENCER_MAXIMO:
+        raise ParametroInvalido(f'dias debe estar entre 0 y {DIAS_POR_VENCER_MAXIMO}')
+
+    # La fecha de hoy entra en el ETag: el mismo lote pasa a vencido al cambiar el día
+    hoy = date.today()
+    etag = calcular_etag('lotes_por_vencer', version_de('Productos', 'Movimientos') + (hoy.isoformat(),),
+                         argumentos_normalizados())
+    no_modificada = respuesta_no_modificada(etag)
+    if no_modificada:
+        return no_modificada
+
+    filas = db.session.execute(consulta_por_vencer(dias, hoy)).all()
+    datos = [
+        {
+            'lote_id': f.Id,
+            'producto_id': f.ProductoId,
+            'codigo_sku': f.CodigoSKU,
+            'nombre': f.Nombre,
+            'unidad_medida': f.UnidadMedida,
+            'fecha_vencimiento': f.FechaVencimiento.isoformat(),
+            'dias_restantes': (f.FechaVencimiento - hoy).days,
+            'cantidad': f.CantidadDisponible,
+            'valor': round(f.CantidadDisponible * float(f.PrecioUnitario), 2)
+        }
+        for f in filas
+    ]
+    return respuesta_json({'datos': datos, 'dias': dias}, etag)
+
+
+@api_bp.route('/productos/<int:producto_id>/lotes')
+def api_lotes_producto(producto_id):
+    # Lotes con saldo en el orden en que se consumen (FEFO)
+    filas = db.session.execute(consulta_lotes_producto(producto_id)).all()
+    return respuesta_json({'datos': [
+        {
+            'lote_id': f.Id,
+            'fecha_vencimiento': _valor(f.FechaVencimiento),
+            'cantidad_inicial': f.CantidadInicial,
+            'cantidad': f.CantidadDisponible,
+            'movimiento_id': f.MovimientoId,
+            'fecha_creacion': _valor(f.FechaCreacion)
+        }
+        for f in filas
+    ]})
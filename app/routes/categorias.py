@@ -1,6 +1,9 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from app.models.categorias import Categoria
 from app import db
+from app.services.busqueda import indice_categorias
+from app.services.cambios import registrar_cambios
+from app.services.versiones import incrementar_version
 from datetime import datetime
 
 categorias_bp = Blueprint('categorias', __name__, url_prefix='/categorias')
@@ -15,7 +18,8 @@ def listar_categorias():
     query = Categoria.query.filter_by(Activo=True)
     
     if search:
-        query = query.filter(Categoria.Nombre.ilike(f'%{search}%'))
+        ids = indice_categorias.buscar(search, limite=current_app.config.get('BUSQUEDA_LIMITE', 500))
+        query = query.filter(Categoria.Id.in_(ids))
     
     if sort_by == 'fecha':
         query = query.order_by(Categoria.FechaCreacion.desc())
@@ -23,6 +27,9 @@ def listar_categorias():
         query = query.order_by(Categoria.Nombre.asc())
     
     categorias = query.all()
+    if search and 'sort_by' not in request.args:
+        rango = {id: posicion for posicion, id in enumerate(ids)}
+        categorias.sort(key=lambda c: rango[c.Id])
     return render_template('categorias/lista.html', categorias=categorias)
 
 # Listar categorías inactivas - NUEVA FUNCIÓN
@@ -51,7 +58,12 @@ def agregar_categoria():
 
     nueva_categoria = Categoria(Nombre=nombre, Descripcion=descripcion,FechaCreacion=fecha_creacion)
     db.session.add(nueva_categoria)
+    incrementar_version('Categorias')
+    db.session.flush()
+    registrar_cambios('Categorias', [nueva_categoria.Id], 'alta')
+    indexado = (nueva_categoria.Id, True, nombre)
     db.session.commit()
+    indice_categorias.agregar(*indexado)
     flash('Categoría creada correctamente.', 'success')
     return redirect(url_for('categorias.listar_categorias'))
 
@@ -75,7 +87,11 @@ def editar_categoria(id):
 
         categoria.Nombre = nombre
         categoria.Descripcion = descripcion
+        indexado = (categoria.Id, categoria.Activo, nombre)
+        incrementar_version('Categorias')
+        registrar_cambios('Categorias', [id], 'edicion')
         db.session.commit()
+        indice_categorias.agregar(*indexado)
         flash('Categoría actualizada correctamente.', 'success')
         return redirect(url_for('categorias.listar_categorias'))
 
@@ -88,7 +104,10 @@ def eliminar_categoria(id):
     
     # ELIMINACIÓN LÓGICA (desactivar)
     categoria.Activo = False
+    incrementar_version('Categorias')
+    registrar_cambios('Categorias', [id], 'baja')
     db.session.commit()
+    indice_categorias.actualizar_estado(id, False)
     
     flash('Categoría desactivada correctamente.', 'success')
     return redirect(url_for('categorias.listar_categorias'))
@@ -100,7 +119,10 @@ def reactivar_categoria(id):
     
     # Reactivar la categoría
     categoria.Activo = True
+    incrementar_version('Categorias')
+    registrar_cambios('Categorias', [id], 'reactivacion')
     db.session.commit()
+    indice_categorias.actualizar_estado(id, True)
     
     flash('Categoría reactivada correctamente.', 'success')
     return redirect(url_for('categorias.listar_categorias_inactivas'))
\ No newline at end of file
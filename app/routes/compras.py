@@ -0,0 +1,147 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort
+from app import db
+from app.models.compras import OrdenCompra, OrdenCompraLinea
+from app.models.productos import Producto
+from app.models.proveedores import Proveedor
+from app.services.compras import generar_ordenes, recibir_orden, cancelar_orden, CompraError
+from app.services.stock import StockError
+from sqlalchemy import select, func
+
+# Blueprint Compras (órdenes de compra por proveedor)
+compras_bp = Blueprint('compras', __name__, url_prefix='/compras')
+
+# ========================
+# Listar y generar órdenes
+# ========================
+@compras_bp.route('/')
+def listar_ordenes():
+    totales = select(
+        OrdenCompraLinea.OrdenId,
+        func.count().label('Lineas'),
+        func.sum(OrdenCompraLinea.Cantidad * OrdenCompraLinea.PrecioUnitario).label('Total')
+    ).group_by(OrdenCompraLinea.OrdenId).subquery()
+    ordenes = db.session.execute(
+        select(OrdenCompra, Proveedor.Nombre, func.coalesce(totales.c.Lineas, 0), func.coalesce(totales.c.Total, 0))
+        .join(Proveedor, Proveedor.Id == OrdenCompra.ProveedorId)
+        .outerjoin(totales, totales.c.OrdenId == OrdenCompra.Id)
+        .order_by(OrdenCompra.FechaCreacion.desc(), OrdenCompra.Id.desc())
+        .limit(100)
+    ).all()
+    return render_template('compras/lista.html', ordenes=ordenes)
+
+@compras_bp.route('/generar', methods=['POST'])
+def generar():
+    try:
+        factor_objetivo = float(request.form.get('factor_objetivo', 2))
+        resultado = generar_ordenes(factor_objetivo, usuario=request.form.get('usuario') or 'Sistema')
+    except ValueError:
+        flash('El factor objetivo debe ser numérico.', 'danger')
+        return redirect(url_for('compras.listar_ordenes'))
+    except CompraError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('compras.listar_ordenes'))
+
+    if resultado.ordenes:
+        flash(f'{resultado.ordenes} órdenes generadas con {resultado.lineas} productos.', 'success')
+    else:
+        flash('No hay productos bajo su mínimo sin una orden en borrador.', 'info')
+    return redirect(url_for('compras.listar_ordenes'))
+
+# ========================
+# Detalle y recepción
+# ========================
+@compras_bp.route('/<int:id>')
+def detalle_orden(id):
+    orden = db.session.get(OrdenCompra, id) or abort(404)
+    lineas = db.session.execute(
+        select(
+            OrdenCompraLinea.ProductoId,
+            OrdenCompraLinea.Cantidad,
+            OrdenCompraLinea.CantidadRecibida,
+            OrdenCompraLinea.PrecioUnitario,
+            Producto.CodigoSKU,
+            Producto.Nombre,
+            Producto.UnidadMedida,
+            Producto.CantidadActual,
+            Producto.StockMinimo
+        ).join(Producto, Producto.Id == OrdenCompraLinea.ProductoId)
+        .where(OrdenCompraLinea.OrdenId == id)
+        .order_by(Producto.Nombre)
+    ).all()
+    return render_template('compras/detalle.html', orden=orden, lineas=lineas)
+
+@compras_bp.route('/<int:id>/recibir', methods=['POST'])
+def recibir(id):
+    # Campos recibida_<producto_id>; los vacíos se reciben completos
+    recibidas = {}
+    try:
+        for campo, valor in request.form.items():
+            if campo.startswith('recibida_') and valor.strip():
+                recibidas[int(campo[len('recibida_'):])] = float(valor)
+    except ValueError:
+        flash('Las cantidades recibidas deben ser numéricas.', 'danger')
+        return redirect(url_for('compras.detalle_orden', id=id))
+
+    try:
+        resultado = recibir_orden(id, recibidas, usuario=request.form.get('usuario') or 'Sistema')
+    except (CompraError, StockError) as e:
+        flash(f'No se pudo recibir la orden: {str(e)}', 'danger')
+        return redirect(url_for('compras.detalle_orden', id=id))
+
+    flash(f'Orden recibida: {resultado.aplicadas} entradas registradas.', 'success')
+    return redirect(url_for('compras.detalle_orden', id=id))
+
+@compras_bp.route('/<int:id>/cancelar', methods=['POST'])
+def cancelar(id):
+    try:
+        cancelar_orden(id)
+    except CompraError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('compras.detalle_orden', id=id))
+
+    flash('Orden cancelada; el stock no cambió.', 'success')
+    return redirect(url_for('compras.listar_ordenes'))
+
+# ========================
+# API: generar y recibir órdenes
+# ========================
+@compras_bp.route('/api/generar', methods=['POST'])
+def api_generar():
+    datos = request.get_json(silent=True) or {}
+    try:
+        factor_objetivo = float(datos.get('factor_objetivo', 2))
+        resultado = generar_ordenes(factor_objetivo, usuario=datos.get('usuario') or 'Sistema')
+    except (TypeError, ValueError):
+        return jsonify({'error': 'El factor objetivo debe ser numérico.'}), 400
+    except CompraError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(resultado._asdict()), 201 if resultado.ordenes else 200
+
+@compras_bp.route('/api/<int:id>/recibir', methods=['POST'])
+def api_recibir(id):
+    datos = request.get_json(silent=True) or {}
+    items = datos.get('recibidas') or []
+    if not isinstance(items, list):
+        return jsonify({'error': 'recibidas debe ser una lista.'}), 400
+
+    recibidas = {}
+    for indice, item in enumerate(items, start=1):
+        try:
+            recibidas[int(item['producto_id'])] = float(item['cantidad'])
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': f'Línea {indice}: formato inválido.'}), 400
+
+    try:
+        resultado = recibir_orden(id, recibidas, usuario=datos.get('usuario') or 'Sistema')
+    except CompraError as e:
+        return jsonify({'error': str(e)}), 409
+    except StockError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'aplicadas': resultado.aplicadas,
+        'saldos': [
+            {'producto_id': producto_id, 'cantidad_actual': cantidad}
+            for producto_id, cantidad in resultado.saldos.items()
+        ]
+    })
@@ -0,0 +1,138 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort
+from app import db
+from app.models.conteos import ConteoInventario, ConteoDetalle
+from app.services.conteos import (abrir_conteo, leer_conteos_csv, registrar_conteos, diferencias_conteo,
+                                  cerrar_conteo, cancelar_conteo, ConteoError)
+from app.services.stock import StockError
+from sqlalchemy import select, func
+import io
+
+# Blueprint Conteos (conteo físico de inventario por sesiones)
+conteos_bp = Blueprint('conteos', __name__, url_prefix='/conteos')
+
+# ========================
+# Listar y abrir conteos
+# ========================
+@conteos_bp.route('/')
+def listar_conteos():
+    lineas = select(ConteoDetalle.ConteoId, func.count().label('Lineas'))\
+        .group_by(ConteoDetalle.ConteoId).subquery()
+    conteos = db.session.execute(
+        select(ConteoInventario, func.coalesce(lineas.c.Lineas, 0))
+        .outerjoin(lineas, lineas.c.ConteoId == ConteoInventario.Id)
+        .order_by(ConteoInventario.FechaCreacion.desc())
+        .limit(100)
+    ).all()
+    return render_template('conteos/lista.html', conteos=conteos)
+
+@conteos_bp.route('/nuevo', methods=['POST'])
+def nuevo_conteo():
+    nombre = request.form.get('nombre', '').strip()
+    if not nombre:
+        flash('El nombre del conteo es obligatorio.', 'danger')
+        return redirect(url_for('conteos.listar_conteos'))
+
+    conteo = abrir_conteo(nombre, usuario=request.form.get('usuario') or 'Sistema')
+    flash(f'Conteo "{nombre}" abierto.', 'success')
+    return redirect(url_for('conteos.detalle_conteo', id=conteo.Id))
+
+# ========================
+# Detalle: diferencias contra el sistema
+# ========================
+@conteos_bp.route('/<int:id>')
+def detalle_conteo(id):
+    conteo = db.session.get(ConteoInventario, id) or abort(404)
+    solo_diferencias = request.args.get('solo_diferencias') == '1'
+    diferencias, resumen = diferencias_conteo(id, solo_diferencias=solo_diferencias)
+    return render_template('conteos/detalle.html', conteo=conteo, diferencias=diferencias,
+                           resumen=resumen, solo_diferencias=solo_diferencias)
+
+# ========================
+# Cargar cantidades (CSV o texto)
+# ========================
+@conteos_bp.route('/<int:id>/cargar', methods=['POST'])
+def cargar_conteo(id):
+    delimitador = request.form.get('delimitador', ',') or ','
+    archivo = request.files.get('archivo')
+    if archivo and archivo.filename:
+        entrada = io.TextIOWrapper(archivo.stream, encoding='utf-8-sig', newline='')
+    else:
+        entrada = io.StringIO(request.form.get('texto', ''))
+
+    try:
+        conteos, errores = leer_conteos_csv(entrada, delimitador)
+        if not conteos and not errores:
+            flash('No se recibieron cantidades.', 'warning')
+            return redirect(url_for('conteos.detalle_conteo', id=id))
+        resultado = registrar_conteos(id, conteos)
+    except (ConteoError, UnicodeDecodeError) as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('conteos.detalle_conteo', id=id))
+
+    errores += resultado.errores
+    if errores:
+        flash(f'{len(errores)} líneas rechazadas: ' + ' '.join(errores[:10]), 'warning')
+    flash(f'{resultado.guardadas} productos contados.', 'success')
+    return redirect(url_for('conteos.detalle_conteo', id=id))
+
+# ========================
+# Cerrar (aplicar ajustes) o cancelar
+# ========================
+@conteos_bp.route('/<int:id>/cerrar', methods=['POST'])
+def cerrar(id):
+    try:
+        resultado = cerrar_conteo(id, usuario=request.form.get('usuario') or 'Sistema')
+    except (ConteoError, StockError) as e:
+        flash(f'No se pudo cerrar el conteo: {str(e)}', 'danger')
+        return redirect(url_for('conteos.detalle_conteo', id=id))
+
+    flash(f'Conteo cerrado: {resultado.ajustes} ajustes registrados en {resultado.segundos:.2f}s.', 'success')
+    return redirect(url_for('conteos.detalle_conteo', id=id))
+
+@conteos_bp.route('/<int:id>/cancelar', methods=['POST'])
+def cancelar(id):
+    try:
+        cancelar_conteo(id)
+    except ConteoError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('conteos.detalle_conteo', id=id))
+
+    flash('Conteo cancelado; el stock no cambió.', 'success')
+    return redirect(url_for('conteos.listar_conteos'))
+
+# ========================
+# API: cargar cantidades y consultar diferencias (tabletas)
+# ========================
+@conteos_bp.route('/api/<int:id>/conteos', methods=['POST'])
+def api_cargar_conteo(id):
+    datos = request.get_json(silent=True) or {}
+    items = datos.get('conteos')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Se requiere una lista de conteos.'}), 400
+
+    conteos = []
+    errores = []
+    for indice, item in enumerate(items, start=1):
+        try:
+            conteos.append((int(item['producto_id']), float(item['cantidad'])))
+        except (KeyError, TypeError, ValueError):
+            errores.append(f'Línea {indice}: formato inválido.')
+    if errores:
+        return jsonify({'errores': errores}), 400
+
+    try:
+        resultado = registrar_conteos(id, conteos)
+    except ConteoError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify({'guardadas': resultado.guardadas, 'errores': resultado.errores})
+
+@conteos_bp.route('/api/<int:id>/diferencias')
+def api_diferencias(id):
+    try:
+        diferencias, resumen = diferencias_conteo(id, solo_diferencias=request.args.get('todas') != '1')
+    except ConteoError as e:
+        return jsonify({'error': str(e)}), 404
+    return jsonify({
+        'resumen': resumen._asdict(),
+        'diferencias': [d._asdict() for d in diferencias]
+    })
@@ -1,9 +1,18 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort, current_app
 from app.models.movimientos import Movimiento
 from app.models.productos import Producto
+from app.models.archivo import MovimientoArchivo
 from app import db
+from app.services.stock import (registrar_movimiento, registrar_lote, LineaMovimiento,
+                                ProductoNoEncontradoError, StockInsuficienteError,
+                                LoteInvalidoError, LoteDuplicadoError)
+from app.services.cache_referencia import productos_activos
+from app.services.cache_paginas import cachear_pagina
+from app.services.archivo import libro_movimientos, paginar_historial, horizonte_archivo
+from app.utils.paginacion import leer_por_pagina
+from app.utils.exportacion import respuesta_exportacion, leer_fecha
+from sqlalchemy import select
 from decimal import Decimal
-from datetime import datetime
 
 # Blueprint Movimientos
 movimientos_bp = Blueprint('movimientos', __name__, url_prefix='/movimientos')
@@ -11,36 +20,108 @@ movimientos_bp = Blueprint('movimientos', __name__, url_prefix='/movimientos')
 # ========================
 # Listar Movimientos
 # ========================
+def _filtrar_movimientos(query, producto_id, tipo, m=Movimiento):
+    if producto_id:
+        query = query.where(m.ProductoId == producto_id)
+    
+    if tipo:
+        query = query.where(m.Tipo == tipo)
+    
+    return query
+
 @movimientos_bp.route('/')
+@cachear_pagina('Movimientos', 'Productos', 'ArchivoHasta')
 def listar_movimientos():
     # Obtener parámetros de filtro
     producto_id = request.args.get('producto_id', '')
     tipo = request.args.get('tipo', '')
+    cursor = request.args.get('cursor', '')
+    direccion = request.args.get('dir', 'siguiente')
+    por_pagina = leer_por_pagina(request.args.get('por_pagina'))
     
-    # Consulta base
-    query = Movimiento.query.join(Producto, Producto.Id == Movimiento.ProductoId)
-    
-    # Aplicar filtros
-    if producto_id:
-        query = query.filter(Movimiento.ProductoId == producto_id)
+    # Consulta base: columnas del movimiento y del producto en una sola consulta
+    # (m es la tabla caliente o el archivo, según la página)
+    def construir(m):
+        query = select(
+            m.Id,
+            m.FechaCreacion,
+            m.Tipo,
+            m.Cantidad,
+            m.Motivo,
+            m.Notas,
+            Producto.CodigoSKU,
+            Producto.Nombre,
+            Producto.UnidadMedida
+        ).join(Producto, Producto.Id == m.ProductoId)
+        
+        # Aplicar filtros
+        return _filtrar_movimientos(query, producto_id, tipo, m)
     
-    if tipo:
-        query = query.filter(Movimiento.Tipo == tipo)
+    # Paginación por cursor, más reciente primero
+    try:
+        movimientos, cursor_siguiente, cursor_anterior = paginar_historial(
+            construir, cursor=cursor, direccion=direccion, por_pagina=por_pagina
+        )
+    except ValueError:
+        flash('El cursor de paginación no es válido.', 'warning')
+        movimientos, cursor_siguiente, cursor_anterior = paginar_historial(
+            construir, por_pagina=por_pagina
+        )
     
-    # Ordenar por fecha más reciente primero
-    movimientos = query.order_by(Movimiento.FechaCreacion.desc()).all()
-    productos = Producto.query.filter_by(Activo=True).all()
+    productos = productos_activos()
     
     return render_template('movimientos/lista.html', 
                            movimientos=movimientos, 
-                           productos=productos)
+                           productos=productos,
+                           cursor_siguiente=cursor_siguiente,
+                           cursor_anterior=cursor_anterior)
+
+# ========================
+# Exportar Movimientos (CSV / JSON)
+# ========================
+@movimientos_bp.route('/exportar')
+def exportar_movimientos():
+    producto_id = request.args.get('producto_id', '')
+    tipo = request.args.get('tipo', '')
+    formato = request.args.get('formato', 'csv')
+    
+    try:
+        desde = leer_fecha(request.args.get('desde'))
+        hasta = leer_fecha(request.args.get('hasta'), fin_de_dia=True)
+    except ValueError:
+        return jsonify({'error': 'Las fechas deben tener el formato YYYY-MM-DD.'}), 400
+    
+    # Solo columnas, sin entidades ORM; el archivo se lee solo si el rango lo necesita
+    m = libro_movimientos(desde)
+    query = select(
+        m.Id,
+        m.FechaCreacion,
+        m.Tipo,
+        m.Cantidad,
+        m.Motivo,
+        m.Notas,
+        m.Usuario,
+        m.ProductoId,
+        Producto.CodigoSKU,
+        Producto.Nombre,
+        Producto.UnidadMedida
+    ).join(Producto, Producto.Id == m.ProductoId)
+    
+    query = _filtrar_movimientos(query, producto_id, tipo, m)
+    if desde:
+        query = query.where(m.FechaCreacion >= desde)
+    if hasta:
+        query = query.where(m.FechaCreacion < hasta)
+    
+    query = query.order_by(m.FechaCreacion.desc(), m.Id.desc())
+    return respuesta_exportacion(query, formato, 'movimientos')
 
 # ========================
 # Registrar Entrada de Stock
 # ========================
 @movimientos_bp.route('/entrada', methods=['GET', 'POST'])
 def registrar_entrada():
-    productos = Producto.query.filter_by(Activo=True).all()
+    productos = productos_activos()
     
     if request.method == 'POST':
         try:
@@ -48,34 +129,23 @@ def registrar_entrada():
             cantidad = Decimal(request.form['cantidad'])
             motivo = request.form.get('motivo', '').strip()
             notas = request.form.get('notas', '').strip()
-            
-            producto = Producto.query.get_or_404(producto_id)
+            vencimiento = leer_fecha(request.form.get('fecha_vencimiento', '').strip())
             
             # Validaciones
             if cantidad <= 0:
                 flash('La cantidad debe ser mayor a 0.', 'danger')
                 return render_template('movimientos/entrada.html', productos=productos)
             
-            # Crear movimiento de entrada
-            nuevo_movimiento = Movimiento(
-                ProductoId=producto_id,
-                Tipo='entrada',
-                Cantidad=cantidad,
-                Motivo=motivo,
-                Notas=notas,
-                Usuario="Sistema",
-                FechaCreacion=datetime.utcnow()
-            )
-            
-            # Actualizar stock del producto
-            producto.CantidadActual += float(cantidad)
-            
-            db.session.add(nuevo_movimiento)
-            db.session.commit()
+            # Aplicar el movimiento de forma atómica (UPDATE condicional + INSERT);
+            # la entrada crea un lote con su fecha de vencimiento
+            registrar_movimiento(producto_id, 'entrada', cantidad, motivo, notas,
+                                 vencimiento=vencimiento.date() if vencimiento else None)
             
             flash(f'Entrada de {cantidad} unidades registrada exitosamente.', 'success')
             return redirect(url_for('movimientos.listar_movimientos'))
             
+        except ProductoNoEncontradoError:
+            abort(404)
         except Exception as e:
             db.session.rollback()
             flash(f'Error al registrar entrada: {str(e)}', 'danger')
@@ -88,7 +158,7 @@ def registrar_entrada():
 # ========================
 @movimientos_bp.route('/salida', methods=['GET', 'POST'])
 def registrar_salida():
-    productos = Producto.query.filter_by(Activo=True).all()
+    productos = productos_activos()
     
     if request.method == 'POST':
         try:
@@ -97,37 +167,22 @@ def registrar_salida():
             motivo = request.form.get('motivo', '').strip()
             notas = request.form.get('notas', '').strip()
             
-            producto = Producto.query.get_or_404(producto_id)
-            
             # Validaciones
             if cantidad <= 0:
                 flash('La cantidad debe ser mayor a 0.', 'danger')
                 return render_template('movimientos/salida.html', productos=productos)
             
-            if cantidad > Decimal(str(producto.CantidadActual)):
-                flash(f'No hay suficiente stock. Stock actual: {producto.CantidadActual}', 'danger')
-                return render_template('movimientos/salida.html', productos=productos)
-            
-            # Crear movimiento de salida
-            nuevo_movimiento = Movimiento(
-                ProductoId=producto_id,
-                Tipo='salida',
-                Cantidad=cantidad,
-                Motivo=motivo,
-                Notas=notas,
-                Usuario="Sistema",
-                FechaCreacion=datetime.utcnow()
-            )
-            
-            # Actualizar stock del producto
-            producto.CantidadActual -= float(cantidad)
-            
-            db.session.add(nuevo_movimiento)
-            db.session.commit()
+            # Aplicar el movimiento de forma atómica (UPDATE condicional + INSERT)
+            registrar_movimiento(producto_id, 'salida', cantidad, motivo, notas)
             
             flash(f'Salida de {cantidad} unidades registrada exitosamente.', 'success')
             return redirect(url_for('movimientos.listar_movimientos'))
             
+        except ProductoNoEncontradoError:
+            abort(404)
+        except StockInsuficienteError as e:
+            flash(str(e), 'danger')
+            return render_template('movimientos/salida.html', productos=productos)
         except Exception as e:
             db.session.rollback()
             flash(f'Error al registrar salida: {str(e)}', 'danger')
@@ -146,6 +201,13 @@ def movimientos_por_producto(producto_id):
             .limit(10)\
             .all()
         
+        # Historial corto: completar con los más recientes del archivo
+        if len(movimientos) < 10 and horizonte_archivo() is not None:
+            movimientos += MovimientoArchivo.query.filter_by(ProductoId=producto_id)\
+                .order_by(MovimientoArchivo.FechaCreacion.desc())\
+                .limit(10 - len(movimientos))\
+                .all()
+        
         return jsonify([
             {
                 'id': m.Id,
@@ -158,4 +220,70 @@ def movimientos_por_producto(producto_id):
             for m in movimientos
         ])
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+# ========================
+# API: Registrar Movimientos en Lote
+# ========================
+def _leer_linea_lote(item, numero):
+    cantidad = Decimal(str(item['cantidad']))
+    if not cantidad.is_finite():
+        raise ValueError('Cantidad inválida')
+    clave = str(item['clave']).strip() if item.get('clave') else None
+    if clave and len(clave) > 100:
+        raise ValueError('Clave demasiado larga')
+    tipo = str(item['tipo']).strip().lower()
+    # Fecha de vencimiento 'YYYY-MM-DD' del lote; solo aplica a entradas
+    vencimiento = leer_fecha(item.get('vencimiento')) if tipo == 'entrada' else None
+    return LineaMovimiento(
+        producto_id=int(item['producto_id']),
+        tipo=tipo,
+        cantidad=cantidad,
+        motivo=(item.get('motivo') or '').strip(),
+        notas=(item.get('notas') or '').strip(),
+        clave=clave,
+        vencimiento=vencimiento.date() if vencimiento else None,
+        linea=numero
+    )
+
+@movimientos_bp.route('/api/lote', methods=['POST'])
+def registrar_lote_api():
+    datos = request.get_json(silent=True) or {}
+    items = datos.get('movimientos')
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Se requiere una lista de movimientos.'}), 400
+    
+    maximo = current_app.config.get('LOTE_MAXIMO_LINEAS', 5000)
+    if len(items) > maximo:
+        return jsonify({'error': f'El lote no puede exceder {maximo} movimientos.'}), 413
+    
+    # Validar el formato de cada línea antes de tocar la base de datos
+    lineas = []
+    errores = []
+    for indice, item in enumerate(items, start=1):
+        try:
+            lineas.append(_leer_linea_lote(item, indice))
+        except (KeyError, TypeError, ValueError, AttributeError, ArithmeticError):
+            errores.append(f'Línea {indice}: formato inválido.')
+    
+    if errores:
+        return jsonify({'errores': errores}), 400
+    
+    try:
+        resultado = registrar_lote(lineas, usuario=datos.get('usuario') or 'Sistema')
+    except LoteInvalidoError as e:
+        return jsonify({'errores': e.errores}), 400
+    except (StockInsuficienteError, LoteDuplicadoError) as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    return jsonify({
+        'aplicadas': resultado.aplicadas,
+        'duplicadas': resultado.duplicadas,
+        'saldos': [
+            {'producto_id': producto_id, 'cantidad_actual': cantidad}
+            for producto_id, cantidad in resultado.saldos.items()
+        ]
+    }), 201 if resultado.aplicadas else 200
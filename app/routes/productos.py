@@ -1,9 +1,25 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
-from app.models.productos import Producto
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
+from app.models.productos import Producto, filtro_estado
 from app.models.categorias import Categoria
 from app.models.proveedores import Proveedor
 from app import db
+from app.services.alertas import publicar_cambio_estado
+from app.services.dashboard import invalidar_kpis
+from app.services.importacion import importar_productos_csv, ImportacionError
+from app.services.busqueda import indice_productos
+from app.services.cache_referencia import categorias_activas, proveedores_activos
+from app.services.cache_paginas import cachear_pagina
+from app.services.cambios import registrar_cambios
+from app.services.stock import registrar_en_libro, ajustar_stock, StockError, MOTIVO_SALDO_INICIAL, MOTIVO_EDICION
+from app.services.versiones import incrementar_version
+from app.services.snapshots import stock_en_fecha, stock_en_fecha_todos
+from app.utils.exportacion import respuesta_exportacion
+from sqlalchemy import select
 from decimal import Decimal
+from datetime import datetime
+import io
+import math
+import os
 
 # Blueprint Productos
 productos_bp = Blueprint('productos', __name__, url_prefix='/productos')
@@ -13,8 +29,8 @@ productos_bp = Blueprint('productos', __name__, url_prefix='/productos')
 # ========================
 @productos_bp.route('/crear', methods=['GET', 'POST'])
 def crear_producto():
-    categorias = Categoria.query.filter_by(Activo=True).all()
-    proveedores = Proveedor.query.filter_by(Activo=True).all()
+    categorias = categorias_activas()
+    proveedores = proveedores_activos()
     
     if request.method == 'POST':
         nombre = request.form['nombre'].strip()
@@ -70,7 +86,16 @@ def crear_producto():
         )
         
         db.session.add(nuevo_producto)
+        incrementar_version('Productos')
+        db.session.flush()
+        # La cantidad inicial entra al libro (y a un lote sin vencimiento)
+        registrar_en_libro([(nuevo_producto.Id, 'entrada', cantidad_actual, MOTIVO_SALDO_INICIAL)])
+        registrar_cambios('Productos', [nuevo_producto.Id], 'alta')
+        indexado = (nuevo_producto.Id, True, nombre, codigo_sku)
         db.session.commit()
+        invalidar_kpis()
+        indice_productos.agregar(*indexado)
+        publicar_cambio_estado(indexado[0], nombre, None, cantidad_actual, stock_minimo)
         
         flash('Producto creado exitosamente.', 'success')
         return redirect(url_for('productos.listar_productos'))
@@ -82,7 +107,14 @@ def crear_producto():
 # ========================
 # RF-010: Listar Productos
 # ========================
+def _filtrar_estado(query, estado):
+    condicion = filtro_estado(estado)
+    if condicion is not None:
+        query = query.filter(condicion)
+    return query
+
 @productos_bp.route('/')
+@cachear_pagina('Productos', 'Movimientos', 'Categorias', 'Proveedores', indices={'search': indice_productos})
 def listar_productos():
     search = request.args.get('search', '')
     categoria_id = request.args.get('categoria_id', '')
@@ -93,25 +125,15 @@ def listar_productos():
     
     # --- Filtros ---
     if search:
-        query = query.filter(
-            (Producto.Nombre.ilike(f'%{search}%')) | 
-            (Producto.CodigoSKU.ilike(f'%{search}%'))
-        )
+        # Búsqueda en el índice en memoria; la base de datos solo filtra por Id
+        ids = indice_productos.buscar(search, limite=current_app.config.get('BUSQUEDA_LIMITE', 500))
+        query = query.filter(Producto.Id.in_(ids))
     
     if categoria_id:
         query = query.filter(Producto.CategoriaId == categoria_id)
     
     # Filtro por estado de stock
-    if estado:
-        if estado == 'normal':
-            query = query.filter(Producto.CantidadActual > Producto.StockMinimo)
-        elif estado == 'bajo':
-            query = query.filter(
-                (Producto.CantidadActual <= Producto.StockMinimo) & 
-                (Producto.CantidadActual > 0)
-            )
-        elif estado == 'critico':
-            query = query.filter(Producto.CantidadActual == 0)
+    query = _filtrar_estado(query, estado)
     
     # --- Orden ---
     if sort_by == 'cantidad':
@@ -122,20 +144,57 @@ def listar_productos():
         query = query.order_by(Producto.Nombre.asc())
     
     productos = query.all()
-    categorias = Categoria.query.filter_by(Activo=True).all()
+    if search and 'sort_by' not in request.args:
+        # Sin orden explícito se respeta la relevancia de la búsqueda
+        rango = {id: posicion for posicion, id in enumerate(ids)}
+        productos.sort(key=lambda p: rango[p.Id])
+    categorias = categorias_activas()
     
     return render_template('productos/lista.html', 
                            productos=productos, 
                            categorias=categorias)
 
+# ========================
+# Exportar Productos (CSV / JSON)
+# ========================
+@productos_bp.route('/exportar')
+def exportar_productos():
+    categoria_id = request.args.get('categoria_id', '')
+    estado = request.args.get('estado', '')
+    formato = request.args.get('formato', 'csv')
+    
+    # Solo columnas, sin entidades ORM
+    query = select(
+        Producto.Id,
+        Producto.CodigoSKU,
+        Producto.Nombre,
+        Producto.Descripcion,
+        Producto.CantidadActual,
+        Producto.UnidadMedida,
+        Producto.StockMinimo,
+        Producto.PrecioUnitario,
+        Categoria.Nombre.label('Categoria'),
+        Proveedor.Nombre.label('Proveedor'),
+        Producto.Activo,
+        Producto.FechaCreacion
+    ).join(Categoria, Categoria.Id == Producto.CategoriaId)\
+     .join(Proveedor, Proveedor.Id == Producto.ProveedorId)
+    
+    if categoria_id:
+        query = query.filter(Producto.CategoriaId == categoria_id)
+    query = _filtrar_estado(query, estado)
+    
+    query = query.order_by(Producto.Id.asc())
+    return respuesta_exportacion(query, formato, 'productos')
+
 # ========================
 # RF-011: Editar Producto
 # ========================
 @productos_bp.route('/editar/<int:id>', methods=['GET', 'POST'])
 def editar_producto(id):
     producto = Producto.query.get_or_404(id)
-    categorias = Categoria.query.filter_by(Activo=True).all()
-    proveedores = Proveedor.query.filter_by(Activo=True).all()
+    categorias = categorias_activas()
+    proveedores = proveedores_activos()
     
     if request.method == 'POST':
         # --- Validaciones ---
@@ -180,17 +239,51 @@ def editar_producto(id):
                                    proveedores=proveedores)
         
         # --- Actualizar Producto ---
+        # La cantidad editada es relativa a la que mostraba el formulario: la
+        # diferencia se aplica como delta y un movimiento registrado mientras
+        # tanto no se pierde
+        try:
+            cantidad_original = float(request.form['cantidad_original'])
+        except (KeyError, ValueError):
+            cantidad_original = None
+        if cantidad_original is None or not math.isfinite(cantidad_original):
+            cantidad_original = producto.CantidadActual or 0
+        diferencia = round(cantidad_actual - cantidad_original, 6)
+        stock_minimo_anterior = producto.StockMinimo or 0
         producto.Nombre = nombre
         producto.Descripcion = descripcion
         producto.CodigoSKU = codigo_sku
-        producto.CantidadActual = cantidad_actual
         producto.UnidadMedida = unidad_medida
         producto.StockMinimo = stock_minimo
         producto.PrecioUnitario = precio_unitario
         producto.CategoriaId = categoria_id
         producto.ProveedorId = proveedor_id
-        
-        db.session.commit()
+        indexado = (producto.Id, producto.Activo, nombre, codigo_sku)
+        incrementar_version('Productos')
+        registrar_cambios('Productos', [id], 'edicion')
+
+        # El cambio de cantidad se registra como movimiento de ajuste: lo que
+        # sobra entra como lote sin vencimiento y lo que falta se descuenta FEFO
+        try:
+            if diferencia:
+                cantidad_actual = ajustar_stock(id, diferencia, MOTIVO_EDICION)
+            else:
+                cantidad_actual = db.session.execute(
+                    select(Producto.CantidadActual).where(Producto.Id == id)
+                ).scalar()
+            db.session.commit()
+        except StockError as e:
+            db.session.rollback()
+            flash(f'No se pudo ajustar la cantidad: {str(e)}', 'danger')
+            return render_template('productos/editar.html', 
+                                   producto=db.session.get(Producto, id),
+                                   categorias=categorias, 
+                                   proveedores=proveedores)
+        invalidar_kpis()
+        indice_productos.agregar(*indexado)
+        if indexado[1]:
+            publicar_cambio_estado(id, nombre, cantidad_actual - diferencia, cantidad_actual, stock_minimo,
+                                   stock_minimo_anterior=stock_minimo_anterior)
         
         flash('Producto actualizado exitosamente.', 'success')
         return redirect(url_for('productos.listar_productos'))
@@ -209,11 +302,61 @@ def eliminar_producto(id):
     
     # Eliminación suave (cambiar estado a inactivo)
     producto.Activo = False
+    incrementar_version('Productos')
+    registrar_cambios('Productos', [id], 'baja')
     db.session.commit()
+    invalidar_kpis()
+    indice_productos.actualizar_estado(id, False)
     
     flash('Producto eliminado exitosamente.', 'success')
     return redirect(url_for('productos.listar_productos'))
 
+# ========================
+# Importación masiva desde CSV
+# ========================
+@productos_bp.route('/importar', methods=['GET', 'POST'])
+def importar_productos():
+    if request.method == 'POST':
+        archivo = request.files.get('archivo')
+        delimitador = request.form.get('delimitador', ',') or ','
+        
+        if not archivo or not archivo.filename:
+            flash('Debe seleccionar un archivo CSV.', 'danger')
+            return render_template('productos/importar.html')
+        
+        # Las filas rechazadas se guardan en la carpeta de instancia
+        carpeta = os.path.join(current_app.instance_path, 'rechazos')
+        os.makedirs(carpeta, exist_ok=True)
+        ruta_rechazos = os.path.join(carpeta, f"productos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+        
+        entrada = io.TextIOWrapper(archivo.stream, encoding='utf-8-sig', newline='')
+        try:
+            with open(ruta_rechazos, 'w', newline='', encoding='utf-8') as rechazos:
+                resultado = importar_productos_csv(
+                    entrada,
+                    tamano_lote=current_app.config.get('IMPORTACION_TAMANO_LOTE', 1000),
+                    rechazos=rechazos,
+                    delimitador=delimitador
+                )
+        except (ImportacionError, UnicodeDecodeError, ValueError) as e:
+            flash(f'Error al importar productos: {str(e)}', 'danger')
+            return render_template('productos/importar.html')
+        
+        if resultado.insertadas:
+            indice_productos.invalidar()
+        
+        if resultado.rechazadas:
+            flash(f'{resultado.rechazadas} filas rechazadas. Detalle en: {ruta_rechazos}', 'warning')
+        else:
+            os.remove(ruta_rechazos)
+        
+        velocidad = resultado.procesadas / resultado.segundos if resultado.segundos else 0
+        flash(f'{resultado.insertadas} productos importados de {resultado.procesadas} filas '
+              f'({velocidad:,.0f} filas/s).', 'success')
+        return redirect(url_for('productos.listar_productos'))
+    
+    return render_template('productos/importar.html')
+
 # ========================
 # API: Productos (opcional)
 # ========================
@@ -230,4 +373,55 @@ def api_productos():
             'estado': p.estado_stock() if hasattr(p, 'estado_stock') else 'N/A'
         }
         for p in productos
-    ])
\ No newline at end of file
+    ])
+
+# ========================
+# API: Búsqueda instantánea (typeahead)
+# ========================
+@productos_bp.route('/api/buscar')
+def api_buscar_productos():
+    consulta = request.args.get('q', '')
+    limite = min(request.args.get('limite', 10, type=int), 50)
+    
+    # Se responde solo con el índice en memoria, sin consultar la base de datos
+    resultados = []
+    for id in indice_productos.buscar(consulta, limite=limite, solo_activos=True):
+        documento = indice_productos.documento(id)
+        if documento:
+            resultados.append({'id': id, 'nombre': documento[0], 'codigo_sku': documento[1]})
+    return jsonify(resultados)
+
+# ========================
+# API: Stock a una fecha
+# ========================
+@productos_bp.route('/api/stock-en-fecha')
+def api_stock_en_fecha():
+    # fecha: 'YYYY-MM-DD' (inicio del día) o 'YYYY-MM-DDTHH:MM:SS'
+    try:
+        momento = datetime.fromisoformat(request.args.get('fecha', ''))
+    except ValueError:
+        return jsonify({'error': 'Parámetro fecha inválido.'}), 400
+
+    producto_id = request.args.get('producto_id', type=int)
+    sku = request.args.get('sku', '').strip().upper()
+    if sku:
+        producto_id = db.session.execute(
+            select(Producto.Id).where(Producto.CodigoSKU == sku)
+        ).scalar()
+        if producto_id is None:
+            return jsonify({'error': 'Producto no encontrado.'}), 404
+
+    if producto_id is not None:
+        return jsonify({
+            'fecha': momento.isoformat(),
+            'producto_id': producto_id,
+            'cantidad': stock_en_fecha(producto_id, momento)
+        })
+
+    return jsonify({
+        'fecha': momento.isoformat(),
+        'productos': [
+            {'producto_id': id, 'cantidad': cantidad}
+            for id, cantidad in stock_en_fecha_todos(momento).items()
+        ]
+    })
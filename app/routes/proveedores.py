@@ -1,6 +1,9 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from app.models.proveedores import Proveedor
 from app import db
+from app.services.busqueda import indice_proveedores
+from app.services.cambios import registrar_cambios
+from app.services.versiones import incrementar_version
 import re
 
 proveedores_bp = Blueprint('proveedores', __name__, url_prefix='/proveedores')
@@ -58,7 +61,12 @@ def crear_proveedor():
         )
         
         db.session.add(nuevo_proveedor)
+        incrementar_version('Proveedores')
+        db.session.flush()
+        registrar_cambios('Proveedores', [nuevo_proveedor.Id], 'alta')
+        indexado = (nuevo_proveedor.Id, True, nombre)
         db.session.commit()
+        indice_proveedores.agregar(*indexado)
         
         flash('Proveedor creado exitosamente.', 'success')
         return redirect(url_for('proveedores.listar_proveedores'))
@@ -74,7 +82,8 @@ def listar_proveedores():
     query = Proveedor.query
     
     if search:
-        query = query.filter(Proveedor.Nombre.ilike(f'%{search}%'))
+        ids = indice_proveedores.buscar(search, limite=current_app.config.get('BUSQUEDA_LIMITE', 500))
+        query = query.filter(Proveedor.Id.in_(ids))
     
     if estado:
         if estado == 'activo':
@@ -83,6 +92,9 @@ def listar_proveedores():
             query = query.filter(Proveedor.Activo == False)  # CAMBIADO: Estado -> Activo
     
     proveedores = query.order_by(Proveedor.Nombre.asc()).all()
+    if search:
+        rango = {id: posicion for posicion, id in enumerate(ids)}
+        proveedores.sort(key=lambda p: rango[p.Id])
     return render_template('proveedores/lista.html', proveedores=proveedores)
 
 # RF-007: Editar Proveedor
@@ -133,8 +145,12 @@ def editar_proveedor(id):
         proveedor.Telefono = telefono
         proveedor.Email = email
         proveedor.Direccion = direccion
+        indexado = (proveedor.Id, proveedor.Activo, nombre)
+        incrementar_version('Proveedores')
+        registrar_cambios('Proveedores', [id], 'edicion')
         
         db.session.commit()
+        indice_proveedores.agregar(*indexado)
         flash('Proveedor actualizado exitosamente.', 'success')
         return redirect(url_for('proveedores.listar_proveedores'))
     
@@ -153,7 +169,10 @@ def eliminar_proveedor(id):
     
     # Desactivar proveedor (eliminacion logica)
     proveedor.Activo = False  # CAMBIADO: Estado -> Activo
+    incrementar_version('Proveedores')
+    registrar_cambios('Proveedores', [id], 'baja')
     db.session.commit()
+    indice_proveedores.actualizar_estado(id, False)
     
     flash('Proveedor desactivado exitosamente.', 'success')
     return redirect(url_for('proveedores.listar_proveedores'))
@@ -164,7 +183,10 @@ def reactivar_proveedor(id):
     proveedor = Proveedor.query.get_or_404(id)
     
     proveedor.Activo = True  # CAMBIADO: Estado -> Activo
+    incrementar_version('Proveedores')
+    registrar_cambios('Proveedores', [id], 'reactivacion')
     db.session.commit()
+    indice_proveedores.actualizar_estado(id, True)
     
     flash('Proveedor reactivado exitosamente.', 'success')
     return redirect(url_for('proveedores.listar_proveedores'))
\ No newline at end of file
@@ -0,0 +1,197 @@
+from flask import Blueprint, request, jsonify, current_app
+from app import db
+from app.models.productos import Producto
+from app.models.recetas import Receta, RecetaIngrediente
+from app.services.recetas import registrar_consumo
+from app.services.stock import LoteInvalidoError, StockInsuficienteError, LoteDuplicadoError
+from app.services.versiones import incrementar_version
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from datetime import datetime
+import math
+
+# Blueprint Recetas (platillos y sus ingredientes, API JSON)
+recetas_bp = Blueprint('recetas', __name__, url_prefix='/recetas')
+
+
+def _receta_json(receta):
+    return {
+        'id': receta.Id,
+        'nombre': receta.Nombre,
+        'descripcion': receta.Descripcion,
+        'activo': receta.Activo,
+        'ingredientes': [
+            {'producto_id': i.ProductoId, 'cantidad_por_porcion': i.CantidadPorPorcion}
+            for i in receta.ingredientes
+        ]
+    }
+
+
+def _entero(valor):
+    # Enteros de JSON ('2', 2 o 2.0); int() truncaría 2.7 y aceptaría true
+    if isinstance(valor, bool):
+        raise TypeError(valor)
+    if isinstance(valor, float) and not valor.is_integer():
+        raise ValueError(valor)
+    return int(valor)
+
+
+def _leer_receta(datos, receta_id=None):
+    # Devuelve (nombre, descripcion, [(producto_id, cantidad)], errores)
+    errores = []
+    nombre = str(datos.get('nombre') or '').strip()
+    descripcion = str(datos.get('descripcion') or '').strip()
+    if not nombre:
+        errores.append('El nombre es obligatorio.')
+    elif Receta.query.filter(Receta.Nombre == nombre, Receta.Id != receta_id).first():
+        errores.append('Ya existe una receta con ese nombre.')
+
+    ingredientes = {}
+    items = datos.get('ingredientes')
+    if not isinstance(items, list) or not items:
+        errores.append('Se requiere al menos un ingrediente.')
+        items = []
+    for indice, item in enumerate(items, start=1):
+        try:
+            producto_id = _entero(item['producto_id'])
+            cantidad = float(item['cantidad_por_porcion'])
+        except (KeyError, TypeError, ValueError):
+            errores.append(f'Ingrediente {indice}: formato inválido.')
+            continue
+        if not (math.isfinite(cantidad) and cantidad > 0):
+            errores.append(f'Ingrediente {indice}: la cantidad por porción debe ser mayor a 0.')
+        elif producto_id in ingredientes:
+            errores.append(f'Ingrediente {indice}: producto {producto_id} repetido.')
+        else:
+            ingredientes[producto_id] = cantidad
+
+    if ingredientes:
+        existentes = set(db.session.execute(
+            select(Producto.Id).where(Producto.Id.in_(list(ingredientes)), Producto.Activo == True)
+        ).scalars())
+        for producto_id in ingredientes:
+            if producto_id not in existentes:
+                errores.append(f'Producto {producto_id} no encontrado o inactivo.')
+
+    return nombre, descripcion, list(ingredientes.items()), errores
+
+# ========================
+# Listar y consultar recetas
+# ========================
+@recetas_bp.route('/api')
+def listar_recetas():
+    incluir_inactivas = request.args.get('inactivas') == '1'
+    query = Receta.query.options(selectinload(Receta.ingredientes))
+    if not incluir_inactivas:
+        query = query.filter(Receta.Activo == True)
+    return jsonify([_receta_json(r) for r in query.order_by(Receta.Nombre).all()])
+
+@recetas_bp.route('/api/<int:id>')
+def obtener_receta(id):
+    return jsonify(_receta_json(Receta.query.get_or_404(id)))
+
+# ========================
+# Crear y editar recetas
+# ========================
+@recetas_bp.route('/api', methods=['POST'])
+def crear_receta():
+    datos = request.get_json(silent=True) or {}
+    nombre, descripcion, ingredientes, errores = _leer_receta(datos)
+    if errores:
+        return jsonify({'errores': errores}), 400
+
+    receta = Receta(Nombre=nombre, Descripcion=descripcion, FechaCreacion=datetime.utcnow())
+    receta.ingredientes = [
+        RecetaIngrediente(ProductoId=producto_id, CantidadPorPorcion=cantidad)
+        for producto_id, cantidad in ingredientes
+    ]
+    db.session.add(receta)
+    incrementar_version('Recetas')
+    db.session.commit()
+    return jsonify(_receta_json(receta)), 201
+
+@recetas_bp.route('/api/<int:id>', methods=['PUT'])
+def editar_receta(id):
+    receta = Receta.query.get_or_404(id)
+    datos = request.get_json(silent=True) or {}
+    nombre, descripcion, ingredientes, errores = _leer_receta(datos, receta_id=id)
+    if errores:
+        return jsonify({'errores': errores}), 400
+
+    receta.Nombre = nombre
+    receta.Descripcion = descripcion
+    # Los ingredientes se reemplazan completos
+    receta.ingredientes = []
+    db.session.flush()
+    receta.ingredientes = [
+        RecetaIngrediente(ProductoId=producto_id, CantidadPorPorcion=cantidad)
+        for producto_id, cantidad in ingredientes
+    ]
+    incrementar_version('Recetas')
+    db.session.commit()
+    return jsonify(_receta_json(receta))
+
+@recetas_bp.route('/api/<int:id>', methods=['DELETE'])
+def eliminar_receta(id):
+    receta = Receta.query.get_or_404(id)
+
+    # Eliminación suave (cambiar estado a inactivo)
+    receta.Activo = False
+    incrementar_version('Recetas')
+    db.session.commit()
+    return jsonify({'id': id, 'activo': False})
+
+# ========================
+# Registrar porciones vendidas
+# ========================
+@recetas_bp.route('/api/consumo', methods=['POST'])
+def registrar_consumo_api():
+    datos = request.get_json(silent=True) or {}
+    items = datos.get('porciones')
+
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Se requiere una lista de porciones.'}), 400
+
+    maximo = current_app.config.get('LOTE_MAXIMO_LINEAS', 5000)
+    if len(items) > maximo:
+        return jsonify({'error': f'El lote no puede exceder {maximo} líneas.'}), 413
+
+    clave = str(datos['clave']).strip() if datos.get('clave') else None
+    if clave and len(clave) > 80:
+        return jsonify({'error': 'La clave no puede exceder 80 caracteres.'}), 400
+
+    porciones = []
+    errores = []
+    for indice, item in enumerate(items, start=1):
+        try:
+            receta_id = _entero(item['receta_id'])
+        except (KeyError, TypeError, ValueError):
+            errores.append(f'Línea {indice}: formato inválido.')
+            continue
+        try:
+            porciones.append((receta_id, _entero(item['cantidad'])))
+        except KeyError:
+            errores.append(f'Línea {indice}: formato inválido.')
+        except (TypeError, ValueError):
+            errores.append(f'Línea {indice}: la cantidad de porciones debe ser un número entero.')
+
+    if errores:
+        return jsonify({'errores': errores}), 400
+
+    try:
+        resultado = registrar_consumo(porciones, usuario=datos.get('usuario') or 'Sistema', clave=clave)
+    except LoteInvalidoError as e:
+        return jsonify({'errores': e.errores}), 400
+    except (StockInsuficienteError, LoteDuplicadoError) as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({
+        'aplicadas': resultado.aplicadas,
+        'duplicadas': resultado.duplicadas,
+        'saldos': [
+            {'producto_id': producto_id, 'cantidad_actual': cantidad}
+            for producto_id, cantidad in resultado.saldos.items()
+        ]
+    }), 201 if resultado.aplicadas else 200
@@ -0,0 +1,99 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from app.models.productos import Producto
+from app.models.recomendaciones import RecomendacionStock
+from app.services.recomendaciones import calcular_recomendaciones, aplicar_recomendaciones, descartar_recomendaciones
+from app.utils.paginacion import paginar_por_id, leer_por_pagina
+from sqlalchemy import select
+
+# Blueprint Recomendaciones (stock mínimo sugerido a partir del consumo)
+recomendaciones_bp = Blueprint('recomendaciones', __name__, url_prefix='/recomendaciones')
+
+# ========================
+# Revisar recomendaciones pendientes
+# ========================
+@recomendaciones_bp.route('/')
+def listar_recomendaciones():
+    por_pagina = leer_por_pagina(request.args.get('por_pagina'))
+
+    query = select(
+        RecomendacionStock.Id,
+        RecomendacionStock.FechaCalculo,
+        RecomendacionStock.DiasHistoria,
+        RecomendacionStock.ConsumoDiario,
+        RecomendacionStock.DesviacionDiaria,
+        RecomendacionStock.StockMinimoActual,
+        RecomendacionStock.PuntoReorden,
+        RecomendacionStock.CantidadSugerida,
+        Producto.CodigoSKU,
+        Producto.Nombre,
+        Producto.UnidadMedida,
+        Producto.CantidadActual
+    ).join(Producto, Producto.Id == RecomendacionStock.ProductoId)\
+     .where(RecomendacionStock.Estado == 'pendiente')
+
+    try:
+        recomendaciones, cursor_siguiente = paginar_por_id(
+            query, RecomendacionStock.Id, request.args.get('cursor'), por_pagina)
+    except ValueError:
+        flash('El cursor de paginación no es válido.', 'warning')
+        recomendaciones, cursor_siguiente = paginar_por_id(query, RecomendacionStock.Id, por_pagina=por_pagina)
+
+    return render_template('recomendaciones/lista.html',
+                           recomendaciones=recomendaciones,
+                           cursor_siguiente=cursor_siguiente)
+
+# ========================
+# Calcular recomendaciones
+# ========================
+@recomendaciones_bp.route('/calcular', methods=['POST'])
+def calcular():
+    try:
+        dias = int(request.form.get('dias', 90))
+        plazo_dias = float(request.form.get('plazo_dias', 2))
+        cobertura_dias = float(request.form.get('cobertura_dias', 7))
+    except ValueError:
+        flash('Los parámetros deben ser numéricos.', 'danger')
+        return redirect(url_for('recomendaciones.listar_recomendaciones'))
+
+    if dias < 2 or plazo_dias <= 0 or cobertura_dias < 0:
+        flash('Se necesitan al menos 2 días de historial y un plazo de entrega mayor a 0.', 'danger')
+        return redirect(url_for('recomendaciones.listar_recomendaciones'))
+
+    resultado = calcular_recomendaciones(
+        dias=dias,
+        plazo_dias=plazo_dias,
+        cobertura_dias=cobertura_dias,
+        factor_servicio=current_app.config.get('RECOMENDACIONES_FACTOR_SERVICIO', 1.65)
+    )
+    flash(f'{resultado.productos} recomendaciones calculadas con {resultado.dias} días de historial '
+          f'en {resultado.segundos_consulta + resultado.segundos_calculo:.2f}s.', 'success')
+    return redirect(url_for('recomendaciones.listar_recomendaciones'))
+
+# ========================
+# Aplicar o descartar en lote
+# ========================
+def _ids_seleccionados():
+    return [int(id) for id in request.form.getlist('ids') if id.isdigit()]
+
+@recomendaciones_bp.route('/aplicar', methods=['POST'])
+def aplicar():
+    # "todas" aplica todas las pendientes, no solo las de la página visible
+    ids = None if request.form.get('todas') else _ids_seleccionados()
+    if ids == []:
+        flash('Seleccione al menos una recomendación.', 'warning')
+        return redirect(url_for('recomendaciones.listar_recomendaciones'))
+
+    aplicadas = aplicar_recomendaciones(ids)
+    flash(f'Stock mínimo actualizado en {aplicadas} productos.', 'success')
+    return redirect(url_for('recomendaciones.listar_recomendaciones'))
+
+@recomendaciones_bp.route('/descartar', methods=['POST'])
+def descartar():
+    ids = _ids_seleccionados()
+    if not ids:
+        flash('Seleccione al menos una recomendación.', 'warning')
+        return redirect(url_for('recomendaciones.listar_recomendaciones'))
+
+    descartadas = descartar_recomendaciones(ids)
+    flash(f'{descartadas} recomendaciones descartadas.', 'info')
+    return redirect(url_for('recomendaciones.listar_recomendaciones'))
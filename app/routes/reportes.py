@@ -0,0 +1,63 @@
+from flask import Blueprint, request, jsonify
+from app import db
+from app.services.consumo import consulta_consumo
+from app.services.versiones import version_de
+from app.utils.exportacion import respuesta_exportacion, leer_fecha
+from app.utils.http import argumentos_normalizados, calcular_etag, respuesta_json, respuesta_no_modificada
+from datetime import datetime, timedelta
+
+# Blueprint Reportes (consumo por periodo desde el rollup diario)
+reportes_bp = Blueprint('reportes', __name__, url_prefix='/reportes')
+
+DIAS_DEFECTO = 30
+
+
+def _leer_parametros():
+    # (desde, hasta, agrupar, periodo); sin fechas, los últimos DIAS_DEFECTO días
+    hasta = leer_fecha(request.args.get('hasta'), fin_de_dia=True)
+    if hasta is None:
+        hoy = datetime.utcnow()
+        hasta = datetime(hoy.year, hoy.month, hoy.day) + timedelta(days=1)
+    desde = leer_fecha(request.args.get('desde')) or hasta - timedelta(days=DIAS_DEFECTO)
+    if desde >= hasta:
+        raise ValueError('La fecha inicial debe ser anterior a la final.')
+    return desde, hasta, request.args.get('agrupar', 'producto'), request.args.get('periodo', 'total')
+
+# ========================
+# API: Consumo por producto, categoría o proveedor
+# ========================
+@reportes_bp.route('/api/consumo')
+def api_consumo():
+    etag = calcular_etag('consumo', version_de('Movimientos', 'ConsumoDiario', 'Productos',
+                                               'Categorias', 'Proveedores'), argumentos_normalizados())
+    no_modificada = respuesta_no_modificada(etag)
+    if no_modificada:
+        return no_modificada
+
+    try:
+        desde, hasta, agrupar, periodo = _leer_parametros()
+        consulta = consulta_consumo(desde, hasta, agrupar, periodo)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    filas = [dict(fila._mapping) for fila in db.session.execute(consulta)]
+    return respuesta_json({
+        'desde': desde.date().isoformat(),
+        'hasta': (hasta - timedelta(days=1)).date().isoformat(),
+        'agrupar': agrupar,
+        'periodo': periodo,
+        'filas': filas
+    }, etag)
+
+# ========================
+# Exportar consumo (CSV / JSON)
+# ========================
+@reportes_bp.route('/consumo/exportar')
+def exportar_consumo():
+    try:
+        desde, hasta, agrupar, periodo = _leer_parametros()
+        consulta = consulta_consumo(desde, hasta, agrupar, periodo)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return respuesta_exportacion(consulta, request.args.get('formato', 'csv'), f'consumo_{agrupar}')
@@ -0,0 +1,57 @@
+from flask import Blueprint, Response, jsonify
+from app import db
+from app.services import cache_referencia
+from app.services.cache_paginas import cache_paginas
+from app.services.metricas import exportar_prometheus
+from app.utils.base_datos import estadisticas_pool
+
+# Blueprint Sistema (diagnóstico y métricas de operación)
+sistema_bp = Blueprint('sistema', __name__, url_prefix='/sistema')
+
+# Blueprint Métricas (en la raíz, donde Prometheus las busca por defecto)
+metricas_bp = Blueprint('metricas', __name__)
+
+# ========================
+# API: Estadísticas del caché de referencia
+# ========================
+@sistema_bp.route('/api/cache-referencia')
+def estadisticas_cache_referencia():
+    return jsonify(cache_referencia.estadisticas())
+
+# ========================
+# API: Estadísticas del caché de páginas
+# ========================
+@sistema_bp.route('/api/cache-paginas')
+def estadisticas_cache_paginas():
+    return jsonify(cache_paginas.estadisticas())
+
+# ========================
+# API: Estadísticas del pool de conexiones
+# ========================
+@sistema_bp.route('/api/pool')
+def estadisticas_pool_conexiones():
+    return jsonify(estadisticas_pool(db.engine))
+
+# ========================
+# Métricas en formato Prometheus
+# ========================
+@metricas_bp.route('/metrics')
+def metricas():
+    pool = estadisticas_pool(db.engine)
+    paginas = cache_paginas.estadisticas()
+    extra = {
+        'inventario_cache_paginas_aciertos_total': ('counter', 'Páginas servidas desde el caché.', paginas['aciertos']),
+        'inventario_cache_paginas_fallos_total': ('counter', 'Páginas renderizadas y guardadas en el caché.',
+                                                  paginas['fallos']),
+        'inventario_cache_paginas_bytes': ('gauge', 'Memoria ocupada por el caché de páginas.', paginas['bytes']),
+    }
+    if 'checkouts' in pool:
+        extra.update({
+            'inventario_pool_en_uso': ('gauge', 'Conexiones del pool en uso.', pool['en_uso']),
+            'inventario_pool_overflow': ('gauge', 'Conexiones de overflow abiertas.', pool['overflow']),
+            'inventario_pool_checkouts_total': ('counter', 'Checkouts del pool desde el inicio.', pool['checkouts']),
+            'inventario_pool_espera_ms_total': ('counter', 'Espera acumulada por conexiones (ms).',
+                                                pool['esperas_ms_total']),
+            'inventario_pool_timeouts_total': ('counter', 'Checkouts que agotaron pool_timeout.', pool['timeouts']),
+        })
+    return Response(exportar_prometheus(extra), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,178 @@
+from datetime import datetime
+from queue import Queue, Full
+from threading import Lock, Thread
+import itertools
+import json
+import os
+import time
+
+# ========================
+# Alertas de stock en vivo (Server-Sent Events)
+# ========================
+# Las rutas que cambian stock publican un evento cuando un producto cambia de
+# estado (normal / bajo / critico, igual que Producto.estado_stock()). Un
+# único broker por proceso reparte cada evento a las colas de todos los
+# suscriptores SSE, así el dashboard se actualiza sin consultar la base de
+# datos. Con varios workers, ALERTAS_CANAL_ARCHIVO activa un canal de
+# archivo compartido (sustituto local de un pub/sub como Redis): cada worker
+# escribe sus eventos en el archivo y un hilo por worker lo lee y los
+# entrega a su broker. Al pasar de ALERTAS_CANAL_MAX_BYTES el worker que
+# publica renombra el archivo a <ruta>.1 (reemplazando la rotación anterior)
+# y empieza uno nuevo; cada lector termina lo que le faltaba de <ruta>.1
+# antes de seguir con el nuevo. Un lector atrasado más de una rotación
+# pierde esos eventos, igual que una cola llena.
+
+TAMANO_COLA = 100
+MAX_BYTES_CANAL = 1024 * 1024
+
+
+def estado_stock(cantidad, stock_minimo):
+    # Misma regla que Producto.estado_stock()
+    if cantidad == 0:
+        return 'critico'
+    if cantidad <= (stock_minimo or 0):
+        return 'bajo'
+    return 'normal'
+
+
+class Broker:
+    def __init__(self):
+        self._lock = Lock()
+        self._suscriptores = set()
+        self._ids = itertools.count(1)
+        self.descartados = 0
+
+    def suscribir(self):
+        cola = Queue(maxsize=TAMANO_COLA)
+        with self._lock:
+            self._suscriptores.add(cola)
+        return cola
+
+    def desuscribir(self, cola):
+        with self._lock:
+            self._suscriptores.discard(cola)
+
+    def entregar(self, evento):
+        evento = dict(evento, id=next(self._ids))
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        descartados = 0
+        for cola in suscriptores:
+            try:
+                cola.put_nowait(evento)
+            except Full:
+                # Un cliente lento no frena a los demás: pierde el evento
+                descartados += 1
+        if descartados:
+            with self._lock:
+                self.descartados += descartados
+
+    def estadisticas(self):
+        with self._lock:
+            return {'suscriptores': len(self._suscriptores), 'descartados': self.descartados}
+
+
+def _identidad(estado):
+    return estado.st_dev, estado.st_ino
+
+
+class CanalArchivo:
+    def __init__(self, ruta, broker, intervalo=0.25, max_bytes=MAX_BYTES_CANAL):
+        self.ruta = ruta
+        self.rotado = ruta + '.1'
+        self.broker = broker
+        self.intervalo = intervalo
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        open(ruta, 'a').close()
+        # Solo se entregan los eventos publicados después de iniciar
+        estado = os.stat(ruta)
+        self._archivo = _identidad(estado)
+        self._posicion = estado.st_size
+        Thread(target=self._leer, name='alertas-canal', daemon=True).start()
+
+    def publicar(self, evento):
+        linea = json.dumps(evento, ensure_ascii=False) + '\n'
+        with self._lock:
+            try:
+                if os.path.getsize(self.ruta) >= self.max_bytes:
+                    os.replace(self.ruta, self.rotado)
+            except OSError:
+                pass  # otro worker ya rotó o el archivo está abierto (Windows)
+            with open(self.ruta, 'a', encoding='utf-8') as archivo:
+                archivo.write(linea)
+
+    def _entregar_desde(self, ruta, posicion):
+        # Entrega las líneas completas desde 'posicion'; devuelve la nueva posición
+        with open(ruta, encoding='utf-8') as archivo:
+            archivo.seek(posicion)
+            for linea in archivo:
+                if not linea.endswith('\n'):
+                    break  # escritura incompleta; se relee en la próxima vuelta
+                posicion += len(linea.encode('utf-8'))
+                self.broker.entregar(json.loads(linea))
+        return posicion
+
+    def _leer(self):
+        while True:
+            try:
+                estado = os.stat(self.ruta)
+                if _identidad(estado) != self._archivo:
+                    # Rotó: lo que faltaba del archivo anterior está en <ruta>.1
+                    try:
+                        if _identidad(os.stat(self.rotado)) == self._archivo:
+                            self._entregar_desde(self.rotado, self._posicion)
+                    except FileNotFoundError:
+                        pass
+                    self._archivo = _identidad(estado)
+                    self._posicion = 0
+                elif estado.st_size < self._posicion:
+                    self._posicion = 0  # el archivo se truncó
+                self._posicion = self._entregar_desde(self.ruta, self._posicion)
+            except (OSError, ValueError) as e:
+                print(f"Error leyendo el canal de alertas: {e}")
+            time.sleep(self.intervalo)
+
+
+broker = Broker()
+_canal = None
+
+
+def iniciar_alertas(app):
+    global _canal
+    ruta = app.config.get('ALERTAS_CANAL_ARCHIVO')
+    if ruta and (_canal is None or _canal.ruta != ruta):
+        _canal = CanalArchivo(ruta, broker, max_bytes=app.config.get('ALERTAS_CANAL_MAX_BYTES', MAX_BYTES_CANAL))
+
+
+def publicar(evento):
+    if _canal is not None:
+        _canal.publicar(evento)
+    else:
+        broker.entregar(evento)
+
+
+def publicar_cambio_estado(producto_id, nombre, cantidad_anterior, cantidad_nueva, stock_minimo,
+                           stock_minimo_anterior=None):
+    # Publica solo si el producto cruzó StockMinimo o llegó a cero (en
+    # cualquier dirección, para que el dashboard también quite alertas).
+    # cantidad_anterior=None es un producto nuevo: solo avisa si nace bajo.
+    if stock_minimo_anterior is None:
+        stock_minimo_anterior = stock_minimo
+    anterior = None
+    if cantidad_anterior is not None:
+        anterior = estado_stock(cantidad_anterior, stock_minimo_anterior)
+    nuevo = estado_stock(cantidad_nueva, stock_minimo)
+    if anterior == nuevo or (anterior is None and nuevo == 'normal'):
+        return False
+    publicar({
+        'tipo': 'estado_stock',
+        'producto_id': producto_id,
+        'nombre': nombre,
+        'cantidad': float(cantidad_nueva),
+        'stock_minimo': float(stock_minimo or 0),
+        'estado': nuevo,
+        'estado_anterior': anterior,
+        'fecha': datetime.utcnow().isoformat()
+    })
+    return True
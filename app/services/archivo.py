@@ -0,0 +1,247 @@
+from app import db
+from app.models.archivo import MovimientoArchivo, SaldoApertura
+from app.models.movimientos import Movimiento, cantidad_firmada
+from app.models.versiones import VersionDatos
+from app.services.versiones import version_de
+from app.utils.paginacion import paginar_keyset, decodificar_cursor, codificar_cursor
+from app.utils.bloques import en_bloques
+from collections import namedtuple
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, insert, update, delete, func, and_, literal, union_all
+import time
+
+# ========================
+# Archivo de movimientos antiguos
+# ========================
+# Movimientos crece sin límite, pero casi todas las consultas miran los
+# últimos meses. Los movimientos anteriores al horizonte se mueven, mes por
+# mes y en lotes por Id, a MovimientosArchivo (clave primaria Periodo, Id:
+# cada mes queda contiguo). En la misma transacción de cada lote se suma su
+# saldo con signo a SaldosApertura, así "apertura + Movimientos" sigue
+# siendo el libro completo de cada producto.
+# El horizonte (primer mes que sigue en Movimientos, AAAAMM) se guarda en
+# VersionesDatos ('ArchivoHasta'): una consulta cuyo rango empieza antes del
+# horizonte lee la unión de ambas tablas y nunca ve un mes a medias; las
+# consultas dentro del horizonte solo tocan la tabla caliente. Cada worker
+# lee el horizonte del caché de versiones, que puede tener hasta
+# VERSIONES_TTL segundos: por eso el horizonte se adelanta hasta el corte
+# antes de mover nada, y las filas se mueven recién cuando ya venció el
+# caché de todos los workers (más un margen para las consultas que leyeron
+# el horizonte y todavía no se ejecutaron).
+
+ResultadoArchivo = namedtuple('ResultadoArchivo', ['meses', 'movimientos', 'horizonte'])
+
+MARGEN_HORIZONTE_SEGUNDOS = 5
+
+COLUMNAS = ('Id', 'ProductoId', 'Tipo', 'Cantidad', 'Motivo', 'Notas', 'Usuario', 'FechaCreacion', 'EsAjuste')
+
+
+def periodo_de(fecha):
+    return fecha.year * 100 + fecha.month
+
+
+def inicio_de_mes(fecha):
+    return datetime(fecha.year, fecha.month, 1)
+
+
+def _mes_siguiente(fecha):
+    return datetime(fecha.year + fecha.month // 12, fecha.month % 12 + 1, 1)
+
+
+def horizonte_archivo():
+    # Primer instante que sigue en la tabla caliente, o None si no hay archivo
+    periodo, = version_de('ArchivoHasta')
+    if not periodo:
+        return None
+    return datetime(periodo // 100, periodo % 100, 1)
+
+
+def libro_movimientos(desde=None):
+    # Fuente de movimientos para consultas desde 'desde' (None: todo el
+    # historial). Devuelve el modelo Movimiento o las columnas de la unión
+    # con el archivo; ambos exponen los mismos atributos.
+    horizonte = horizonte_archivo()
+    if horizonte is None or (desde is not None and desde >= horizonte):
+        return Movimiento
+
+    archivo = select(*(getattr(MovimientoArchivo, c) for c in COLUMNAS))
+    if desde is not None:
+        archivo = archivo.where(MovimientoArchivo.FechaCreacion >= desde)
+    return union_all(
+        select(*(getattr(Movimiento, c) for c in COLUMNAS)),
+        archivo
+    ).subquery('libro').c
+
+
+def saldos_apertura(ids=None):
+    # {producto_id: saldo archivado}
+    consulta = select(SaldoApertura.ProductoId, SaldoApertura.Cantidad)
+    if ids is None:
+        return dict(db.session.execute(consulta).all())
+    saldos = {}
+    for bloque in en_bloques(ids):
+        saldos.update(db.session.execute(consulta.where(SaldoApertura.ProductoId.in_(bloque))).all())
+    return saldos
+
+
+# ========================
+# Paginación por cursor sobre ambas tablas
+# ========================
+def paginar_historial(construir, cursor=None, direccion='siguiente', por_pagina=50):
+    # construir(m) arma la consulta sobre Movimiento o MovimientoArchivo.
+    # Todo lo archivado es anterior a lo caliente: al agotarse la tabla
+    # caliente la página se completa con el archivo, y un cursor anterior al
+    # horizonte se resuelve solo en el archivo. El cursor (horizonte, 0)
+    # marca el borde entre ambas tablas.
+    horizonte = horizonte_archivo()
+    if horizonte is None:
+        return paginar_keyset(construir(Movimiento), Movimiento.FechaCreacion, Movimiento.Id,
+                              cursor=cursor, direccion=direccion, por_pagina=por_pagina)
+
+    posicion = decodificar_cursor(cursor) if cursor else None
+    borde = codificar_cursor(horizonte, 0)
+
+    def pagina_archivo(cursor_archivo):
+        return paginar_keyset(
+            construir(MovimientoArchivo), MovimientoArchivo.FechaCreacion, MovimientoArchivo.Id,
+            cursor=cursor_archivo, direccion=direccion, por_pagina=por_pagina
+        )
+
+    if posicion == (horizonte, 0) and direccion != 'anterior':
+        filas, siguiente, _ = pagina_archivo(None)
+        return filas, siguiente, borde
+
+    if posicion is not None and posicion[0] is not None and posicion[0] < horizonte:
+        filas, siguiente, anterior = pagina_archivo(cursor)
+        if anterior is None and direccion == 'anterior':
+            # Se llegó al mes más reciente del archivo; lo que sigue está en caliente
+            anterior = borde
+        return filas, siguiente, anterior
+
+    filas, siguiente, anterior = paginar_keyset(
+        construir(Movimiento), Movimiento.FechaCreacion, Movimiento.Id,
+        cursor=cursor, direccion=direccion, por_pagina=por_pagina
+    )
+    if siguiente is not None or (direccion == 'anterior' and posicion is not None):
+        return filas, siguiente, anterior
+
+    # Tabla caliente agotada: completar con lo más reciente del archivo
+    faltan = por_pagina - len(filas)
+    if faltan == 0:
+        hay_archivo = db.session.execute(construir(MovimientoArchivo).limit(1)).first()
+        return filas, (borde if hay_archivo else None), anterior
+
+    archivadas, siguiente, _ = paginar_keyset(
+        construir(MovimientoArchivo), MovimientoArchivo.FechaCreacion, MovimientoArchivo.Id,
+        por_pagina=faltan
+    )
+    if not filas and posicion is not None:
+        anterior = borde
+    return filas + archivadas, siguiente, anterior
+
+
+# ========================
+# Mover movimientos al archivo
+# ========================
+def _adelantar_horizonte(periodo):
+    resultado = db.session.execute(
+        update(VersionDatos)
+        .where(VersionDatos.Tabla == 'ArchivoHasta', VersionDatos.Version < periodo)
+        .values(Version=periodo)
+        .execution_options(synchronize_session=False)
+    )
+    if resultado.rowcount == 0 and db.session.get(VersionDatos, 'ArchivoHasta') is None:
+        db.session.add(VersionDatos(Tabla='ArchivoHasta', Version=periodo))
+    db.session.info['versiones_pendientes'] = True
+
+
+def _esperar_horizonte():
+    # Hasta que ningún worker pueda seguir usando el horizonte anterior
+    espera = current_app.config.get('VERSIONES_TTL', 2) + current_app.config.get(
+        'ARCHIVO_MARGEN_SEGUNDOS', MARGEN_HORIZONTE_SEGUNDOS)
+    time.sleep(espera)
+
+
+def _sumar_apertura(deltas, fecha_corte):
+    # deltas: {producto_id: saldo del lote}; un UPDATE por lotes de las filas
+    # existentes y un INSERT de las nuevas
+    existentes = saldos_apertura(list(deltas))
+    if existentes:
+        db.session.execute(update(SaldoApertura), [
+            {'ProductoId': producto_id, 'Cantidad': existentes[producto_id] + delta, 'FechaCorte': fecha_corte}
+            for producto_id, delta in deltas.items() if producto_id in existentes
+        ])
+    nuevos = [
+        {'ProductoId': producto_id, 'Cantidad': delta, 'FechaCorte': fecha_corte}
+        for producto_id, delta in deltas.items() if producto_id not in existentes
+    ]
+    if nuevos:
+        db.session.execute(insert(SaldoApertura), nuevos)
+
+
+def _archivar_lote(inicio, fin, tamano_lote):
+    # Mueve hasta tamano_lote movimientos del mes [inicio, fin); devuelve cuántos
+    del_mes = and_(Movimiento.FechaCreacion >= inicio, Movimiento.FechaCreacion < fin)
+    hasta_id = db.session.execute(
+        select(Movimiento.Id).where(del_mes).order_by(Movimiento.Id)
+        .offset(tamano_lote - 1).limit(1)
+    ).scalar()
+    if hasta_id is None:
+        hasta_id = db.session.execute(select(func.max(Movimiento.Id)).where(del_mes)).scalar()
+        if hasta_id is None:
+            return 0
+    lote = and_(del_mes, Movimiento.Id <= hasta_id)
+
+    deltas = db.session.execute(
+        select(Movimiento.ProductoId, func.sum(cantidad_firmada())).where(lote).group_by(Movimiento.ProductoId)
+    ).all()
+    db.session.execute(insert(MovimientoArchivo).from_select(
+        ('Periodo',) + COLUMNAS,
+        select(literal(periodo_de(inicio)), *(getattr(Movimiento, c) for c in COLUMNAS)).where(lote)
+    ))
+    _sumar_apertura({producto_id: float(delta) for producto_id, delta in deltas}, fin)
+    return db.session.execute(
+        delete(Movimiento).where(lote).execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def archivar_movimientos(antes_de, tamano_lote=50_000):
+    # Archiva los movimientos de los meses completos anteriores a 'antes_de'.
+    # Cada lote es una transacción; si se interrumpe, volver a ejecutar
+    # continúa donde quedó. Antes del primer lote espera VERSIONES_TTL más
+    # el margen (ver arriba).
+    corte = inicio_de_mes(antes_de)
+    primero = db.session.execute(
+        select(func.min(Movimiento.FechaCreacion)).where(Movimiento.FechaCreacion < corte)
+    ).scalar()
+    if primero is None:
+        return ResultadoArchivo(0, 0, horizonte_archivo())
+
+    try:
+        _adelantar_horizonte(periodo_de(corte))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    _esperar_horizonte()
+
+    meses = 0
+    movidos = 0
+    inicio = inicio_de_mes(primero)
+    while inicio < corte:
+        fin = _mes_siguiente(inicio)
+        try:
+            while True:
+                cantidad = _archivar_lote(inicio, fin, tamano_lote)
+                db.session.commit()
+                movidos += cantidad
+                if cantidad < tamano_lote:
+                    break
+        except Exception:
+            db.session.rollback()
+            raise
+        meses += 1
+        inicio = fin
+
+    return ResultadoArchivo(meses, movidos, horizonte_archivo())
@@ -0,0 +1,304 @@
+from app import db
+from app.models.categorias import Categoria
+from app.models.proveedores import Proveedor
+from app.models.productos import Producto
+from app.services.versiones import version_de
+from flask import current_app
+from sqlalchemy import select
+from threading import Lock, RLock, Thread
+import bisect
+import re
+import time
+import unicodedata
+
+# ========================
+# Índice de búsqueda en memoria
+# ========================
+# Sustituye los ILIKE '%texto%' (que obligan a recorrer la tabla completa) por
+# un índice en memoria sobre los textos normalizados:
+#   1. lista ordenada de campos completos: coincidencias por inicio del campo;
+#   2. lista ordenada de sufijos que empiezan en cada palabra: coincidencias
+#      por inicio de palabra o frase;
+#   3. trigramas sobre el vocabulario (palabra -> ids): subcadenas a mitad de
+#      palabra, solo si 1 y 2 no alcanzan el límite.
+# Las listas ordenadas resuelven un prefijo con bisect y se recorren hasta
+# completar el límite, así el costo depende del límite y no del catálogo.
+# El índice se construye al iniciar y se actualiza desde las rutas de
+# alta/edición/baja. Los cambios hechos por otros workers o por la CLI se
+# recogen por la versión de la tabla en VersionesDatos (y, por si acaso, cada
+# BUSQUEDA_REFRESCO segundos): la reconstrucción corre en un hilo, una sola a
+# la vez, sobre estructuras nuevas que reemplazan a las anteriores al
+# terminar; mientras tanto las búsquedas siguen usando el índice anterior.
+
+N = 3
+SEPARADORES = str.maketrans({'-': ' ', '_': ' ', '/': ' ', '.': ' '})
+INICIO_PALABRA = re.compile(r'(?<=[ \-_/.])[^ \-_/.]')
+
+
+def normalizar(texto):
+    texto = (texto or '').lower()
+    if not texto.isascii():
+        texto = unicodedata.normalize('NFKD', texto)
+        texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.split())
+
+
+def _palabras(texto):
+    return texto.translate(SEPARADORES).split()
+
+
+def _trigramas(texto):
+    return {texto[i:i + N] for i in range(len(texto) - N + 1)}
+
+
+def _sufijos_palabra(texto):
+    # Sufijos del texto que empiezan en cada palabra, salvo el propio texto
+    return {texto[m.start():] for m in INICIO_PALABRA.finditer(texto)}
+
+
+class IndiceBusqueda:
+    def __init__(self, nombre, cargar, tablas=()):
+        self.nombre = nombre
+        self._cargar = cargar
+        # Tablas cuya versión invalida el índice
+        self._tablas = tablas
+        self._lock = RLock()
+        self._lock_construccion = Lock()
+        self._limpiar()
+        self._construido = None
+        self._version = None
+        self._vencido = False
+        self._construyendo = False
+        # Cambia con cada modificación del contenido (cachés de resultados)
+        self.generacion = 0
+
+    def _limpiar(self):
+        self._documentos = {}
+        self._campos = []
+        self._palabras = []
+        self._vocabulario = {}
+        self._trigramas = {}
+
+    # --- Construcción y mantenimiento ---
+    def construir(self):
+        # La versión se lee antes de cargar: un cambio confirmado durante la
+        # carga deja el índice vencido y provoca otra reconstrucción
+        with self._lock:
+            self._vencido = False
+        version = version_de(*self._tablas) if self._tablas else None
+        nuevo = IndiceBusqueda(self.nombre, self._cargar)
+        for id, activo, campos in self._cargar():
+            nuevo._agregar(id, activo, campos, ordenado=False)
+        nuevo._campos.sort()
+        nuevo._palabras.sort()
+        with self._lock:
+            self._documentos = nuevo._documentos
+            self._campos = nuevo._campos
+            self._palabras = nuevo._palabras
+            self._vocabulario = nuevo._vocabulario
+            self._trigramas = nuevo._trigramas
+            self._version = version
+            self._construido = time.monotonic()
+            self.generacion += 1
+
+    def invalidar(self):
+        with self._lock:
+            self._vencido = True
+
+    def agregar(self, id, activo, *campos):
+        with self._lock:
+            self._eliminar(id)
+            self._agregar(id, activo, campos)
+            self.generacion += 1
+
+    def actualizar_estado(self, id, activo):
+        with self._lock:
+            documento = self._documentos.get(id)
+            if documento:
+                self._documentos[id] = (activo,) + documento[1:]
+                self.generacion += 1
+
+    def eliminar(self, id):
+        with self._lock:
+            self._eliminar(id)
+            self.generacion += 1
+
+    def _entradas(self, id, normalizados):
+        campos = {(texto, id) for texto in normalizados if texto}
+        palabras = {(sufijo, id) for texto in normalizados for sufijo in _sufijos_palabra(texto)}
+        return campos, palabras
+
+    def _agregar(self, id, activo, campos, ordenado=True):
+        normalizados = tuple(normalizar(c) for c in campos)
+        self._documentos[id] = (activo, normalizados, tuple(campos))
+        entradas_campos, entradas_palabras = self._entradas(id, normalizados)
+        if ordenado:
+            for entrada in entradas_campos:
+                bisect.insort(self._campos, entrada)
+            for entrada in entradas_palabras:
+                bisect.insort(self._palabras, entrada)
+        else:
+            self._campos.extend(entradas_campos)
+            self._palabras.extend(entradas_palabras)
+        for palabra in {p for texto in normalizados for p in _palabras(texto)}:
+            ids = self._vocabulario.get(palabra)
+            if ids is None:
+                ids = self._vocabulario[palabra] = set()
+                for gram in _trigramas(palabra):
+                    self._trigramas.setdefault(gram, set()).add(palabra)
+            ids.add(id)
+
+    def _eliminar(self, id):
+        documento = self._documentos.pop(id, None)
+        if not documento:
+            return
+        entradas_campos, entradas_palabras = self._entradas(id, documento[1])
+        for lista, entradas in ((self._campos, entradas_campos), (self._palabras, entradas_palabras)):
+            for entrada in entradas:
+                posicion = bisect.bisect_left(lista, entrada)
+                if posicion < len(lista) and lista[posicion] == entrada:
+                    del lista[posicion]
+        for palabra in {p for texto in documento[1] for p in _palabras(texto)}:
+            ids = self._vocabulario.get(palabra)
+            if ids is None:
+                continue
+            ids.discard(id)
+            if ids:
+                continue
+            del self._vocabulario[palabra]
+            for gram in _trigramas(palabra):
+                palabras = self._trigramas.get(gram)
+                if palabras is not None:
+                    palabras.discard(palabra)
+                    if not palabras:
+                        del self._trigramas[gram]
+
+    def _asegurar_vigente(self):
+        if self._construido is None:
+            # Sin índice todavía: un solo request lo construye, los demás esperan
+            with self._lock_construccion:
+                if self._construido is None:
+                    self.construir()
+            return
+
+        refresco = current_app.config.get('BUSQUEDA_REFRESCO', 300)
+        if (self._vencido or time.monotonic() - self._construido > refresco
+                or (self._tablas and version_de(*self._tablas) != self._version)):
+            self._reconstruir_en_segundo_plano()
+
+    def _reconstruir_en_segundo_plano(self):
+        with self._lock:
+            if self._construyendo:
+                return
+            self._construyendo = True
+        app = current_app._get_current_object()
+        Thread(target=self._reconstruir, args=(app,), name=f'indice-{self.nombre}', daemon=True).start()
+
+    def _reconstruir(self, app):
+        try:
+            with app.app_context():
+                self.construir()
+        except Exception as e:
+            print(f"Error reconstruyendo el índice de {self.nombre}: {e}")
+        finally:
+            with self._lock:
+                self._construyendo = False
+
+    # --- Consulta ---
+    def _aceptar(self, id, solo_activos, vistos, resultados):
+        if id in vistos:
+            return
+        vistos.add(id)
+        if solo_activos and not self._documentos[id][0]:
+            return
+        resultados.append(id)
+
+    def _por_prefijo(self, lista, consulta, limite, solo_activos, vistos, resultados):
+        posicion = bisect.bisect_left(lista, (consulta,))
+        while posicion < len(lista) and len(resultados) < limite:
+            texto, id = lista[posicion]
+            if not texto.startswith(consulta):
+                break
+            self._aceptar(id, solo_activos, vistos, resultados)
+            posicion += 1
+
+    def _por_subcadena(self, consulta, limite, solo_activos, vistos, resultados):
+        # La pieza más larga de la consulta debe aparecer dentro de alguna
+        # palabra del documento; se buscan esas palabras por trigramas
+        pieza = max(_palabras(consulta), key=len, default='')
+        if len(pieza) < N:
+            return
+
+        listas = []
+        for gram in _trigramas(pieza):
+            palabras = self._trigramas.get(gram)
+            if not palabras:
+                return
+            listas.append(palabras)
+        listas.sort(key=len)
+        palabras = set(listas[0]).intersection(*listas[1:])
+
+        encontrados = []
+        for palabra in sorted(p for p in palabras if pieza in p):
+            for id in self._vocabulario[palabra]:
+                if id in vistos:
+                    continue
+                activo, textos, _ = self._documentos[id]
+                if any(consulta in texto for texto in textos):
+                    vistos.add(id)
+                    if activo or not solo_activos:
+                        encontrados.append((min(textos), id))
+            if len(resultados) + len(encontrados) >= limite:
+                break
+        encontrados.sort()
+        resultados.extend(id for _, id in encontrados[:limite - len(resultados)])
+
+    def buscar(self, consulta, limite=50, solo_activos=False):
+        consulta = normalizar(consulta)
+        if not consulta:
+            return []
+
+        self._asegurar_vigente()
+        resultados = []
+        vistos = set()
+        with self._lock:
+            self._por_prefijo(self._campos, consulta, limite, solo_activos, vistos, resultados)
+            self._por_prefijo(self._palabras, consulta, limite, solo_activos, vistos, resultados)
+            if len(resultados) < limite and len(consulta) >= N:
+                self._por_subcadena(consulta, limite, solo_activos, vistos, resultados)
+        return resultados
+
+    def documento(self, id):
+        with self._lock:
+            documento = self._documentos.get(id)
+        return documento[2] if documento else None
+
+
+# ========================
+# Índices de la aplicación
+# ========================
+def _cargar_productos():
+    for fila in db.session.execute(
+        select(Producto.Id, Producto.Activo, Producto.Nombre, Producto.CodigoSKU)
+    ):
+        yield fila.Id, bool(fila.Activo), (fila.Nombre, fila.CodigoSKU)
+
+
+def _cargar_categorias():
+    for fila in db.session.execute(select(Categoria.Id, Categoria.Activo, Categoria.Nombre)):
+        yield fila.Id, bool(fila.Activo), (fila.Nombre,)
+
+
+def _cargar_proveedores():
+    for fila in db.session.execute(select(Proveedor.Id, Proveedor.Activo, Proveedor.Nombre)):
+        yield fila.Id, bool(fila.Activo), (fila.Nombre,)
+
+
+indice_productos = IndiceBusqueda('productos', _cargar_productos, ('Productos',))
+indice_categorias = IndiceBusqueda('categorias', _cargar_categorias, ('Categorias',))
+indice_proveedores = IndiceBusqueda('proveedores', _cargar_proveedores, ('Proveedores',))
+
+
+def construir_indices():
+    for indice in (indice_productos, indice_categorias, indice_proveedores):
+        indice.construir()
@@ -0,0 +1,122 @@
+from app.services.versiones import version_de
+from app.utils.http import argumentos_normalizados
+from collections import OrderedDict
+from flask import Response, current_app, g, message_flashed, request, session
+from functools import wraps
+from threading import Lock
+
+# ========================
+# Caché de páginas renderizadas
+# ========================
+# Las listas de productos y movimientos cuestan tanto en renderizado (cada
+# fila se pinta en la tabla y en las tarjetas) como en consulta. La página
+# HTML completa se guarda con una clave (endpoint, parámetros normalizados,
+# versiones de las tablas de las que depende). Las rutas de escritura ya
+# incrementan esas versiones, así que una página servida desde el caché
+# nunca es más vieja que VERSIONES_TTL y un acierto no consulta la base de
+# datos ni renderiza. El caché es LRU con un límite en bytes.
+# Las respuestas con mensajes flash pendientes no se guardan ni se sirven
+# desde el caché, porque el mensaje forma parte de la página.
+# Una búsqueda se resuelve con el índice en memoria, que se reconstruye en
+# segundo plano y puede ir detrás de la versión de su tabla: con el
+# parámetro de búsqueda presente la clave incluye además la generación del
+# índice, así una página armada con un índice viejo no queda guardada bajo
+# la versión nueva.
+
+MAX_BYTES_DEFECTO = 32 * 1024 * 1024
+
+
+class CachePaginas:
+    def __init__(self):
+        self._lock = Lock()
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._estadisticas = {'aciertos': 0, 'fallos': 0, 'omitidas': 0, 'desalojadas': 0}
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self._estadisticas['fallos'] += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self._estadisticas['aciertos'] += 1
+            return entrada
+
+    def guardar(self, clave, cuerpo, mimetype, max_bytes):
+        if len(cuerpo) > max_bytes:
+            return
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= len(anterior[0])
+            self._entradas[clave] = (cuerpo, mimetype)
+            self._bytes += len(cuerpo)
+            while self._bytes > max_bytes:
+                _, (descartado, _) = self._entradas.popitem(last=False)
+                self._bytes -= len(descartado)
+                self._estadisticas['desalojadas'] += 1
+
+    def omitir(self):
+        with self._lock:
+            self._estadisticas['omitidas'] += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        with self._lock:
+            total = self._estadisticas['aciertos'] + self._estadisticas['fallos']
+            return dict(
+                self._estadisticas,
+                tasa_aciertos=round(self._estadisticas['aciertos'] / total, 4) if total else None,
+                entradas=len(self._entradas),
+                bytes=self._bytes
+            )
+
+
+cache_paginas = CachePaginas()
+
+
+def _hay_mensajes():
+    # Mensajes de un request anterior (redirect) o generados en este
+    return bool(session.get('_flashes')) or g.get('_mensaje_flash', False)
+
+
+@message_flashed.connect
+def _mensaje_generado(sender, **extra):
+    g._mensaje_flash = True
+
+
+def cachear_pagina(*tablas, indices=None):
+    # Decorador para vistas GET que solo dependen de sus parámetros y de las
+    # tablas indicadas. indices: {parámetro: IndiceBusqueda} que usa la vista
+    # cuando recibe ese parámetro
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if not current_app.config.get('CACHE_PAGINAS_ACTIVO', True) or _hay_mensajes():
+                cache_paginas.omitir()
+                return vista(*args, **kwargs)
+
+            clave = (request.endpoint, tuple(sorted(kwargs.items())),
+                     tuple(argumentos_normalizados()), version_de(*tablas),
+                     tuple(indice.generacion for parametro, indice in sorted((indices or {}).items())
+                           if request.args.get(parametro)))
+            entrada = cache_paginas.obtener(clave)
+            if entrada is not None:
+                respuesta = Response(entrada[0], mimetype=entrada[1])
+                respuesta.headers['X-Cache'] = 'HIT'
+                return respuesta
+
+            respuesta = current_app.make_response(vista(*args, **kwargs))
+            # La vista pudo generar un mensaje flash (p. ej. un cursor inválido)
+            if respuesta.status_code == 200 and not respuesta.is_streamed and not _hay_mensajes():
+                cache_paginas.guardar(clave, respuesta.get_data(), respuesta.mimetype,
+                                      current_app.config.get('CACHE_PAGINAS_MAX_BYTES', MAX_BYTES_DEFECTO))
+            respuesta.headers['X-Cache'] = 'MISS'
+            return respuesta
+        return envoltura
+    return decorador
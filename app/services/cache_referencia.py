@@ -0,0 +1,92 @@
+from app import db
+from app.models.categorias import Categoria
+from app.models.proveedores import Proveedor
+from app.models.productos import Producto
+from app.models.recetas import Receta, RecetaIngrediente
+from app.services.versiones import version_de
+from sqlalchemy import select
+from threading import Lock
+
+# ========================
+# Caché de datos de referencia
+# ========================
+# Listas usadas para llenar los desplegables de los formularios. Cada entrada
+# guarda la versión de las tablas de las que depende; mientras esa versión no
+# cambie se sirve desde memoria sin consultar la base de datos.
+
+_lock = Lock()
+_entradas = {}
+_estadisticas = {'aciertos': 0, 'fallos': 0}
+
+
+def _obtener(nombre, tablas, cargar):
+    version = version_de(*tablas)
+    with _lock:
+        entrada = _entradas.get(nombre)
+        if entrada and entrada[0] == version:
+            _estadisticas['aciertos'] += 1
+            return entrada[1]
+        _estadisticas['fallos'] += 1
+
+    datos = cargar()
+    with _lock:
+        _entradas[nombre] = (version, datos)
+    return datos
+
+
+def categorias_activas():
+    return _obtener('categorias_activas', ('Categorias',), lambda: db.session.execute(
+        select(Categoria.Id, Categoria.Nombre)
+        .where(Categoria.Activo == True)
+        .order_by(Categoria.Nombre)
+    ).all())
+
+
+def proveedores_activos():
+    return _obtener('proveedores_activos', ('Proveedores',), lambda: db.session.execute(
+        select(Proveedor.Id, Proveedor.Nombre)
+        .where(Proveedor.Activo == True)
+        .order_by(Proveedor.Nombre)
+    ).all())
+
+
+def productos_activos():
+    # Incluye el stock, por eso depende también de la versión de Movimientos
+    return _obtener('productos_activos', ('Productos', 'Movimientos'), lambda: db.session.execute(
+        select(Producto.Id, Producto.CodigoSKU, Producto.Nombre,
+               Producto.CantidadActual, Producto.UnidadMedida)
+        .where(Producto.Activo == True)
+        .order_by(Producto.Nombre)
+    ).all())
+
+
+def _cargar_recetas():
+    mapa = {}
+    for receta_id, nombre, producto_id, cantidad in db.session.execute(
+        select(Receta.Id, Receta.Nombre, RecetaIngrediente.ProductoId, RecetaIngrediente.CantidadPorPorcion)
+        .join(RecetaIngrediente, RecetaIngrediente.RecetaId == Receta.Id)
+        .where(Receta.Activo == True)
+    ):
+        mapa.setdefault(receta_id, (nombre, []))[1].append((producto_id, cantidad))
+    return {receta_id: (nombre, tuple(ingredientes)) for receta_id, (nombre, ingredientes) in mapa.items()}
+
+
+def mapa_recetas():
+    # {RecetaId: (Nombre, ((ProductoId, CantidadPorPorcion), ...))} de las recetas activas
+    return _obtener('mapa_recetas', ('Recetas',), _cargar_recetas)
+
+
+def estadisticas():
+    with _lock:
+        total = _estadisticas['aciertos'] + _estadisticas['fallos']
+        return {
+            'aciertos': _estadisticas['aciertos'],
+            'fallos': _estadisticas['fallos'],
+            'tasa_aciertos': round(_estadisticas['aciertos'] / total, 4) if total else None,
+            'entradas': sorted(_entradas)
+        }
+
+
+def limpiar():
+    with _lock:
+        _entradas.clear()
@@ -0,0 +1,154 @@
+from app import db
+from app.models.cambios import Cambio
+from app.models.categorias import Categoria
+from app.models.movimientos import Movimiento
+from app.models.productos import Producto
+from app.models.proveedores import Proveedor
+from app.models.versiones import VersionDatos
+from app.services.versiones import incrementar_version
+from app.utils.bloques import en_bloques
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+# ========================
+# Registro de cambios (sincronización incremental)
+# ========================
+# Cada alta, edición, baja o cambio de stock agrega filas a Cambios en la
+# misma transacción que la escritura. Un cliente que ya vio hasta N pide
+# 'Numero > N' (un rango sobre el índice Numero, Secuencia) y recibe solo lo
+# que cambió.
+# La identidad (Secuencia) se asigna al insertar, no al confirmar: una
+# transacción sin confirmar puede tener una Secuencia menor que otra ya
+# visible, y un cliente que avanzara por Secuencia la saltaría. Por eso las
+# filas se numeran con el contador 'Cambios' de VersionesDatos, que se
+# incrementa al confirmar (ver app/services/versiones.py): registrar_cambios
+# solo las anota en la sesión y se insertan en before_commit con el número
+# nuevo. La fila del contador queda bloqueada hasta el final de la
+# confirmación, así que los números se hacen visibles en orden: quien ve el
+# número N ya puede ver todos los menores. Todas las filas de una
+# transacción comparten el número y se entregan juntas.
+
+TABLAS = {
+    'Productos': Producto,
+    'Categorias': Categoria,
+    'Proveedores': Proveedor,
+    'Movimientos': Movimiento,
+}
+
+OPERACIONES = ('alta', 'edicion', 'baja', 'reactivacion', 'stock')
+
+LIMITE_DEFECTO = 1000
+LIMITE_MAXIMO = 5000
+
+ResultadoCambios = namedtuple('ResultadoCambios', ['cambios', 'hasta', 'mas', 'reinicio'])
+
+
+def registrar_cambios(tabla, ids, operacion):
+    # Se ejecuta en la sesión actual; el llamador confirma la transacción
+    if tabla not in TABLAS:
+        raise ValueError(f'Tabla sin registro de cambios: {tabla}')
+    if operacion not in OPERACIONES:
+        raise ValueError(f'Operación inválida: {operacion}')
+    if ids:
+        db.session.info.setdefault('cambios_pendientes', []).extend((tabla, id, operacion) for id in ids)
+        incrementar_version('Cambios')
+
+
+# Registrado después del listener de versiones (este módulo lo importa), así
+# que el contador ya se incrementó
+@event.listens_for(Session, 'before_commit')
+def _numerar_cambios(session):
+    pendientes = session.info.pop('cambios_pendientes', None)
+    if not pendientes:
+        return
+    numero = session.info['versiones_confirmadas']['Cambios']
+    ahora = datetime.utcnow()
+    session.execute(insert(Cambio), [
+        {'Numero': numero, 'Tabla': tabla, 'RegistroId': id, 'Operacion': operacion, 'FechaCreacion': ahora}
+        for tabla, id, operacion in pendientes
+    ])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_cambios(session):
+    session.info.pop('cambios_pendientes', None)
+
+
+def _purgado():
+    # Sin caché: se lee después de las filas, así una purga confirmada
+    # mientras tanto se detecta siempre
+    return db.session.execute(
+        select(VersionDatos.Version).where(VersionDatos.Tabla == 'CambiosPurgados')
+    ).scalar() or 0
+
+
+def cambios_desde(desde, limite=LIMITE_DEFECTO):
+    # Devuelve {tabla: {id: operacion}} con la última operación de cada
+    # registro, el número hasta el que se leyó y si quedan más cambios.
+    # reinicio=True indica que los cambios pedidos ya se purgaron: el
+    # cliente descarga todo de nuevo y continúa desde 'hasta'.
+    consulta = (
+        select(Cambio.Numero, Cambio.Tabla, Cambio.RegistroId, Cambio.Operacion)
+        .where(Cambio.Numero > desde)
+        .order_by(Cambio.Numero, Cambio.Secuencia)
+    )
+    filas = db.session.execute(consulta.limit(limite + 1)).all()
+    mas = len(filas) > limite
+    if mas:
+        # Solo números completos: el último puede estar cortado por el límite
+        ultimo = filas[-1].Numero
+        filas = [f for f in filas if f.Numero != ultimo]
+        if not filas:
+            # Una sola transacción con más cambios que el límite: va entera
+            filas = db.session.execute(consulta.where(Cambio.Numero == ultimo)).all()
+
+    purgado = _purgado()
+    if desde < purgado:
+        # Lo purgado ya estaba confirmado; lo posterior se vuelve a leer
+        # desde ahí después de la descarga completa
+        return ResultadoCambios(cambios={}, hasta=purgado, mas=False, reinicio=True)
+
+    cambios = {}
+    for fila in filas:
+        cambios.setdefault(fila.Tabla, {})[fila.RegistroId] = fila.Operacion
+    hasta = filas[-1].Numero if filas else desde
+    return ResultadoCambios(cambios=cambios, hasta=hasta, mas=mas, reinicio=False)
+
+
+def cargar_registros(tabla, ids, columnas):
+    # Filas actuales de los registros cambiados, en bloques de IN
+    modelo = TABLAS[tabla]
+    filas = []
+    for bloque in en_bloques(sorted(ids)):
+        filas.extend(db.session.execute(
+            select(*columnas, modelo.Id).where(modelo.Id.in_(bloque))
+        ).all())
+    return filas
+
+
+def purgar_cambios(antes_de):
+    # Borra los cambios anteriores a la fecha y guarda el último número
+    # purgado en VersionesDatos ('CambiosPurgados')
+    try:
+        ultima = db.session.execute(
+            select(func.max(Cambio.Numero)).where(Cambio.FechaCreacion < antes_de)
+        ).scalar()
+        if ultima is None:
+            return 0
+        borrados = db.session.execute(delete(Cambio).where(Cambio.Numero <= ultima)).rowcount
+        resultado = db.session.execute(
+            update(VersionDatos)
+            .where(VersionDatos.Tabla == 'CambiosPurgados')
+            .values(Version=ultima)
+            .execution_options(synchronize_session=False)
+        )
+        if resultado.rowcount == 0:
+            db.session.add(VersionDatos(Tabla='CambiosPurgados', Version=ultima))
+        db.session.info['versiones_pendientes'] = True
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return borrados
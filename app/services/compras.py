@@ -0,0 +1,171 @@
+from app import db
+from app.models.compras import OrdenCompra, OrdenCompraLinea
+from app.models.productos import Producto
+from app.models.proveedores import Proveedor
+from app.services.stock import registrar_lote, LineaMovimiento
+from collections import namedtuple
+from datetime import datetime
+from itertools import groupby
+from sqlalchemy import select, insert, update, exists
+import math
+
+# ========================
+# Órdenes de compra por proveedor
+# ========================
+# Una consulta trae todos los productos activos bajo su mínimo (el mismo
+# criterio del dashboard: CantidadActual <= StockMinimo) con su proveedor,
+# ordenados por proveedor. Se pide hasta el nivel objetivo
+# StockMinimo * factor_objetivo, redondeado a unidades completas, y se crea
+# una orden en borrador por proveedor: un INSERT por lotes de las órdenes y
+# otro de las líneas. Los productos que ya están en una orden en borrador no
+# se vuelven a pedir.
+# Al recibir una orden, todas sus líneas se registran como entradas con
+# registrar_lote en la misma transacción que el cambio de estado.
+
+MOTIVO_COMPRA = 'Orden de compra'
+
+SugerenciaCompra = namedtuple('SugerenciaCompra', [
+    'proveedor_id', 'proveedor', 'producto_id', 'codigo_sku', 'nombre', 'unidad_medida',
+    'cantidad_actual', 'stock_minimo', 'cantidad', 'precio_unitario'
+])
+
+ResultadoGeneracion = namedtuple('ResultadoGeneracion', ['ordenes', 'lineas'])
+
+
+class CompraError(Exception):
+    pass
+
+
+def productos_a_reordenar(factor_objetivo=2.0):
+    # [SugerenciaCompra] ordenadas por proveedor y nombre del producto
+    en_borrador = exists().where(
+        OrdenCompraLinea.ProductoId == Producto.Id,
+        OrdenCompraLinea.OrdenId == OrdenCompra.Id,
+        OrdenCompra.Estado == 'borrador'
+    )
+    filas = db.session.execute(
+        select(
+            Producto.ProveedorId, Proveedor.Nombre.label('Proveedor'), Producto.Id, Producto.CodigoSKU,
+            Producto.Nombre, Producto.UnidadMedida, Producto.CantidadActual, Producto.StockMinimo,
+            Producto.PrecioUnitario
+        ).join(Proveedor, Proveedor.Id == Producto.ProveedorId).where(
+            Producto.Activo == True,
+            Proveedor.Activo == True,
+            Producto.CantidadActual <= Producto.StockMinimo,
+            ~en_borrador
+        ).order_by(Producto.ProveedorId, Producto.Nombre)
+    ).all()
+
+    sugerencias = []
+    for fila in filas:
+        actual = fila.CantidadActual or 0
+        # Redondeo hacia arriba sin que el error de punto flotante sume una unidad
+        cantidad = math.ceil(round((fila.StockMinimo or 0) * factor_objetivo - actual, 6))
+        if cantidad > 0:
+            sugerencias.append(SugerenciaCompra(
+                fila.ProveedorId, fila.Proveedor, fila.Id, fila.CodigoSKU, fila.Nombre, fila.UnidadMedida,
+                actual, fila.StockMinimo, float(cantidad), fila.PrecioUnitario
+            ))
+    return sugerencias
+
+
+def generar_ordenes(factor_objetivo=2.0, usuario='Sistema'):
+    if not math.isfinite(factor_objetivo) or factor_objetivo < 1:
+        raise CompraError('El factor objetivo debe ser un número de al menos 1.')
+    sugerencias = productos_a_reordenar(factor_objetivo)
+    if not sugerencias:
+        return ResultadoGeneracion(0, 0)
+
+    ahora = datetime.utcnow()
+    por_proveedor = {
+        proveedor_id: list(lineas)
+        for proveedor_id, lineas in groupby(sugerencias, key=lambda s: s.proveedor_id)
+    }
+    try:
+        ordenes = db.session.execute(
+            insert(OrdenCompra).returning(OrdenCompra.Id, OrdenCompra.ProveedorId),
+            [
+                {'ProveedorId': proveedor_id, 'Estado': 'borrador', 'Usuario': usuario, 'FechaCreacion': ahora}
+                for proveedor_id in por_proveedor
+            ]
+        ).all()
+        db.session.execute(insert(OrdenCompraLinea), [
+            {
+                'OrdenId': orden.Id,
+                'ProductoId': s.producto_id,
+                'Cantidad': s.cantidad,
+                'PrecioUnitario': s.precio_unitario
+            }
+            for orden in ordenes for s in por_proveedor[orden.ProveedorId]
+        ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return ResultadoGeneracion(len(ordenes), len(sugerencias))
+
+
+# ========================
+# Recibir o cancelar
+# ========================
+def _cambiar_estado(orden_id, estado, **valores):
+    # Solo una recepción o cancelación gana: la fila sale de 'borrador' una vez
+    resultado = db.session.execute(
+        update(OrdenCompra)
+        .where(OrdenCompra.Id == orden_id, OrdenCompra.Estado == 'borrador')
+        .values(Estado=estado, **valores)
+        .execution_options(synchronize_session=False)
+    )
+    if resultado.rowcount == 0:
+        raise CompraError('La orden no existe o ya no está en borrador.')
+
+
+def recibir_orden(orden_id, recibidas=None, usuario='Sistema'):
+    # recibidas: {producto_id: cantidad} para entregas que no coinciden con
+    # lo pedido; las líneas que no aparecen se reciben completas. Devuelve el
+    # ResultadoLote de las entradas.
+    recibidas = recibidas or {}
+    try:
+        _cambiar_estado(orden_id, 'recibida', FechaRecepcion=datetime.utcnow())
+        lineas = db.session.execute(
+            select(OrdenCompraLinea.Id, OrdenCompraLinea.ProductoId, OrdenCompraLinea.Cantidad)
+            .where(OrdenCompraLinea.OrdenId == orden_id)
+            .order_by(OrdenCompraLinea.ProductoId)
+        ).all()
+
+        cantidades = {l.ProductoId: float(recibidas.get(l.ProductoId, l.Cantidad)) for l in lineas}
+        if any(not math.isfinite(cantidad) or cantidad < 0 for cantidad in cantidades.values()):
+            raise CompraError('Las cantidades recibidas deben ser números no negativos.')
+        if not any(cantidades.values()):
+            raise CompraError('No se recibió ningún producto; cancele la orden en su lugar.')
+
+        db.session.execute(update(OrdenCompraLinea), [
+            {'Id': l.Id, 'CantidadRecibida': cantidades[l.ProductoId]} for l in lineas
+        ])
+
+        # registrar_lote confirma la transacción: el cambio de estado, las
+        # cantidades recibidas y las entradas se guardan juntos o no se guardan
+        return registrar_lote([
+            LineaMovimiento(
+                producto_id=producto_id,
+                tipo='entrada',
+                cantidad=cantidad,
+                motivo=MOTIVO_COMPRA,
+                notas=f'Orden de compra #{orden_id}',
+                clave=None
+            )
+            for producto_id, cantidad in cantidades.items() if cantidad > 0
+        ], usuario=usuario)
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def cancelar_orden(orden_id):
+    try:
+        _cambiar_estado(orden_id, 'cancelada')
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
@@ -0,0 +1,152 @@
+from app import db
+from app.models.movimientos import Movimiento, cantidad_firmada
+from app.models.productos import Producto
+from app.models.archivo import SaldoApertura
+from app.services.cambios import registrar_cambios
+from app.services.versiones import incrementar_version, invalidar_versiones
+from app.utils.bloques import en_bloques
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import select, insert, func, cast, Float
+import csv
+import numpy as np
+import time
+
+# ========================
+# Conciliación de stock contra el libro de movimientos
+# ========================
+# CantidadActual debería ser la suma con signo de los movimientos del
+# producto, pero la edición manual del producto la sobrescribe. La
+# conciliación suma el libro con un GROUP BY por rangos de Movimientos.Id
+# (recorridos de la clave primaria, que se pueden repartir entre varios
+# hilos con su propia conexión) y acumula los parciales con NumPy. Los
+# productos que no cuadran se vuelven a verificar uno a uno en una sola
+# consulta, así un movimiento registrado durante la conciliación no aparece
+# como diferencia. Opcionalmente se registra un movimiento de ajuste por
+# producto para que el libro coincida con CantidadActual.
+# Los movimientos archivados entran a través de SaldosApertura.
+
+MOTIVO_AJUSTE = 'Ajuste de conciliación'
+
+Diferencia = namedtuple('Diferencia', [
+    'producto_id', 'codigo_sku', 'nombre', 'cantidad_actual', 'saldo_movimientos', 'diferencia'
+])
+
+ResultadoConciliacion = namedtuple('ResultadoConciliacion', [
+    'productos', 'movimientos_hasta', 'diferencias', 'ajustados', 'segundos'
+])
+
+
+def _saldos_rango(engine, desde_id, hasta_id):
+    consulta = select(
+        Movimiento.ProductoId,
+        cast(func.sum(cantidad_firmada()), Float)
+    ).where(Movimiento.Id.between(desde_id, hasta_id)).group_by(Movimiento.ProductoId)
+    with engine.connect() as conexion:
+        return conexion.execute(consulta).all()
+
+
+def saldos_libro(tamano_bloque=1_000_000, trabajadores=1):
+    # Devuelve (saldo por ProductoId como arreglo indexado por Id, último Id sumado)
+    limites = db.session.execute(select(func.min(Movimiento.Id), func.max(Movimiento.Id))).first()
+    minimo, maximo = limites if limites[0] is not None else (1, 0)
+    rangos = [(inicio, min(inicio + tamano_bloque - 1, maximo))
+              for inicio in range(minimo, maximo + 1, tamano_bloque)]
+
+    engine = db.engine
+    if trabajadores > 1 and len(rangos) > 1:
+        with ThreadPoolExecutor(max_workers=trabajadores) as ejecutor:
+            parciales = list(ejecutor.map(lambda rango: _saldos_rango(engine, *rango), rangos))
+    else:
+        parciales = [_saldos_rango(engine, *rango) for rango in rangos]
+
+    filas = [fila for parcial in parciales for fila in parcial]
+    filas += db.session.connection().execute(select(SaldoApertura.ProductoId, SaldoApertura.Cantidad)).all()
+    if not filas:
+        return np.zeros(1), maximo
+    producto_ids, sumas = zip(*filas)
+    saldos = np.bincount(np.array(producto_ids, dtype=np.int64),
+                         weights=np.array(sumas, dtype=float))
+    return saldos, maximo
+
+
+def _verificar(ids):
+    # Estado actual de los candidatos: cantidad y saldo exacto en la misma consulta
+    saldo = select(func.coalesce(func.sum(cantidad_firmada()), 0))\
+        .where(Movimiento.ProductoId == Producto.Id).scalar_subquery()
+    apertura = select(func.coalesce(func.sum(SaldoApertura.Cantidad), 0))\
+        .where(SaldoApertura.ProductoId == Producto.Id).scalar_subquery()
+    filas = []
+    for bloque in en_bloques(ids):
+        filas.extend(db.session.execute(
+            select(Producto.Id, Producto.CodigoSKU, Producto.Nombre,
+                   Producto.CantidadActual, cast(saldo, Float) + apertura)
+            .where(Producto.Id.in_(bloque))
+        ).all())
+    return filas
+
+
+def conciliar(tamano_bloque=1_000_000, trabajadores=1, tolerancia=0.005, ajustar=False, usuario='Conciliación'):
+    inicio = time.perf_counter()
+    saldos, movimientos_hasta = saldos_libro(tamano_bloque, trabajadores)
+
+    filas = db.session.connection().execute(select(Producto.Id, Producto.CantidadActual)).all()
+    if not filas:
+        return ResultadoConciliacion(0, movimientos_hasta, [], 0, time.perf_counter() - inicio)
+
+    ids, cantidades = zip(*filas)
+    ids = np.array(ids, dtype=np.int64)
+    cantidades = np.nan_to_num(np.array(cantidades, dtype=float))
+    libro = np.zeros(len(ids))
+    en_rango = ids < len(saldos)
+    libro[en_rango] = saldos[ids[en_rango]]
+    candidatos = ids[np.abs(cantidades - libro) > tolerancia].tolist()
+
+    diferencias = []
+    for producto_id, sku, nombre, cantidad_actual, saldo in _verificar(candidatos):
+        diferencia = (cantidad_actual or 0) - (saldo or 0)
+        if abs(diferencia) > tolerancia:
+            diferencias.append(Diferencia(producto_id, sku, nombre, cantidad_actual or 0,
+                                          saldo or 0, round(diferencia, 2)))
+    diferencias.sort(key=lambda d: d.producto_id)
+
+    ajustados = aplicar_ajustes(diferencias, usuario) if ajustar and diferencias else 0
+    return ResultadoConciliacion(len(ids), movimientos_hasta, diferencias, ajustados,
+                                 time.perf_counter() - inicio)
+
+
+def aplicar_ajustes(diferencias, usuario='Conciliación'):
+    # Un movimiento por producto; CantidadActual no cambia, el libro se
+    # corrige para coincidir con ella. Todo en una transacción.
+    ahora = datetime.utcnow()
+    try:
+        movimiento_ids = db.session.execute(insert(Movimiento).returning(Movimiento.Id), [
+            {
+                'ProductoId': d.producto_id,
+                'Tipo': 'entrada' if d.diferencia > 0 else 'salida',
+                'Cantidad': abs(d.diferencia),
+                'Motivo': MOTIVO_AJUSTE,
+                'Notas': f'Libro {d.saldo_movimientos:g}, stock {d.cantidad_actual:g}',
+                'Usuario': usuario,
+                'FechaCreacion': ahora,
+                'EsAjuste': True
+            }
+            for d in diferencias
+        ]).scalars().all()
+        registrar_cambios('Movimientos', movimiento_ids, 'alta')
+        incrementar_version('Movimientos')
+        db.session.commit()
+        invalidar_versiones()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(movimiento_ids)
+
+
+def escribir_reporte(diferencias, archivo):
+    escritor = csv.writer(archivo)
+    escritor.writerow(['ProductoId', 'CodigoSKU', 'Nombre', 'CantidadActual', 'SaldoMovimientos', 'Diferencia'])
+    for d in diferencias:
+        escritor.writerow([d.producto_id, d.codigo_sku, d.nombre, d.cantidad_actual,
+                           d.saldo_movimientos, d.diferencia])
@@ -0,0 +1,150 @@
+from app import db
+from app.models.categorias import Categoria
+from app.models.consumo import ConsumoDiario
+from app.models.productos import Producto
+from app.models.proveedores import Proveedor
+from app.services.archivo import libro_movimientos
+from app.services.versiones import incrementar_version
+from app.utils.base_datos import dia_de, inicio_periodo
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import select, insert, delete, func, case, cast, text, Float
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+# ========================
+# Consumo diario por producto (rollup)
+# ========================
+# Los reportes de consumo por día, semana o mes leen ConsumoDiario (una fila
+# por producto y día) en lugar de agrupar Movimientos, así su costo depende
+# de días × productos y no del volumen de movimientos.
+# Las rutas que registran movimientos reales (stock.registrar_movimiento,
+# stock.registrar_lote) llaman a acumular_consumo antes de confirmar: los
+# totales se suman con un upsert en la misma transacción que el movimiento.
+# Los ajustes de saldo (EsAjuste: alta, edición, conteos, conciliación) no
+# son consumo y no entran al rollup, igual que en las recomendaciones. El
+# archivo de movimientos no toca el rollup. reconstruir_consumo lo rehace a
+# partir del historial con el mismo criterio.
+
+AGRUPACIONES = ('producto', 'categoria', 'proveedor')
+PERIODOS = ('total', 'dia', 'semana', 'mes')
+
+# Upsert en SQL Server: MERGE con HOLDLOCK para que dos transacciones no
+# inserten la misma fila (producto, día)
+_MERGE_CONSUMO = text("""
+    MERGE ConsumoDiario WITH (HOLDLOCK) AS destino
+    USING (SELECT :ProductoId AS ProductoId, :Dia AS Dia, :Entradas AS Entradas,
+                  :Salidas AS Salidas, :Movimientos AS Movimientos) AS origen
+    ON destino.ProductoId = origen.ProductoId AND destino.Dia = origen.Dia
+    WHEN MATCHED THEN UPDATE SET
+        Entradas = destino.Entradas + origen.Entradas,
+        Salidas = destino.Salidas + origen.Salidas,
+        Movimientos = destino.Movimientos + origen.Movimientos
+    WHEN NOT MATCHED THEN
+        INSERT (ProductoId, Dia, Entradas, Salidas, Movimientos)
+        VALUES (origen.ProductoId, origen.Dia, origen.Entradas, origen.Salidas, origen.Movimientos);
+""")
+
+
+def acumular_consumo(movimientos):
+    # movimientos: [(producto_id, tipo, cantidad, fecha)]. Se ejecuta en la
+    # sesión actual; el llamador confirma la transacción.
+    totales = defaultdict(lambda: [0.0, 0.0, 0])
+    for producto_id, tipo, cantidad, fecha in movimientos:
+        total = totales[(producto_id, fecha.date())]
+        total[0 if tipo == 'entrada' else 1] += float(cantidad)
+        total[2] += 1
+    if not totales:
+        return
+
+    # Orden fijo de filas: dos lotes concurrentes no se bloquean en cruz
+    filas = [
+        {'ProductoId': producto_id, 'Dia': dia, 'Entradas': entradas, 'Salidas': salidas, 'Movimientos': cantidad}
+        for (producto_id, dia), (entradas, salidas, cantidad) in sorted(totales.items())
+    ]
+
+    if db.engine.dialect.name == 'sqlite':
+        stmt = sqlite_insert(ConsumoDiario)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[ConsumoDiario.ProductoId, ConsumoDiario.Dia],
+            set_={
+                'Entradas': ConsumoDiario.Entradas + stmt.excluded.Entradas,
+                'Salidas': ConsumoDiario.Salidas + stmt.excluded.Salidas,
+                'Movimientos': ConsumoDiario.Movimientos + stmt.excluded.Movimientos,
+            }
+        ), filas)
+    else:
+        db.session.execute(_MERGE_CONSUMO, filas)
+
+
+def reconstruir_consumo(desde=None):
+    # Borra el rollup desde 'desde' (día completo) y lo recalcula con un
+    # INSERT ... SELECT sobre el historial, incluido el archivo si hace falta.
+    # Una sola transacción: conviene ejecutarlo con poca actividad.
+    if desde is not None:
+        desde = datetime(desde.year, desde.month, desde.day)
+    dialecto = db.engine.dialect.name
+    m = libro_movimientos(desde)
+    dia = dia_de(m.FechaCreacion, dialecto)
+    origen = select(
+        m.ProductoId,
+        dia,
+        func.sum(case((m.Tipo == 'entrada', m.Cantidad), else_=0)),
+        func.sum(case((m.Tipo == 'entrada', 0), else_=m.Cantidad)),
+        func.count()
+    ).where(m.FechaCreacion.isnot(None), m.EsAjuste == False).group_by(m.ProductoId, dia)
+
+    borrar = delete(ConsumoDiario)
+    if desde is not None:
+        origen = origen.where(m.FechaCreacion >= desde)
+        borrar = borrar.where(ConsumoDiario.Dia >= desde.date())
+
+    try:
+        db.session.execute(borrar)
+        filas = db.session.execute(insert(ConsumoDiario).from_select(
+            ['ProductoId', 'Dia', 'Entradas', 'Salidas', 'Movimientos'], origen
+        )).rowcount
+        incrementar_version('ConsumoDiario')
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return filas
+
+
+def consulta_consumo(desde, hasta, agrupar='producto', periodo='total'):
+    # select() del consumo en [desde, hasta) agrupado por producto, categoría
+    # o proveedor y, opcionalmente, por día, semana o mes
+    if agrupar not in AGRUPACIONES:
+        raise ValueError(f'Agrupación inválida: {agrupar}')
+    if periodo not in PERIODOS:
+        raise ValueError(f'Periodo inválido: {periodo}')
+
+    if agrupar == 'categoria':
+        grupo = [Categoria.Id.label('CategoriaId'), Categoria.Nombre.label('Categoria')]
+    elif agrupar == 'proveedor':
+        grupo = [Proveedor.Id.label('ProveedorId'), Proveedor.Nombre.label('Proveedor')]
+    else:
+        grupo = [Producto.Id.label('ProductoId'), Producto.CodigoSKU, Producto.Nombre, Producto.UnidadMedida]
+
+    if periodo != 'total':
+        grupo.append(inicio_periodo(ConsumoDiario.Dia, periodo, db.engine.dialect.name).label('Periodo'))
+
+    consulta = select(
+        *grupo,
+        cast(func.sum(ConsumoDiario.Entradas), Float).label('Entradas'),
+        cast(func.sum(ConsumoDiario.Salidas), Float).label('Salidas'),
+        func.sum(ConsumoDiario.Movimientos).label('Movimientos')
+    ).join(Producto, Producto.Id == ConsumoDiario.ProductoId)
+
+    if agrupar == 'categoria':
+        consulta = consulta.join(Categoria, Categoria.Id == Producto.CategoriaId)
+    elif agrupar == 'proveedor':
+        consulta = consulta.join(Proveedor, Proveedor.Id == Producto.ProveedorId)
+
+    if desde is not None:
+        consulta = consulta.where(ConsumoDiario.Dia >= desde.date())
+    if hasta is not None:
+        consulta = consulta.where(ConsumoDiario.Dia < hasta.date())
+
+    orden = [grupo[-1]] if periodo != 'total' else []
+    return consulta.group_by(*grupo).order_by(*orden, grupo[1])
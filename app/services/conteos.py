@@ -0,0 +1,304 @@
+from app import db
+from app.models.conteos import ConteoInventario, ConteoDetalle
+from app.models.movimientos import Movimiento
+from app.models.productos import Producto
+from app.services.cambios import registrar_cambios
+from app.services.lotes import aplicar_a_lotes
+from app.services.stock import notificar_saldos, StockInsuficienteError
+from app.services.versiones import incrementar_version, invalidar_versiones
+from app.utils.bloques import en_bloques
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import select, insert, update, func, case, literal, and_
+from sqlalchemy.exc import IntegrityError
+import csv
+import math
+import numpy as np
+import time
+
+# ========================
+# Conteo físico de inventario
+# ========================
+# Un conteo es una sesión: se abre, se cargan las cantidades contadas (CSV,
+# texto o API, en lotes que se pueden repetir; gana la última carga de cada
+# producto) y se revisan las diferencias contra el sistema, calculadas para
+# toda la sesión con una consulta y arreglos de NumPy. Al cerrar, una sola
+# transacción guarda la cantidad del sistema y la diferencia de cada línea,
+# suma las diferencias al stock y registra un movimiento de ajuste por
+# producto con diferencia: tres sentencias que leen ConteosDetalle, sin
+# importar cuántos productos se contaron. Los productos que no se contaron
+# no cambian.
+
+MOTIVO_CONTEO = 'Conteo físico'
+
+ResultadoCarga = namedtuple('ResultadoCarga', ['recibidas', 'guardadas', 'errores'])
+
+DiferenciaConteo = namedtuple('DiferenciaConteo', [
+    'producto_id', 'codigo_sku', 'nombre', 'unidad_medida',
+    'cantidad_sistema', 'cantidad_contada', 'diferencia', 'valor'
+])
+
+ResumenConteo = namedtuple('ResumenConteo', [
+    'lineas', 'con_diferencia', 'faltante', 'sobrante', 'valor_faltante', 'valor_sobrante'
+])
+
+ResultadoCierre = namedtuple('ResultadoCierre', ['ajustes', 'segundos'])
+
+
+class ConteoError(Exception):
+    pass
+
+
+def _conteo_abierto(conteo_id):
+    conteo = db.session.get(ConteoInventario, conteo_id)
+    if conteo is None:
+        raise ConteoError(f'Conteo {conteo_id} no encontrado.')
+    if conteo.Estado != 'abierto':
+        raise ConteoError(f'El conteo está {conteo.Estado}.')
+    return conteo
+
+
+def abrir_conteo(nombre, usuario='Sistema'):
+    conteo = ConteoInventario(Nombre=nombre, Usuario=usuario, Estado='abierto', FechaCreacion=datetime.utcnow())
+    db.session.add(conteo)
+    db.session.commit()
+    return conteo
+
+
+# ========================
+# Cargar cantidades contadas
+# ========================
+def leer_conteos_csv(archivo, delimitador=','):
+    # Columnas codigo_sku,cantidad (con o sin encabezado); devuelve
+    # ([(producto_id, cantidad)], errores) resolviendo los SKU en bloque
+    filas = []
+    errores = []
+    for numero, fila in enumerate(csv.reader(archivo, delimiter=delimitador), start=1):
+        if not fila or not any(c.strip() for c in fila):
+            continue
+        if numero == 1 and fila[0].strip().lower() == 'codigo_sku':
+            continue
+        try:
+            sku = fila[0].strip().upper()
+            cantidad = float(fila[1])
+        except (IndexError, ValueError):
+            errores.append(f'Fila {numero}: formato inválido.')
+            continue
+        filas.append((numero, sku, cantidad))
+
+    ids = {}
+    for bloque in en_bloques(list({sku for _, sku, _ in filas})):
+        ids.update(db.session.execute(
+            select(Producto.CodigoSKU, Producto.Id).where(Producto.CodigoSKU.in_(bloque))
+        ).all())
+
+    conteos = []
+    for numero, sku, cantidad in filas:
+        if sku not in ids:
+            errores.append(f'Fila {numero}: SKU {sku} no encontrado.')
+        else:
+            conteos.append((ids[sku], cantidad))
+    return conteos, errores
+
+
+def registrar_conteos(conteo_id, conteos):
+    # conteos: [(producto_id, cantidad)]; reemplaza la cantidad de los
+    # productos ya contados en la sesión
+    _conteo_abierto(conteo_id)
+
+    cantidades = {}
+    errores = []
+    for indice, (producto_id, cantidad) in enumerate(conteos, start=1):
+        if not math.isfinite(cantidad) or cantidad < 0:
+            errores.append(f'Línea {indice}: la cantidad debe ser un número positivo.')
+        else:
+            cantidades[producto_id] = cantidad
+
+    activos = set()
+    for bloque in en_bloques(list(cantidades)):
+        activos.update(db.session.execute(
+            select(Producto.Id).where(Producto.Id.in_(bloque), Producto.Activo == True)
+        ).scalars())
+    for producto_id in [p for p in cantidades if p not in activos]:
+        errores.append(f'Producto {producto_id} no encontrado o inactivo.')
+        del cantidades[producto_id]
+
+    if not cantidades:
+        return ResultadoCarga(len(conteos), 0, errores)
+
+    ahora = datetime.utcnow()
+    existentes = {}
+    for bloque in en_bloques(list(cantidades)):
+        existentes.update(db.session.execute(
+            select(ConteoDetalle.ProductoId, ConteoDetalle.Id)
+            .where(ConteoDetalle.ConteoId == conteo_id, ConteoDetalle.ProductoId.in_(bloque))
+        ).all())
+
+    try:
+        if existentes:
+            db.session.execute(update(ConteoDetalle), [
+                {'Id': existentes[producto_id], 'CantidadContada': cantidad, 'FechaConteo': ahora}
+                for producto_id, cantidad in cantidades.items() if producto_id in existentes
+            ])
+        nuevos = [
+            {'ConteoId': conteo_id, 'ProductoId': producto_id, 'CantidadContada': cantidad, 'FechaConteo': ahora}
+            for producto_id, cantidad in cantidades.items() if producto_id not in existentes
+        ]
+        if nuevos:
+            db.session.execute(insert(ConteoDetalle), nuevos)
+        db.session.commit()
+    except IntegrityError:
+        # Otra carga agregó los mismos productos en paralelo
+        db.session.rollback()
+        raise ConteoError('Otra carga del mismo conteo está en curso; intente de nuevo.')
+    except Exception:
+        db.session.rollback()
+        raise
+    return ResultadoCarga(len(conteos), len(cantidades), errores)
+
+
+# ========================
+# Diferencias de la sesión
+# ========================
+def diferencias_conteo(conteo_id, solo_diferencias=False):
+    # Abierto: contra CantidadActual; cerrado: lo guardado al cerrar
+    conteo = db.session.get(ConteoInventario, conteo_id)
+    if conteo is None:
+        raise ConteoError(f'Conteo {conteo_id} no encontrado.')
+    sistema = ConteoDetalle.CantidadSistema if conteo.Estado == 'cerrado' else Producto.CantidadActual
+
+    filas = db.session.connection().execute(
+        select(
+            ConteoDetalle.ProductoId,
+            Producto.CodigoSKU,
+            Producto.Nombre,
+            Producto.UnidadMedida,
+            sistema,
+            ConteoDetalle.CantidadContada,
+            Producto.PrecioUnitario
+        ).join(Producto, Producto.Id == ConteoDetalle.ProductoId)
+        .where(ConteoDetalle.ConteoId == conteo_id)
+        .order_by(Producto.CodigoSKU)
+    ).all()
+    if not filas:
+        return [], ResumenConteo(0, 0, 0.0, 0.0, 0.0, 0.0)
+
+    columnas = list(zip(*filas))
+    sistema = np.nan_to_num(np.array(columnas[4], dtype=float))
+    contada = np.array(columnas[5], dtype=float)
+    precio = np.nan_to_num(np.array(columnas[6], dtype=float))
+    diferencia = np.round(contada - sistema, 2)
+    valor = np.round(diferencia * precio, 2)
+
+    faltantes = diferencia < 0
+    sobrantes = diferencia > 0
+    resumen = ResumenConteo(
+        lineas=len(filas),
+        con_diferencia=int(np.count_nonzero(diferencia)),
+        faltante=float(-diferencia[faltantes].sum()),
+        sobrante=float(diferencia[sobrantes].sum()),
+        valor_faltante=float(-valor[faltantes].sum()),
+        valor_sobrante=float(valor[sobrantes].sum())
+    )
+
+    indices = np.flatnonzero(diferencia) if solo_diferencias else range(len(filas))
+    diferencias = [
+        DiferenciaConteo(columnas[0][i], columnas[1][i], columnas[2][i], columnas[3][i],
+                         float(sistema[i]), float(contada[i]), float(diferencia[i]), float(valor[i]))
+        for i in indices
+    ]
+    return diferencias, resumen
+
+
+# ========================
+# Cerrar o cancelar
+# ========================
+def _cambiar_estado(conteo_id, estado, **valores):
+    # Solo un cierre o cancelación gana: la fila pasa de 'abierto' una vez
+    resultado = db.session.execute(
+        update(ConteoInventario)
+        .where(ConteoInventario.Id == conteo_id, ConteoInventario.Estado == 'abierto')
+        .values(Estado=estado, **valores)
+        .execution_options(synchronize_session=False)
+    )
+    if resultado.rowcount == 0:
+        raise ConteoError('El conteo no existe o ya no está abierto.')
+
+
+def cerrar_conteo(conteo_id, usuario='Sistema'):
+    reloj = time.perf_counter()
+    ahora = datetime.utcnow()
+    try:
+        _cambiar_estado(conteo_id, 'cerrado', FechaCierre=ahora)
+
+        # Cantidad del sistema y diferencia de todas las líneas en un UPDATE
+        sistema = select(Producto.CantidadActual).where(Producto.Id == ConteoDetalle.ProductoId).scalar_subquery()
+        db.session.execute(
+            update(ConteoDetalle)
+            .where(ConteoDetalle.ConteoId == conteo_id)
+            .values(CantidadSistema=sistema, Diferencia=func.round(ConteoDetalle.CantidadContada - sistema, 2))
+            .execution_options(synchronize_session=False)
+        )
+
+        # Las diferencias ya están en ConteosDetalle: el stock y los
+        # movimientos se escriben desde ahí, sin pasar los valores por Python
+        con_diferencia = and_(ConteoDetalle.ConteoId == conteo_id, ConteoDetalle.Diferencia != 0)
+        diferencia = select(ConteoDetalle.Diferencia).where(
+            ConteoDetalle.ConteoId == conteo_id, ConteoDetalle.ProductoId == Producto.Id
+        ).scalar_subquery()
+        saldos = {}
+        for fila in db.session.execute(
+            update(Producto)
+            .where(Producto.Id.in_(select(ConteoDetalle.ProductoId).where(con_diferencia)))
+            .values(CantidadActual=Producto.CantidadActual + diferencia)
+            .returning(Producto.Id, Producto.CantidadActual, Producto.StockMinimo,
+                       Producto.PrecioUnitario, Producto.Activo, Producto.Nombre)
+            .execution_options(synchronize_session=False)
+        ):
+            saldos[fila.Id] = fila
+        # Un movimiento registrado entre la lectura y el UPDATE puede dejar
+        # el producto por debajo de cero
+        for fila in saldos.values():
+            if fila.CantidadActual < 0:
+                raise StockInsuficienteError(fila.Id, fila.CantidadActual)
+
+        tipo = case((ConteoDetalle.Diferencia > 0, literal('entrada')), else_=literal('salida'))
+        movimientos = db.session.execute(
+            insert(Movimiento).from_select(
+                ['ProductoId', 'Tipo', 'Cantidad', 'Motivo', 'Notas', 'Usuario', 'FechaCreacion', 'EsAjuste'],
+                select(ConteoDetalle.ProductoId, tipo, func.abs(ConteoDetalle.Diferencia),
+                       literal(MOTIVO_CONTEO), literal(f'Conteo #{conteo_id}'),
+                       literal(usuario), literal(ahora, Movimiento.FechaCreacion.type), literal(True))
+                .where(con_diferencia)
+            ).returning(Movimiento.Id, Movimiento.ProductoId, Movimiento.Tipo, Movimiento.Cantidad)
+        ).all()
+
+        if movimientos:
+            # Sobrantes: lote sin vencimiento; faltantes: se descuentan FEFO
+            aplicar_a_lotes([(m.Id, m.ProductoId, m.Tipo, m.Cantidad, None) for m in movimientos], ahora)
+            registrar_cambios('Movimientos', [m.Id for m in movimientos], 'alta')
+            registrar_cambios('Productos', list(saldos), 'stock')
+            incrementar_version('Movimientos')
+
+        db.session.execute(
+            update(ConteoInventario).where(ConteoInventario.Id == conteo_id).values(Ajustes=len(movimientos))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        invalidar_versiones()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    deltas = {m.ProductoId: float(m.Cantidad) if m.Tipo == 'entrada' else -float(m.Cantidad) for m in movimientos}
+    notificar_saldos({producto_id: (deltas[producto_id], fila) for producto_id, fila in saldos.items()})
+    return ResultadoCierre(len(movimientos), time.perf_counter() - reloj)
+
+
+def cancelar_conteo(conteo_id):
+    try:
+        _cambiar_estado(conteo_id, 'cancelado', FechaCierre=datetime.utcnow())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
@@ -0,0 +1,85 @@
+from app import db
+from app.models.productos import Producto
+from flask import current_app
+from sqlalchemy import func, case
+from threading import Lock
+import time
+
+# ========================
+# KPIs del Dashboard
+# ========================
+# Los KPIs se calculan con un único agregado SQL y se guardan en un snapshot
+# en memoria. Las rutas que cambian stock actualizan el snapshot de forma
+# incremental (movimientos) o lo invalidan (altas/ediciones/bajas de productos).
+# El TTL hace que cada worker vuelva a sincronizarse con la base de datos.
+
+_lock = Lock()
+_snapshot = None
+_snapshot_fecha = 0.0
+
+
+def _calcular_kpis():
+    bajo = case((Producto.CantidadActual <= Producto.StockMinimo, 1), else_=0)
+    sin_stock = case((Producto.CantidadActual == 0, 1), else_=0)
+
+    fila = db.session.query(
+        func.count(Producto.Id),
+        func.coalesce(func.sum(bajo), 0),
+        func.coalesce(func.sum(sin_stock), 0),
+        func.coalesce(func.sum(Producto.CantidadActual * Producto.PrecioUnitario), 0)
+    ).filter(Producto.Activo == True).group_by(Producto.Activo).first()
+
+    if fila is None:
+        return {
+            'total_productos': 0,
+            'productos_bajo_stock': 0,
+            'productos_sin_stock': 0,
+            'valor_total_inventario': 0.0
+        }
+
+    return {
+        'total_productos': int(fila[0]),
+        'productos_bajo_stock': int(fila[1]),
+        'productos_sin_stock': int(fila[2]),
+        'valor_total_inventario': float(fila[3])
+    }
+
+
+def obtener_kpis():
+    global _snapshot, _snapshot_fecha
+
+    ttl = current_app.config.get('DASHBOARD_KPI_TTL', 30)
+    with _lock:
+        if _snapshot is not None and time.monotonic() - _snapshot_fecha < ttl:
+            return dict(_snapshot)
+
+    kpis = _calcular_kpis()
+
+    with _lock:
+        _snapshot = kpis
+        _snapshot_fecha = time.monotonic()
+    return dict(kpis)
+
+
+def invalidar_kpis():
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+def actualizar_kpis_stock(cantidad_anterior, cantidad_nueva, stock_minimo, precio_unitario):
+    # Ajusta el snapshot tras un movimiento sin volver a consultar la base de datos
+    with _lock:
+        if _snapshot is None:
+            return
+
+        stock_minimo = stock_minimo or 0
+        _snapshot['productos_bajo_stock'] += (
+            int(cantidad_nueva <= stock_minimo) - int(cantidad_anterior <= stock_minimo)
+        )
+        _snapshot['productos_sin_stock'] += (
+            int(cantidad_nueva == 0) - int(cantidad_anterior == 0)
+        )
+        _snapshot['valor_total_inventario'] += (
+            (cantidad_nueva - cantidad_anterior) * float(precio_unitario)
+        )
@@ -0,0 +1,181 @@
+from app import db
+from app.models.categorias import Categoria
+from app.models.proveedores import Proveedor
+from app.models.productos import Producto
+from app.services.cambios import registrar_cambios
+from app.services.dashboard import invalidar_kpis
+from app.services.stock import registrar_en_libro, MOTIVO_SALDO_INICIAL
+from app.services.versiones import incrementar_version
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import insert, select
+import csv
+import math
+import time
+
+# ========================
+# Importación masiva de productos desde CSV
+# ========================
+# El archivo se lee fila a fila (memoria acotada al tamaño del lote). Los
+# nombres de categoría/proveedor y los SKU existentes se cargan una sola vez,
+# y las filas válidas se insertan por lotes con executemany (con
+# fast_executemany en SQL Server, ver DB_FAST_EXECUTEMANY en app/config.py).
+
+COLUMNAS = (
+    'codigo_sku', 'nombre', 'descripcion', 'cantidad_actual', 'unidad_medida',
+    'stock_minimo', 'precio_unitario', 'categoria', 'proveedor'
+)
+
+ResultadoImportacion = namedtuple('ResultadoImportacion', [
+    'procesadas', 'insertadas', 'rechazadas', 'segundos'
+])
+
+
+class ImportacionError(Exception):
+    pass
+
+
+def _cargar_referencias():
+    referencias = {'categoria': {}, 'proveedor': {}}
+    for id, nombre in db.session.execute(
+        select(Categoria.Id, Categoria.Nombre).where(Categoria.Activo == True)
+    ):
+        referencias['categoria'][nombre.strip().lower()] = id
+    for id, nombre in db.session.execute(
+        select(Proveedor.Id, Proveedor.Nombre).where(Proveedor.Activo == True)
+    ):
+        referencias['proveedor'][nombre.strip().lower()] = id
+    return referencias
+
+
+def _leer_fila(fila, referencias, skus):
+    # Mismas reglas que crear_producto; devuelve (valores, errores)
+    errores = []
+    nombre = (fila.get('nombre') or '').strip()
+    codigo_sku = (fila.get('codigo_sku') or '').strip().upper()
+    unidad_medida = (fila.get('unidad_medida') or '').strip()
+
+    try:
+        cantidad_actual = float(fila.get('cantidad_actual') or 0)
+        stock_minimo = float(fila.get('stock_minimo') or 0)
+        precio_unitario = Decimal((fila.get('precio_unitario') or '').strip())
+    except (ValueError, InvalidOperation):
+        return None, ['Cantidad, stock mínimo o precio no son números válidos.']
+    # float() y Decimal() aceptan 'nan' e 'inf'; un NaN pasa todas las
+    # comparaciones y terminaría en CantidadActual
+    if not (math.isfinite(cantidad_actual) and math.isfinite(stock_minimo) and precio_unitario.is_finite()):
+        return None, ['Cantidad, stock mínimo o precio no son números válidos.']
+
+    if not nombre:
+        errores.append('El nombre es obligatorio.')
+    if not codigo_sku:
+        errores.append('El código SKU es obligatorio.')
+    if len(codigo_sku) > 50:
+        errores.append('El código SKU no puede exceder 50 caracteres.')
+    if not unidad_medida:
+        errores.append('La unidad de medida es obligatoria.')
+    if cantidad_actual < 0:
+        errores.append('La cantidad actual debe ser un número positivo.')
+    if stock_minimo < 0:
+        errores.append('El stock mínimo debe ser mayor o igual a 0.')
+    if precio_unitario <= 0:
+        errores.append('El precio unitario debe ser mayor a 0.')
+    if codigo_sku in skus:
+        errores.append('El código SKU ya existe en el sistema.')
+
+    categoria_id = referencias['categoria'].get((fila.get('categoria') or '').strip().lower())
+    proveedor_id = referencias['proveedor'].get((fila.get('proveedor') or '').strip().lower())
+    if categoria_id is None:
+        errores.append('La categoría no existe o está inactiva.')
+    if proveedor_id is None:
+        errores.append('El proveedor no existe o está inactivo.')
+
+    if errores:
+        return None, errores
+
+    return {
+        'Nombre': nombre,
+        'Descripcion': (fila.get('descripcion') or '').strip(),
+        'CodigoSKU': codigo_sku,
+        'CantidadActual': cantidad_actual,
+        'UnidadMedida': unidad_medida,
+        'StockMinimo': stock_minimo,
+        'PrecioUnitario': precio_unitario,
+        'CategoriaId': categoria_id,
+        'ProveedorId': proveedor_id,
+        'Activo': True,
+        'FechaCreacion': datetime.utcnow()
+    }, []
+
+
+def importar_productos_csv(archivo, tamano_lote=1000, rechazos=None, delimitador=','):
+    # archivo: flujo de texto con encabezados; rechazos: flujo de texto opcional
+    inicio = time.perf_counter()
+    lector = csv.DictReader(archivo, delimiter=delimitador)
+    encabezados = [c.strip().lower() for c in (lector.fieldnames or [])]
+    faltantes = [c for c in ('codigo_sku', 'nombre', 'unidad_medida', 'precio_unitario',
+                             'categoria', 'proveedor') if c not in encabezados]
+    if faltantes:
+        raise ImportacionError(f'Faltan columnas en el archivo: {", ".join(faltantes)}')
+    lector.fieldnames = encabezados
+
+    escritor_rechazos = None
+    if rechazos is not None:
+        escritor_rechazos = csv.writer(rechazos, delimiter=delimitador)
+        escritor_rechazos.writerow(['fila'] + list(COLUMNAS) + ['errores'])
+
+    referencias = _cargar_referencias()
+    skus = set(db.session.execute(select(Producto.CodigoSKU)).scalars())
+
+    procesadas = insertadas = rechazadas = 0
+    lote = []
+
+    def insertar(lote):
+        ids = db.session.execute(
+            insert(Producto).returning(Producto.Id, sort_by_parameter_order=True), lote
+        ).scalars().all()
+        # La cantidad inicial entra al libro (y a un lote sin vencimiento)
+        registrar_en_libro([
+            (producto_id, 'entrada', valores['CantidadActual'], MOTIVO_SALDO_INICIAL)
+            for producto_id, valores in zip(ids, lote)
+        ])
+        incrementar_version('Productos')
+        registrar_cambios('Productos', ids, 'alta')
+        db.session.commit()
+
+    try:
+        for numero, fila in enumerate(lector, start=2):
+            procesadas += 1
+            valores, errores = _leer_fila(fila, referencias, skus)
+            if errores:
+                rechazadas += 1
+                if escritor_rechazos:
+                    escritor_rechazos.writerow(
+                        [numero] + [fila.get(c, '') for c in COLUMNAS] + [' '.join(errores)]
+                    )
+                continue
+
+            skus.add(valores['CodigoSKU'])
+            lote.append(valores)
+            if len(lote) >= tamano_lote:
+                insertar(lote)
+                insertadas += len(lote)
+                lote = []
+
+        if lote:
+            insertar(lote)
+            insertadas += len(lote)
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if insertadas:
+            invalidar_kpis()
+
+    return ResultadoImportacion(
+        procesadas=procesadas,
+        insertadas=insertadas,
+        rechazadas=rechazadas,
+        segundos=time.perf_counter() - inicio
+    )
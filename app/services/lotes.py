@@ -0,0 +1,128 @@
+from app import db
+from app.models.lotes import Lote
+from app.models.productos import Producto
+from app.utils.bloques import en_bloques
+from collections import defaultdict
+from datetime import date, timedelta
+from sqlalchemy import select, insert, update, func, case, literal_column
+
+# ========================
+# Lotes y vencimientos (FEFO)
+# ========================
+# Cada entrada crea un lote con su fecha de vencimiento (opcional) y cada
+# salida descuenta de los lotes con saldo del producto, primero el que vence
+# antes; los lotes sin vencimiento se usan al final, en orden de llegada.
+# Producto.CantidadActual sigue siendo el total que leen las listas y el
+# dashboard, y el motor de stock lo valida y bloquea antes de tocar los
+# lotes: todas las escrituras de lotes de un producto quedan serializadas
+# por el UPDATE de su fila.
+# La asignación es una sola sentencia por bloque de productos: una suma
+# acumulada (ventana por producto en orden FEFO) sobre los lotes con saldo,
+# que el índice filtrado IX_Lotes_ProductoId_FechaVencimiento entrega ya
+# ordenados, decide cuánto toma la salida de cada lote.
+
+# Cada producto usa un parámetro en el CASE y uno en el IN (límite de 2100)
+TAMANO_BLOQUE = 500
+
+# Literal y no parámetro: SQL Server solo usa un índice filtrado si el
+# predicado de la consulta coincide con el del índice
+CON_SALDO = Lote.CantidadDisponible > literal_column('0')
+
+
+def crear_lotes(entradas, fecha):
+    # entradas: [(producto_id, cantidad, vencimiento, movimiento_id)]
+    filas = [
+        {
+            'ProductoId': producto_id,
+            'FechaVencimiento': vencimiento,
+            'CantidadInicial': float(cantidad),
+            'CantidadDisponible': float(cantidad),
+            'MovimientoId': movimiento_id,
+            'FechaCreacion': fecha
+        }
+        for producto_id, cantidad, vencimiento, movimiento_id in entradas if cantidad > 0
+    ]
+    if filas:
+        db.session.execute(insert(Lote), filas)
+
+
+def consumir_fefo(salidas):
+    # salidas: {producto_id: cantidad}. Si los lotes de un producto no
+    # alcanzan (stock sin lote), se agotan; CantidadActual ya se validó.
+    for bloque in en_bloques(sorted(salidas), TAMANO_BLOQUE):
+        demanda = case({producto_id: float(salidas[producto_id]) for producto_id in bloque}, value=Lote.ProductoId)
+        acumulado = func.sum(Lote.CantidadDisponible).over(
+            partition_by=Lote.ProductoId,
+            order_by=(case((Lote.FechaVencimiento.is_(None), 1), else_=0), Lote.FechaVencimiento, Lote.Id)
+        )
+        fefo = select(
+            Lote.Id,
+            demanda.label('Demanda'),
+            (acumulado - Lote.CantidadDisponible).label('Previo'),
+            acumulado.label('Acumulado')
+        ).where(Lote.ProductoId.in_(bloque), CON_SALDO).subquery()
+
+        # Los lotes cuyo acumulado previo no cubre la demanda se vacían,
+        # salvo el último, que conserva lo que sobra
+        restante = fefo.c.Acumulado - fefo.c.Demanda
+        db.session.execute(
+            update(Lote)
+            .where(Lote.Id == fefo.c.Id, fefo.c.Previo < fefo.c.Demanda)
+            .values(CantidadDisponible=case((restante > 0, func.round(restante, 6)), else_=0))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def aplicar_a_lotes(movimientos, fecha):
+    # movimientos: [(movimiento_id, producto_id, tipo, cantidad, vencimiento)].
+    # Se ejecuta en la transacción del llamador, después del UPDATE de
+    # Productos. Las entradas se crean primero, así una salida del mismo
+    # lote también puede tomar de ellas.
+    entradas = []
+    salidas = defaultdict(float)
+    for movimiento_id, producto_id, tipo, cantidad, vencimiento in movimientos:
+        if tipo == 'entrada':
+            entradas.append((producto_id, cantidad, vencimiento, movimiento_id))
+        else:
+            salidas[producto_id] += float(cantidad)
+    crear_lotes(entradas, fecha)
+    if salidas:
+        consumir_fefo(salidas)
+
+
+# ========================
+# Consultas
+# ========================
+def consulta_por_vencer(dias=7, hoy=None):
+    # Lotes con saldo de productos activos que vencen en los próximos 'dias'
+    # (incluye los ya vencidos), por fecha de vencimiento
+    limite = (hoy or date.today()) + timedelta(days=dias)
+    return select(
+        Lote.Id,
+        Lote.ProductoId,
+        Producto.CodigoSKU,
+        Producto.Nombre,
+        Producto.UnidadMedida,
+        Lote.FechaVencimiento,
+        Lote.CantidadDisponible,
+        Producto.PrecioUnitario
+    ).join(Producto, Producto.Id == Lote.ProductoId).where(
+        Lote.FechaVencimiento.isnot(None),
+        CON_SALDO,
+        Lote.FechaVencimiento <= limite,
+        Producto.Activo == True
+    ).order_by(Lote.FechaVencimiento, Lote.ProductoId, Lote.Id)
+
+
+def consulta_lotes_producto(producto_id):
+    # Lotes con saldo de un producto en el orden en que se consumen
+    return select(
+        Lote.Id,
+        Lote.FechaVencimiento,
+        Lote.CantidadInicial,
+        Lote.CantidadDisponible,
+        Lote.MovimientoId,
+        Lote.FechaCreacion
+    ).where(Lote.ProductoId == producto_id, CON_SALDO).order_by(
+        case((Lote.FechaVencimiento.is_(None), 1), else_=0), Lote.FechaVencimiento, Lote.Id
+    )
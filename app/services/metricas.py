@@ -0,0 +1,191 @@
+from flask import g, request, has_request_context, before_render_template, template_rendered, request_started, request_finished
+from sqlalchemy import event
+from threading import Lock
+import logging
+import time
+
+# ========================
+# Instrumentación por request
+# ========================
+# Los eventos del motor miden cada sentencia SQL y las señales de Flask miden
+# el request completo y el renderizado de plantillas. Los totales de cada
+# request se acumulan en g y al terminar se vuelcan a histogramas por
+# endpoint, que /metrics publica en formato de texto de Prometheus. Cada
+# sentencia cuesta dos perf_counter() y una suma, por lo que puede quedar
+# activo en producción.
+
+logger = logging.getLogger('inventario.sql')
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Endpoints que no se miden
+EXCLUIDOS = {'static', 'metricas.metricas', 'alertas.stream_alertas'}
+
+
+class Histograma:
+    def __init__(self, nombre, ayuda, buckets):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.buckets = buckets
+        self._lock = Lock()
+        self._series = {}
+
+    def observar(self, etiqueta, valor):
+        with self._lock:
+            serie = self._series.get(etiqueta)
+            if serie is None:
+                serie = self._series[etiqueta] = [[0] * len(self.buckets), 0.0, 0]
+            conteos = serie[0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    conteos[i] += 1
+                    break
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        with self._lock:
+            series = {etiqueta: (list(s[0]), s[1], s[2]) for etiqueta, s in self._series.items()}
+        for etiqueta in sorted(series):
+            conteos, suma, total = series[etiqueta]
+            acumulado = 0
+            for limite, conteo in zip(self.buckets, conteos):
+                acumulado += conteo
+                lineas.append(f'{self.nombre}_bucket{{endpoint="{etiqueta}",le="{limite}"}} {acumulado}')
+            lineas.append(f'{self.nombre}_bucket{{endpoint="{etiqueta}",le="+Inf"}} {total}')
+            lineas.append(f'{self.nombre}_sum{{endpoint="{etiqueta}"}} {suma}')
+            lineas.append(f'{self.nombre}_count{{endpoint="{etiqueta}"}} {total}')
+        return lineas
+
+
+duracion_request = Histograma(
+    'inventario_request_duracion_segundos', 'Duración total del request.', BUCKETS_SEGUNDOS)
+duracion_db = Histograma(
+    'inventario_request_db_segundos', 'Tiempo en la base de datos por request.', BUCKETS_SEGUNDOS)
+duracion_render = Histograma(
+    'inventario_request_render_segundos', 'Tiempo de renderizado de plantillas por request.', BUCKETS_SEGUNDOS)
+consultas_request = Histograma(
+    'inventario_request_consultas', 'Sentencias SQL ejecutadas por request.', BUCKETS_CONSULTAS)
+
+HISTOGRAMAS = (duracion_request, duracion_db, duracion_render, consultas_request)
+
+_lock_lentas = Lock()
+_consultas_lentas = 0
+
+
+# ========================
+# Eventos del motor
+# ========================
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('inicio_consulta', []).append(time.perf_counter())
+
+
+def _error_al_ejecutar(contexto):
+    # Una sentencia que falla no llega a after_cursor_execute: se saca su
+    # inicio de la pila para que no quede en la conexión del pool
+    if contexto.connection is None or contexto.execution_context is None:
+        return
+    pila = contexto.connection.info.get('inicio_consulta')
+    if pila:
+        pila.pop()
+
+
+def _registrar_consulta(conn, statement, umbral_ms):
+    global _consultas_lentas
+
+    pila = conn.info.get('inicio_consulta')
+    if not pila:
+        return
+    duracion = time.perf_counter() - pila.pop()
+
+    endpoint = None
+    if has_request_context():
+        endpoint = request.endpoint
+        estado = g.get('_metricas')
+        if estado is not None:
+            estado['consultas'] += 1
+            estado['db'] += duracion
+
+    if umbral_ms and duracion * 1000 >= umbral_ms:
+        with _lock_lentas:
+            _consultas_lentas += 1
+        logger.warning('Consulta lenta (%.1f ms) en %s: %s', duracion * 1000,
+                       endpoint or 'fuera de request', ' '.join(statement.split())[:1000])
+
+
+# ========================
+# Señales de Flask
+# ========================
+def _inicio_request(sender, **extra):
+    g._metricas = {'inicio': time.perf_counter(), 'consultas': 0, 'db': 0.0, 'render': 0.0}
+
+
+def _antes_de_renderizar(sender, template, context, **extra):
+    estado = g.get('_metricas')
+    if estado is not None:
+        estado.setdefault('renders', []).append(time.perf_counter())
+
+
+def _plantilla_renderizada(sender, template, context, **extra):
+    estado = g.get('_metricas')
+    if estado is not None and estado.get('renders'):
+        estado['render'] += time.perf_counter() - estado['renders'].pop()
+
+
+def _fin_request(sender, response, **extra):
+    estado = g.pop('_metricas', None)
+    endpoint = request.endpoint or 'sin_endpoint'
+    if estado is None or endpoint in EXCLUIDOS:
+        return
+
+    duracion = time.perf_counter() - estado['inicio']
+    duracion_request.observar(endpoint, duracion)
+    duracion_db.observar(endpoint, estado['db'])
+    duracion_render.observar(endpoint, estado['render'])
+    consultas_request.observar(endpoint, estado['consultas'])
+
+    response.headers['Server-Timing'] = (
+        f"db;dur={estado['db'] * 1000:.1f};desc=\"{estado['consultas']} consultas\", "
+        f"render;dur={estado['render'] * 1000:.1f}, "
+        f"total;dur={duracion * 1000:.1f}"
+    )
+
+
+def iniciar_metricas(app, engine):
+    if not app.config.get('METRICAS_ACTIVAS', True):
+        return
+
+    # Umbral de consultas lentas en milisegundos (0 desactiva el log)
+    umbral_ms = app.config.get('SQL_UMBRAL_LENTO_MS', 500)
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+        _registrar_consulta(conn, statement, umbral_ms)
+
+    event.listen(engine, 'before_cursor_execute', _antes_de_ejecutar)
+    event.listen(engine, 'handle_error', _error_al_ejecutar)
+
+    request_started.connect(_inicio_request, app)
+    before_render_template.connect(_antes_de_renderizar, app)
+    template_rendered.connect(_plantilla_renderizada, app)
+    request_finished.connect(_fin_request, app)
+
+
+def exportar_prometheus(extra=None):
+    lineas = []
+    for histograma in HISTOGRAMAS:
+        lineas.extend(histograma.exportar())
+
+    lineas.append('# HELP inventario_consultas_lentas_total Consultas por encima de SQL_UMBRAL_LENTO_MS.')
+    lineas.append('# TYPE inventario_consultas_lentas_total counter')
+    lineas.append(f'inventario_consultas_lentas_total {_consultas_lentas}')
+
+    # Métricas adicionales: {nombre: (tipo, ayuda, valor)}, tipo 'gauge' o
+    # 'counter' (totales desde el inicio del proceso)
+    for nombre, (tipo, ayuda, valor) in (extra or {}).items():
+        lineas.append(f'# HELP {nombre} {ayuda}')
+        lineas.append(f'# TYPE {nombre} {tipo}')
+        lineas.append(f'{nombre} {valor}')
+    return '\n'.join(lineas) + '\n'
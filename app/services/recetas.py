@@ -0,0 +1,70 @@
+from app.services.cache_referencia import mapa_recetas
+from app.services.stock import registrar_lote, LineaMovimiento, LoteInvalidoError
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+# ========================
+# Consumo por recetas
+# ========================
+# Vender N porciones de un platillo consume cada ingrediente de su receta.
+# Las recetas se explotan en memoria a partir del mapa en caché (se recarga
+# solo cuando cambia la versión de Recetas), las cantidades se suman por
+# ingrediente y se registra una salida por ingrediente con registrar_lote:
+# una validación contra un único mapa de productos, un INSERT por lotes de
+# los movimientos y un UPDATE condicional por ingrediente, todo en una
+# transacción. El costo depende de cuántos ingredientes distintos se usan, no
+# de cuántos platillos se registran.
+
+MOTIVO_CONSUMO = 'Consumo de recetas'
+CENTESIMOS = Decimal('0.01')
+
+
+def explotar_porciones(porciones):
+    # porciones: [(receta_id, cantidad)] -> ({producto_id: cantidad}, resumen, errores)
+    recetas = mapa_recetas()
+    consumo = defaultdict(Decimal)
+    vendidas = defaultdict(int)
+    errores = []
+
+    for indice, (receta_id, cantidad) in enumerate(porciones, start=1):
+        if cantidad <= 0:
+            errores.append(f'Línea {indice}: la cantidad de porciones debe ser mayor a 0.')
+            continue
+        receta = recetas.get(receta_id)
+        if receta is None:
+            errores.append(f'Línea {indice}: receta {receta_id} no encontrada o inactiva.')
+            continue
+        nombre, ingredientes = receta
+        vendidas[nombre] += cantidad
+        for producto_id, por_porcion in ingredientes:
+            consumo[producto_id] += Decimal(str(por_porcion)) * cantidad
+
+    resumen = ', '.join(f'{cantidad} x {nombre}' for nombre, cantidad in vendidas.items())
+    consumo = {
+        producto_id: total.quantize(CENTESIMOS, rounding=ROUND_HALF_UP)
+        for producto_id, total in consumo.items()
+    }
+    # Cantidades que redondean a cero no generan movimiento
+    return {producto_id: total for producto_id, total in consumo.items() if total > 0}, resumen, errores
+
+
+def registrar_consumo(porciones, usuario='Sistema', clave=None):
+    consumo, resumen, errores = explotar_porciones(porciones)
+    if errores:
+        raise LoteInvalidoError(errores)
+    if not consumo:
+        raise LoteInvalidoError(['Las recetas indicadas no tienen ingredientes.'])
+
+    # Con clave, cada salida lleva la suya: un reintento no descuenta dos veces
+    lineas = [
+        LineaMovimiento(
+            producto_id=producto_id,
+            tipo='salida',
+            cantidad=cantidad,
+            motivo=MOTIVO_CONSUMO,
+            notas=resumen,
+            clave=f'{clave}:{producto_id}' if clave else None
+        )
+        for producto_id, cantidad in sorted(consumo.items())
+    ]
+    return registrar_lote(lineas, usuario=usuario)
@@ -0,0 +1,197 @@
+from app import db
+from app.models.productos import Producto
+from app.models.recomendaciones import RecomendacionStock
+from app.services.archivo import libro_movimientos
+from app.services.cambios import registrar_cambios
+from app.services.dashboard import invalidar_kpis
+from app.services.snapshots import inicio_de_dia
+from app.services.versiones import incrementar_version
+from app.utils.base_datos import dias_desde
+from app.utils.bloques import en_bloques
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, update, delete, func, cast, Float
+import numpy as np
+import time
+
+# ========================
+# Punto de reorden sugerido a partir del consumo
+# ========================
+# Una sola consulta agrupada trae las salidas por (producto, día) de todo el
+# periodo; los ajustes de saldo (edición, conteo, conciliación) no son
+# consumo y no cuentan. Con NumPy se arma la matriz productos × días (los días sin salidas
+# quedan en cero) y se calculan a la vez, para todos los productos, el
+# consumo medio diario y su desviación:
+#
+#   punto de reorden  = media * plazo + z * desviación * sqrt(plazo)
+#   cantidad sugerida = media * (plazo + cobertura)
+#                       + z * desviación * sqrt(plazo + cobertura) - stock actual
+#
+# plazo es el tiempo de entrega del proveedor en días, cobertura los días
+# entre pedidos y z el factor del nivel de servicio (1.65 ≈ 95%). El punto de
+# reorden es el StockMinimo sugerido.
+
+ResultadoRecomendaciones = namedtuple('ResultadoRecomendaciones', [
+    'productos', 'dias', 'segundos_consulta', 'segundos_calculo'
+])
+
+
+def _consumo_diario(desde, dias):
+    # Matriz de consumo (productos × días) y los Ids de cada fila
+    m = libro_movimientos(desde)
+    dia = dias_desde(m.FechaCreacion, desde, db.engine.dialect.name).label('Dia')
+    consulta = select(
+        m.ProductoId,
+        dia,
+        cast(func.sum(m.Cantidad), Float)
+    ).join(Producto, Producto.Id == m.ProductoId).where(
+        m.Tipo == 'salida',
+        m.EsAjuste == False,
+        m.FechaCreacion >= desde,
+        m.FechaCreacion < desde + timedelta(days=dias),
+        Producto.Activo == True
+    ).group_by(m.ProductoId, dia)
+
+    # Ejecución Core: cientos de miles de filas sin el costo de carga del ORM
+    filas = db.session.connection().execute(consulta).all()
+    if not filas:
+        return np.empty(0, dtype=np.int64), np.zeros((0, dias))
+
+    producto_ids, indices_dia, cantidades = zip(*filas)
+    ids, fila_de = np.unique(np.array(producto_ids, dtype=np.int64), return_inverse=True)
+    matriz = np.zeros((len(ids), dias))
+    # GROUP BY garantiza una sola fila por (producto, día)
+    matriz[fila_de, np.array(indices_dia, dtype=np.int64)] = np.array(cantidades, dtype=float)
+    return ids, matriz
+
+
+def _redondear_arriba(valores):
+    return np.ceil(np.round(valores * 100, 6)) / 100
+
+
+def calcular_puntos_reorden(matriz, existencias, plazo_dias, cobertura_dias, factor_servicio):
+    media = matriz.mean(axis=1)
+    desviacion = matriz.std(axis=1, ddof=1) if matriz.shape[1] > 1 else np.zeros(len(matriz))
+
+    punto_reorden = media * plazo_dias + factor_servicio * desviacion * np.sqrt(plazo_dias)
+    horizonte = plazo_dias + cobertura_dias
+    nivel_objetivo = media * horizonte + factor_servicio * desviacion * np.sqrt(horizonte)
+    sugerida = np.maximum(nivel_objetivo - existencias, 0)
+    return media, desviacion, _redondear_arriba(punto_reorden), _redondear_arriba(sugerida)
+
+
+def calcular_recomendaciones(dias=90, plazo_dias=2, cobertura_dias=7, factor_servicio=1.65, hasta=None):
+    # Solo días completos: el periodo termina al inicio del día de hasta
+    hasta = inicio_de_dia(hasta or datetime.utcnow())
+    desde = hasta - timedelta(days=dias)
+
+    inicio = time.perf_counter()
+    ids, matriz = _consumo_diario(desde, dias)
+    segundos_consulta = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    existencias = np.zeros(len(ids))
+    minimos = np.zeros(len(ids))
+    for bloque in en_bloques(ids.tolist()):
+        filas = db.session.execute(
+            select(Producto.Id, Producto.CantidadActual, Producto.StockMinimo).where(Producto.Id.in_(bloque))
+        ).all()
+        if filas:
+            ids_bloque, cantidades, stock_minimos = (np.array(c, dtype=float) for c in zip(*filas))
+            posiciones = np.searchsorted(ids, ids_bloque.astype(np.int64))
+            existencias[posiciones] = np.nan_to_num(cantidades)
+            minimos[posiciones] = np.nan_to_num(stock_minimos)
+
+    media, desviacion, punto_reorden, sugerida = calcular_puntos_reorden(
+        matriz, existencias, plazo_dias, cobertura_dias, factor_servicio)
+    segundos_calculo = time.perf_counter() - inicio
+
+    # Un cálculo nuevo reemplaza las recomendaciones que siguen pendientes
+    ahora = datetime.utcnow()
+    try:
+        db.session.execute(delete(RecomendacionStock).where(RecomendacionStock.Estado == 'pendiente'))
+        filas = [
+            {
+                'ProductoId': producto_id,
+                'FechaCalculo': ahora,
+                'DiasHistoria': dias,
+                'ConsumoDiario': round(consumo, 4),
+                'DesviacionDiaria': round(variacion, 4),
+                'StockMinimoActual': minimo,
+                'PuntoReorden': punto,
+                'CantidadSugerida': cantidad,
+                'Estado': 'pendiente'
+            }
+            for producto_id, consumo, variacion, minimo, punto, cantidad in zip(
+                ids.tolist(), media.tolist(), desviacion.tolist(), minimos.tolist(),
+                punto_reorden.tolist(), sugerida.tolist())
+        ]
+        if filas:
+            db.session.execute(insert(RecomendacionStock), filas)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return ResultadoRecomendaciones(
+        productos=len(ids),
+        dias=dias,
+        segundos_consulta=segundos_consulta,
+        segundos_calculo=segundos_calculo
+    )
+
+
+# ========================
+# Revisión y aplicación en lote
+# ========================
+def _pendientes(ids):
+    consulta = select(RecomendacionStock.Id, RecomendacionStock.ProductoId, RecomendacionStock.PuntoReorden)\
+        .where(RecomendacionStock.Estado == 'pendiente')
+    if ids is None:
+        return db.session.execute(consulta).all()
+    filas = []
+    for bloque in en_bloques(list(ids)):
+        filas.extend(db.session.execute(consulta.where(RecomendacionStock.Id.in_(bloque))).all())
+    return filas
+
+
+def _marcar(ids, estado, fecha):
+    for bloque in en_bloques(ids):
+        db.session.execute(
+            update(RecomendacionStock)
+            .where(RecomendacionStock.Id.in_(bloque))
+            .values(Estado=estado, FechaAplicacion=fecha)
+        )
+
+
+def aplicar_recomendaciones(ids=None):
+    # ids=None aplica todas las pendientes, en una sola transacción
+    filas = _pendientes(ids)
+    if not filas:
+        return 0
+
+    ahora = datetime.utcnow()
+    try:
+        # UPDATE por clave primaria en lote (executemany)
+        db.session.execute(update(Producto), [
+            {'Id': f.ProductoId, 'StockMinimo': f.PuntoReorden} for f in filas
+        ])
+        _marcar([f.Id for f in filas], 'aplicada', ahora)
+        incrementar_version('Productos')
+        registrar_cambios('Productos', [f.ProductoId for f in filas], 'edicion')
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # El stock mínimo cambia los conteos de bajo stock del dashboard
+    invalidar_kpis()
+    return len(filas)
+
+
+def descartar_recomendaciones(ids):
+    filas = _pendientes(ids)
+    if filas:
+        _marcar([f.Id for f in filas], 'descartada', datetime.utcnow())
+        db.session.commit()
+    return len(filas)
@@ -0,0 +1,176 @@
+from app import db
+from app.models.movimientos import Movimiento, cantidad_firmada
+from app.models.productos import Producto
+from app.models.snapshots import SnapshotStock
+from app.models.archivo import SaldoApertura
+from app.services.archivo import libro_movimientos, horizonte_archivo
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, delete, func, and_, union_all
+
+# ========================
+# Stock a una fecha (snapshots periódicos)
+# ========================
+# El stock de un producto en el instante t es la suma con signo de sus
+# movimientos con FechaCreacion <= t. En lugar de recorrer todo el historial,
+# se parte del último snapshot con FechaCorte <= t y se suman solo los
+# movimientos del intervalo (FechaCorte, t]. Cada snapshot se genera a partir
+# del anterior y de los movimientos entre ambos cortes, con un único
+# INSERT ... SELECT, así el costo depende del intervalo y no del historial.
+# Los movimientos sin FechaCreacion no se pueden ubicar en el tiempo y no
+# cuentan para el stock histórico.
+# Con movimientos archivados, un intervalo sin inicio que termina después del
+# horizonte parte de SaldosApertura en lugar de leer el archivo; los demás
+# intervalos que empiezan antes del horizonte leen la unión de ambas tablas.
+
+ResultadoSnapshot = namedtuple('ResultadoSnapshot', ['fecha_corte', 'productos', 'omitido'])
+
+
+def inicio_de_dia(fecha):
+    return datetime(fecha.year, fecha.month, fecha.day)
+
+
+def _corte_anterior(momento, producto_id=None):
+    # Último corte <= momento (global o de un producto)
+    consulta = select(func.max(SnapshotStock.FechaCorte)).where(SnapshotStock.FechaCorte <= momento)
+    if producto_id is not None:
+        consulta = consulta.where(SnapshotStock.ProductoId == producto_id)
+    return db.session.execute(consulta).scalar()
+
+
+def _deltas(desde, hasta):
+    # Suma con signo por producto de los movimientos en (desde, hasta]
+    horizonte = horizonte_archivo()
+    if desde is None and horizonte is not None and hasta >= horizonte:
+        partes = union_all(
+            select(Movimiento.ProductoId, cantidad_firmada().label('Delta'))
+            .where(Movimiento.FechaCreacion <= hasta),
+            select(SaldoApertura.ProductoId, SaldoApertura.Cantidad)
+        ).subquery()
+        return select(
+            partes.c.ProductoId.label('ProductoId'),
+            func.sum(partes.c.Delta).label('Delta')
+        ).group_by(partes.c.ProductoId)
+
+    m = libro_movimientos(desde)
+    consulta = select(
+        m.ProductoId.label('ProductoId'),
+        func.sum(cantidad_firmada(m)).label('Delta')
+    ).where(m.FechaCreacion <= hasta)
+    if desde is not None:
+        consulta = consulta.where(m.FechaCreacion > desde)
+    return consulta.group_by(m.ProductoId)
+
+
+def generar_snapshot(fecha_corte):
+    # Genera el snapshot de todos los productos en fecha_corte; si ya existe
+    # no hace nada (el comando de reconstrucción borra antes de regenerar)
+    existe = db.session.execute(
+        select(SnapshotStock.Id).where(SnapshotStock.FechaCorte == fecha_corte).limit(1)
+    ).first()
+    if existe:
+        return ResultadoSnapshot(fecha_corte=fecha_corte, productos=0, omitido=True)
+
+    corte_previo = db.session.execute(
+        select(func.max(SnapshotStock.FechaCorte)).where(SnapshotStock.FechaCorte < fecha_corte)
+    ).scalar()
+
+    deltas = _deltas(corte_previo, fecha_corte).subquery()
+    previo = select(SnapshotStock.ProductoId, SnapshotStock.Cantidad).where(
+        SnapshotStock.FechaCorte == corte_previo
+    ).subquery()
+
+    cantidad = func.coalesce(previo.c.Cantidad, 0) + func.coalesce(deltas.c.Delta, 0)
+    origen = select(
+        Producto.Id,
+        db.literal(fecha_corte, SnapshotStock.FechaCorte.type),
+        cantidad
+    ).select_from(Producto).outerjoin(
+        previo, previo.c.ProductoId == Producto.Id
+    ).outerjoin(
+        deltas, deltas.c.ProductoId == Producto.Id
+    )
+
+    try:
+        resultado = db.session.execute(
+            insert(SnapshotStock).from_select(['ProductoId', 'FechaCorte', 'Cantidad'], origen)
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return ResultadoSnapshot(fecha_corte=fecha_corte, productos=resultado.rowcount, omitido=False)
+
+
+def reconstruir_snapshots(desde=None, hasta=None, intervalo_dias=1):
+    # Borra los snapshots desde 'desde' y los regenera en cortes diarios (o
+    # cada intervalo_dias) hasta 'hasta'. Sin 'desde' empieza en el día del
+    # primer movimiento.
+    if desde is None:
+        m = libro_movimientos()
+        primero = db.session.execute(select(func.min(m.FechaCreacion))).scalar()
+        if primero is None:
+            return []
+        desde = inicio_de_dia(primero)
+    hasta = hasta or inicio_de_dia(datetime.utcnow())
+
+    try:
+        db.session.execute(delete(SnapshotStock).where(SnapshotStock.FechaCorte >= desde))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    resultados = []
+    corte = desde
+    while corte <= hasta:
+        resultados.append(generar_snapshot(corte))
+        corte += timedelta(days=intervalo_dias)
+    return resultados
+
+
+def stock_en_fecha(producto_id, momento):
+    corte = _corte_anterior(momento, producto_id)
+    horizonte = horizonte_archivo()
+    m = libro_movimientos(corte)
+    base = 0.0
+    if corte is not None:
+        base = db.session.execute(
+            select(SnapshotStock.Cantidad).where(
+                SnapshotStock.ProductoId == producto_id,
+                SnapshotStock.FechaCorte == corte
+            )
+        ).scalar() or 0.0
+    elif horizonte is not None and momento >= horizonte:
+        # Sin snapshot: lo archivado está resumido en el saldo de apertura
+        apertura = db.session.get(SaldoApertura, producto_id)
+        base = apertura.Cantidad if apertura is not None else 0.0
+        m = Movimiento
+
+    consulta = select(func.coalesce(func.sum(cantidad_firmada(m)), 0)).where(
+        m.ProductoId == producto_id,
+        m.FechaCreacion <= momento
+    )
+    if corte is not None:
+        consulta = consulta.where(m.FechaCreacion > corte)
+    return float(base) + float(db.session.execute(consulta).scalar())
+
+
+def stock_en_fecha_todos(momento):
+    # {producto_id: cantidad} para todos los productos en una sola consulta
+    corte = _corte_anterior(momento)
+    deltas = _deltas(corte, momento).subquery()
+    cantidad = func.coalesce(deltas.c.Delta, 0)
+    consulta = select(Producto.Id, cantidad).select_from(Producto)
+
+    if corte is not None:
+        consulta = select(
+            Producto.Id,
+            func.coalesce(SnapshotStock.Cantidad, 0) + cantidad
+        ).select_from(Producto).outerjoin(
+            SnapshotStock,
+            and_(SnapshotStock.ProductoId == Producto.Id, SnapshotStock.FechaCorte == corte)
+        )
+    consulta = consulta.outerjoin(deltas, deltas.c.ProductoId == Producto.Id)
+
+    return {id: float(valor) for id, valor in db.session.execute(consulta)}
@@ -0,0 +1,372 @@
+from app import db
+from app.models.idempotencia import ClaveIdempotencia
+from app.models.movimientos import Movimiento
+from app.models.productos import Producto
+from app.services.alertas import publicar_cambio_estado
+from app.services.cambios import registrar_cambios
+from app.services.consumo import acumular_consumo
+from app.services.dashboard import actualizar_kpis_stock
+from app.services.lotes import aplicar_a_lotes
+from app.services.versiones import incrementar_version, invalidar_versiones
+from app.utils.bloques import en_bloques
+from collections import namedtuple, defaultdict
+from datetime import datetime
+from sqlalchemy import update, select, insert, case
+from sqlalchemy.exc import IntegrityError
+
+# ========================
+# Motor de mutación de stock
+# ========================
+# Cada movimiento se aplica con un UPDATE condicional sobre la fila del
+# producto (CantidadActual = CantidadActual ± q, con WHERE CantidadActual >= q
+# para las salidas) y el INSERT del Movimiento en la misma transacción corta.
+# La base de datos serializa las escrituras sobre la fila, por lo que no hay
+# actualizaciones perdidas ni sobreventa, y no hace falta bloquear la fila
+# mientras Python valida. El consumo diario (ConsumoDiario) y los lotes
+# (entradas crean lotes, salidas descuentan FEFO) se actualizan en la misma
+# transacción, después del UPDATE del producto.
+
+TIPOS_MOVIMIENTO = ('entrada', 'salida')
+
+MOTIVO_SALDO_INICIAL = 'Saldo inicial'
+MOTIVO_EDICION = 'Edición de producto'
+
+ResultadoMovimiento = namedtuple('ResultadoMovimiento', [
+    'movimiento_id', 'producto_id', 'cantidad_anterior', 'cantidad_nueva',
+    'stock_minimo', 'precio_unitario', 'activo'
+])
+
+
+class StockError(Exception):
+    pass
+
+
+class ProductoNoEncontradoError(StockError):
+    pass
+
+
+class LoteDuplicadoError(StockError):
+    pass
+
+
+class LoteInvalidoError(StockError):
+    def __init__(self, errores):
+        self.errores = errores
+        super().__init__(' '.join(errores))
+
+
+class StockInsuficienteError(StockError):
+    def __init__(self, producto_id, disponible):
+        self.producto_id = producto_id
+        self.disponible = disponible
+        super().__init__(f'No hay suficiente stock. Stock actual: {disponible}')
+
+
+def registrar_movimiento(producto_id, tipo, cantidad, motivo=None, notas=None, usuario='Sistema', vencimiento=None):
+    if tipo not in TIPOS_MOVIMIENTO:
+        raise StockError(f'Tipo de movimiento inválido: {tipo}')
+    if cantidad <= 0:
+        raise StockError('La cantidad debe ser mayor a 0.')
+
+    delta = float(cantidad) if tipo == 'entrada' else -float(cantidad)
+
+    stmt = update(Producto).where(Producto.Id == producto_id)
+    if tipo == 'salida':
+        stmt = stmt.where(Producto.CantidadActual >= float(cantidad))
+    stmt = stmt.values(CantidadActual=Producto.CantidadActual + delta).returning(
+        Producto.CantidadActual,
+        Producto.StockMinimo,
+        Producto.PrecioUnitario,
+        Producto.Activo,
+        Producto.Nombre
+    ).execution_options(synchronize_session=False)
+
+    try:
+        fila = db.session.execute(stmt).first()
+
+        # Ninguna fila afectada: el producto no existe o no alcanza el stock
+        if fila is None:
+            disponible = db.session.execute(
+                select(Producto.CantidadActual).where(Producto.Id == producto_id)
+            ).scalar()
+            db.session.rollback()
+            if disponible is None:
+                raise ProductoNoEncontradoError(f'Producto {producto_id} no encontrado')
+            raise StockInsuficienteError(producto_id, disponible)
+
+        movimiento = Movimiento(
+            ProductoId=producto_id,
+            Tipo=tipo,
+            Cantidad=cantidad,
+            Motivo=motivo,
+            Notas=notas,
+            Usuario=usuario,
+            FechaCreacion=datetime.utcnow()
+        )
+        db.session.add(movimiento)
+        db.session.flush()
+        movimiento_id = movimiento.Id
+        aplicar_a_lotes([(movimiento_id, producto_id, tipo, cantidad, vencimiento)], movimiento.FechaCreacion)
+        acumular_consumo([(producto_id, tipo, cantidad, movimiento.FechaCreacion)])
+        registrar_cambios('Movimientos', [movimiento_id], 'alta')
+        registrar_cambios('Productos', [producto_id], 'stock')
+        incrementar_version('Movimientos')
+        db.session.commit()
+        invalidar_versiones()
+    except StockError:
+        raise
+    except Exception:
+        db.session.rollback()
+        raise
+
+    cantidad_nueva, stock_minimo, precio_unitario, activo, nombre = fila
+    resultado = ResultadoMovimiento(
+        movimiento_id=movimiento_id,
+        producto_id=producto_id,
+        cantidad_anterior=cantidad_nueva - delta,
+        cantidad_nueva=cantidad_nueva,
+        stock_minimo=stock_minimo,
+        precio_unitario=precio_unitario,
+        activo=activo
+    )
+
+    # Actualizar el snapshot de KPIs del dashboard y avisar a los
+    # suscriptores de alertas si el producto cambió de estado
+    if activo:
+        actualizar_kpis_stock(resultado.cantidad_anterior, cantidad_nueva,
+                              stock_minimo, precio_unitario)
+        publicar_cambio_estado(producto_id, nombre, resultado.cantidad_anterior,
+                               cantidad_nueva, stock_minimo)
+    return resultado
+
+
+# ========================
+# Ajustes de saldo (alta y edición de productos)
+# ========================
+def registrar_en_libro(movimientos, usuario='Sistema'):
+    # Registra como movimientos de ajuste (EsAjuste) cambios de CantidadActual
+    # que el llamador ya escribió: el saldo inicial de un producto nuevo
+    # (formulario e importación) o una corrección de ajustar_stock. Así el
+    # libro (stock a una fecha, conciliación) y los lotes siguen al producto.
+    # movimientos: [(producto_id, tipo, cantidad, motivo)]. Se ejecuta en la
+    # transacción del llamador, que confirma.
+    movimientos = [m for m in movimientos if m[2] > 0]
+    if not movimientos:
+        return []
+
+    # El cambio del producto primero: mismo orden de bloqueo que las demás rutas
+    db.session.flush()
+    ahora = datetime.utcnow()
+    movimiento_ids = db.session.execute(insert(Movimiento).returning(Movimiento.Id, sort_by_parameter_order=True), [
+        {
+            'ProductoId': producto_id,
+            'Tipo': tipo,
+            'Cantidad': cantidad,
+            'Motivo': motivo,
+            'Usuario': usuario,
+            'FechaCreacion': ahora,
+            'EsAjuste': True
+        }
+        for producto_id, tipo, cantidad, motivo in movimientos
+    ]).scalars().all()
+
+    aplicar_a_lotes([
+        (movimiento_id, producto_id, tipo, cantidad, None)
+        for movimiento_id, (producto_id, tipo, cantidad, motivo) in zip(movimiento_ids, movimientos)
+    ], ahora)
+    registrar_cambios('Movimientos', movimiento_ids, 'alta')
+    incrementar_version('Movimientos')
+    return movimiento_ids
+
+
+def ajustar_stock(producto_id, delta, motivo, usuario='Sistema'):
+    # Corrección manual del saldo (edición del producto) aplicada como delta
+    # con el mismo UPDATE condicional que registrar_movimiento: un movimiento
+    # confirmado mientras el usuario editaba se conserva, y la corrección no
+    # deja el stock bajo cero. Se ejecuta en la transacción del llamador;
+    # devuelve la nueva CantidadActual.
+    stmt = update(Producto).where(Producto.Id == producto_id)
+    if delta < 0:
+        stmt = stmt.where(Producto.CantidadActual >= -delta)
+    fila = db.session.execute(
+        stmt.values(CantidadActual=Producto.CantidadActual + delta)
+        .returning(Producto.CantidadActual)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if fila is None:
+        disponible = db.session.execute(
+            select(Producto.CantidadActual).where(Producto.Id == producto_id)
+        ).scalar()
+        if disponible is None:
+            raise ProductoNoEncontradoError(f'Producto {producto_id} no encontrado')
+        raise StockInsuficienteError(producto_id, disponible)
+
+    registrar_en_libro([(producto_id, 'entrada' if delta > 0 else 'salida', abs(delta), motivo)], usuario)
+    return fila.CantidadActual
+
+
+# ========================
+# Movimientos en lote
+# ========================
+# vencimiento: fecha de vencimiento del lote que crea una entrada (opcional)
+# linea: número de línea en la petición del cliente, para los errores
+# (por defecto, la posición en la lista recibida)
+LineaMovimiento = namedtuple('LineaMovimiento', [
+    'producto_id', 'tipo', 'cantidad', 'motivo', 'notas', 'clave', 'vencimiento', 'linea'
+], defaults=(None, None))
+
+ResultadoLote = namedtuple('ResultadoLote', ['aplicadas', 'duplicadas', 'saldos'])
+
+# Cada producto usa dos parámetros en el CASE y uno en el IN (límite de 2100)
+TAMANO_BLOQUE_UPDATE = 500
+
+
+def _claves_existentes(claves):
+    existentes = set()
+    for bloque in en_bloques(claves):
+        existentes.update(db.session.execute(
+            select(ClaveIdempotencia.Clave).where(ClaveIdempotencia.Clave.in_(bloque))
+        ).scalars())
+    return existentes
+
+
+def _mapa_productos(ids):
+    mapa = {}
+    for bloque in en_bloques(ids):
+        for fila in db.session.execute(
+            select(Producto.Id, Producto.CantidadActual, Producto.Activo)
+            .where(Producto.Id.in_(bloque))
+        ):
+            mapa[fila.Id] = fila
+    return mapa
+
+
+def notificar_saldos(saldos):
+    # Después de confirmar: KPIs del dashboard y alertas de cambio de estado
+    for producto_id, (delta, fila) in saldos.items():
+        if fila.Activo:
+            actualizar_kpis_stock(fila.CantidadActual - delta, fila.CantidadActual,
+                                  fila.StockMinimo, fila.PrecioUnitario)
+            publicar_cambio_estado(producto_id, fila.Nombre, fila.CantidadActual - delta,
+                                   fila.CantidadActual, fila.StockMinimo)
+
+
+def registrar_lote(lineas, usuario='Sistema'):
+    # Las líneas cuya clave ya se aplicó se omiten, así un reintento del
+    # cliente no duplica movimientos. El lote es todo o nada y se valida por
+    # saldo neto de cada producto.
+    claves = [l.clave for l in lineas if l.clave]
+    existentes = _claves_existentes(claves) if claves else set()
+
+    pendientes = []
+    numeros = []
+    duplicadas = []
+    vistas = set()
+    for posicion, linea in enumerate(lineas, start=1):
+        if linea.clave:
+            if linea.clave in existentes or linea.clave in vistas:
+                duplicadas.append(linea.clave)
+                continue
+            vistas.add(linea.clave)
+        pendientes.append(linea)
+        # Los errores citan la línea original, no la posición tras omitir duplicadas
+        numeros.append(linea.linea or posicion)
+
+    if not pendientes:
+        return ResultadoLote(aplicadas=0, duplicadas=duplicadas, saldos={})
+
+    # Validar contra un único mapa de productos y agrupar los deltas
+    productos = _mapa_productos({l.producto_id for l in pendientes})
+    deltas = defaultdict(float)
+    errores = []
+    for numero, linea in zip(numeros, pendientes):
+        if linea.tipo not in TIPOS_MOVIMIENTO:
+            errores.append(f'Línea {numero}: tipo de movimiento inválido.')
+        elif linea.cantidad <= 0:
+            errores.append(f'Línea {numero}: la cantidad debe ser mayor a 0.')
+        elif linea.producto_id not in productos:
+            errores.append(f'Línea {numero}: producto {linea.producto_id} no encontrado.')
+        else:
+            signo = 1 if linea.tipo == 'entrada' else -1
+            deltas[linea.producto_id] += signo * float(linea.cantidad)
+
+    for producto_id, delta in deltas.items():
+        disponible = productos[producto_id].CantidadActual
+        if disponible + delta < 0:
+            errores.append(f'Producto {producto_id}: no hay suficiente stock. Stock actual: {disponible}')
+
+    if errores:
+        raise LoteInvalidoError(errores)
+
+    ahora = datetime.utcnow()
+    saldos = {}
+    try:
+        if vistas:
+            db.session.execute(insert(ClaveIdempotencia), [
+                {'Clave': clave, 'FechaCreacion': ahora} for clave in vistas
+            ])
+
+        movimiento_ids = db.session.execute(insert(Movimiento).returning(Movimiento.Id, sort_by_parameter_order=True), [
+            {
+                'ProductoId': l.producto_id,
+                'Tipo': l.tipo,
+                'Cantidad': l.cantidad,
+                'Motivo': l.motivo,
+                'Notas': l.notas,
+                'Usuario': usuario,
+                'FechaCreacion': ahora
+            }
+            for l in pendientes
+        ]).scalars().all()
+
+        # Un UPDATE por bloque de productos con el delta neto de cada uno
+        # (CASE sobre el Id). La sentencia bloquea las filas, así que revisar
+        # los saldos devueltos dentro de la transacción es equivalente a la
+        # condición CantidadActual + delta >= 0 en el WHERE.
+        for bloque in en_bloques(sorted(deltas), TAMANO_BLOQUE_UPDATE):
+            stmt = update(Producto).where(Producto.Id.in_(bloque)).values(
+                CantidadActual=Producto.CantidadActual + case(
+                    {producto_id: deltas[producto_id] for producto_id in bloque}, value=Producto.Id
+                )
+            ).returning(
+                Producto.Id,
+                Producto.CantidadActual,
+                Producto.StockMinimo,
+                Producto.PrecioUnitario,
+                Producto.Activo,
+                Producto.Nombre
+            ).execution_options(synchronize_session=False)
+
+            for fila in db.session.execute(stmt):
+                if fila.CantidadActual < 0:
+                    raise StockInsuficienteError(fila.Id, fila.CantidadActual - deltas[fila.Id])
+                saldos[fila.Id] = (deltas[fila.Id], fila)
+
+        faltantes = set(deltas) - set(saldos)
+        if faltantes:
+            raise ProductoNoEncontradoError(f'Producto {min(faltantes)} no encontrado')
+
+        aplicar_a_lotes([
+            (movimiento_id, l.producto_id, l.tipo, l.cantidad, l.vencimiento)
+            for movimiento_id, l in zip(movimiento_ids, pendientes)
+        ], ahora)
+        acumular_consumo([(l.producto_id, l.tipo, l.cantidad, ahora) for l in pendientes])
+        registrar_cambios('Movimientos', movimiento_ids, 'alta')
+        registrar_cambios('Productos', list(saldos), 'stock')
+        incrementar_version('Movimientos')
+        db.session.commit()
+        invalidar_versiones()
+    except IntegrityError:
+        # Otro reintento con las mismas claves se aplicó en paralelo
+        db.session.rollback()
+        raise LoteDuplicadoError('El lote ya está siendo procesado.')
+    except Exception:
+        db.session.rollback()
+        raise
+
+    notificar_saldos(saldos)
+    return ResultadoLote(
+        aplicadas=len(pendientes),
+        duplicadas=duplicadas,
+        saldos={producto_id: fila.CantidadActual for producto_id, (delta, fila) in saldos.items()}
+    )
@@ -0,0 +1,98 @@
+from app import db
+from app.models.versiones import VersionDatos
+from flask import current_app
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from threading import Lock
+import time
+
+# ========================
+# Versiones de datos por tabla
+# ========================
+# Cada escritura incrementa el contador de su tabla en VersionesDatos dentro
+# de la misma transacción, así todos los workers ven el cambio. Movimientos
+# también: el Id máximo no sirve como versión porque el orden de las
+# identidades no es el orden de confirmación (con escrituras concurrentes, un
+# lector puede ver N+1 mientras N sigue sin confirmar, y al confirmarse N la
+# versión no cambia).
+# La fila de una tabla es compartida por todas sus escrituras (la de
+# Movimientos, por todos los movimientos de stock), así que su UPDATE
+# bloquea hasta el final de la transacción. incrementar_version solo anota
+# la tabla; los UPDATE se ejecutan en before_commit, como últimas sentencias
+# y en orden de tabla: la fila queda bloqueada solo durante la confirmación
+# y dos transacciones nunca se bloquean en cruz. La versión nueva de cada
+# tabla queda en session.info['versiones_confirmadas'] para los listeners
+# registrados después (el registro de cambios numera sus filas con ella).
+# Las versiones se leen con una sola consulta y se guardan VERSIONES_TTL
+# segundos; las escrituras del propio worker las invalidan al confirmar.
+
+_lock = Lock()
+_versiones = {}
+_leidas = 0.0
+
+
+def obtener_versiones():
+    global _versiones, _leidas
+
+    ttl = current_app.config.get('VERSIONES_TTL', 2)
+    with _lock:
+        if _leidas and time.monotonic() - _leidas < ttl:
+            return _versiones
+
+    versiones = {
+        tabla: version
+        for tabla, version in db.session.execute(select(VersionDatos.Tabla, VersionDatos.Version))
+    }
+
+    with _lock:
+        _versiones = versiones
+        _leidas = time.monotonic()
+    return versiones
+
+
+def version_de(*tablas):
+    versiones = obtener_versiones()
+    return tuple(versiones.get(tabla, 0) for tabla in tablas)
+
+
+def invalidar_versiones():
+    global _leidas
+    with _lock:
+        _leidas = 0.0
+
+
+def incrementar_version(*tablas):
+    # Anota las tablas en la sesión actual; se incrementan al confirmar
+    db.session.info.setdefault('versiones_incrementar', set()).update(tablas)
+    db.session.info['versiones_pendientes'] = True
+
+
+@event.listens_for(Session, 'before_commit')
+def _antes_de_confirmar(session):
+    confirmadas = session.info['versiones_confirmadas'] = {}
+    for tabla in sorted(session.info.pop('versiones_incrementar', ())):
+        version = session.execute(
+            update(VersionDatos)
+            .where(VersionDatos.Tabla == tabla)
+            .values(Version=VersionDatos.Version + 1)
+            .returning(VersionDatos.Version)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if version is None:
+            version = 1
+            session.add(VersionDatos(Tabla=tabla, Version=version))
+        confirmadas[tabla] = version
+
+
+@event.listens_for(Session, 'after_commit')
+def _despues_de_confirmar(session):
+    session.info.pop('versiones_confirmadas', None)
+    if session.info.pop('versiones_pendientes', False):
+        invalidar_versiones()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _despues_de_revertir(session):
+    session.info.pop('versiones_incrementar', None)
+    session.info.pop('versiones_confirmadas', None)
+    session.info.pop('versiones_pendientes', None)
@@ -0,0 +1,126 @@
+from sqlalchemy import event, cast, func, literal_column, Integer, Date
+from sqlalchemy.pool import QueuePool
+from threading import Lock
+import time
+
+# ========================
+# Pool de conexiones con métricas
+# ========================
+# QueuePool que mide cuánto espera cada checkout, para dimensionar
+# pool_size/max_overflow con datos: si la espera media o los timeouts crecen,
+# el pool se queda corto para la concurrencia de los workers.
+
+
+class PoolMedido(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock_metricas = Lock()
+        self._metricas = {
+            'checkouts': 0,
+            'esperas_ms_total': 0.0,
+            'espera_ms_maxima': 0.0,
+            'timeouts': 0,
+        }
+
+    def recreate(self):
+        # El pool recreado (dispose, pre_ping fallido) conserva las métricas
+        nuevo = super().recreate()
+        nuevo._metricas = self._metricas
+        nuevo._lock_metricas = self._lock_metricas
+        return nuevo
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except Exception:
+            with self._lock_metricas:
+                self._metricas['timeouts'] += 1
+            raise
+        espera = (time.perf_counter() - inicio) * 1000
+        with self._lock_metricas:
+            self._metricas['checkouts'] += 1
+            self._metricas['esperas_ms_total'] += espera
+            if espera > self._metricas['espera_ms_maxima']:
+                self._metricas['espera_ms_maxima'] = espera
+        return conexion
+
+    def metricas(self):
+        with self._lock_metricas:
+            metricas = dict(self._metricas)
+        checkouts = metricas['checkouts']
+        metricas['espera_ms_media'] = metricas['esperas_ms_total'] / checkouts if checkouts else 0.0
+        metricas.update({
+            'tamano': self.size(),
+            'en_uso': self.checkedout(),
+            'libres': self.checkedin(),
+            'overflow': self.overflow(),
+            'max_overflow': self._max_overflow,
+        })
+        return metricas
+
+
+def estadisticas_pool(engine):
+    pool = engine.pool
+    if isinstance(pool, PoolMedido):
+        return pool.metricas()
+    return {'pool': type(pool).__name__, 'estado': pool.status()}
+
+
+# ========================
+# PRAGMAs de SQLite
+# ========================
+def configurar_sqlite(engine, config):
+    # WAL permite lecturas concurrentes con un escritor; synchronous=NORMAL es
+    # seguro con WAL y evita un fsync por commit
+    if engine.dialect.name != 'sqlite':
+        return
+
+    busy_timeout = int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    cache_kb = int(config.get('SQLITE_CACHE_KB', 64000))
+
+    @event.listens_for(engine, 'connect')
+    def _pragmas(conexion_dbapi, registro):
+        cursor = conexion_dbapi.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.execute(f'PRAGMA busy_timeout={busy_timeout}')
+        cursor.execute(f'PRAGMA cache_size=-{cache_kb}')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.close()
+
+
+# ========================
+# Expresiones que dependen del dialecto
+# ========================
+def dias_desde(columna, inicio, dialecto):
+    # Días completos entre inicio (medianoche) y la columna, como entero
+    if dialecto == 'sqlite':
+        return cast(func.julianday(columna) - func.julianday(inicio), Integer)
+    # Fecha literal: la expresión también va en el GROUP BY (ver inicio_periodo)
+    return func.datediff(literal_column('day'), literal_column(f"'{inicio:%Y%m%d}'"), columna)
+
+
+def dia_de(columna, dialecto):
+    # Fecha (sin hora) de una columna DateTime
+    if dialecto == 'sqlite':
+        return func.date(columna)
+    return cast(columna, Date)
+
+
+def inicio_periodo(columna, periodo, dialecto):
+    # Primer día de la semana (lunes) o del mes de una columna Date. En SQL
+    # Server las constantes van literales: la expresión se repite en el GROUP
+    # BY y con parámetros distintos no se reconoce como la misma.
+    if periodo == 'semana':
+        if dialecto == 'sqlite':
+            return func.date(columna, '-6 days', 'weekday 1')
+        dia_semana = (func.datepart(literal_column('weekday'), columna) + literal_column('@@DATEFIRST')
+                      - literal_column('2')) % literal_column('7')
+        return func.dateadd(literal_column('day'), -dia_semana, columna)
+    if periodo == 'mes':
+        if dialecto == 'sqlite':
+            return func.date(columna, 'start of month')
+        return func.datefromparts(func.year(columna), func.month(columna), literal_column('1'))
+    return columna
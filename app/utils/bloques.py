@@ -0,0 +1,13 @@
+# ========================
+# Listas IN por bloques
+# ========================
+# SQL Server admite como máximo 2100 parámetros por sentencia, así que las
+# listas de Ids largas se consultan en bloques.
+
+TAMANO_BLOQUE_IN = 1000
+
+
+def en_bloques(valores, tamano=TAMANO_BLOQUE_IN):
+    valores = list(valores)
+    for i in range(0, len(valores), tamano):
+        yield valores[i:i + tamano]
@@ -0,0 +1,95 @@
+from app import db
+from flask import Response, stream_with_context
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+import csv
+import io
+import json
+
+# ========================
+# Exportación en streaming
+# ========================
+# Las filas se leen por lotes con yield_per (cursor del lado del servidor
+# cuando el driver lo soporta) y se escriben a la respuesta a medida que
+# llegan, así la memoria no depende del tamaño del resultado.
+
+FILAS_POR_LOTE = 1000
+TAMANO_BLOQUE = 64 * 1024
+
+
+def leer_fecha(valor, fin_de_dia=False):
+    # Fechas 'YYYY-MM-DD'; el límite superior incluye todo el día
+    if not valor:
+        return None
+    fecha = datetime.strptime(valor, '%Y-%m-%d')
+    return fecha + timedelta(days=1) if fin_de_dia else fecha
+
+
+def _valor_json(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def _generar_csv(filas, columnas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(columnas)
+    for fila in filas:
+        escritor.writerow(fila)
+        if buffer.tell() >= TAMANO_BLOQUE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _generar_json(filas, columnas):
+    partes = ['[']
+    tamano = 1
+    separador = ''
+    for fila in filas:
+        texto = separador + json.dumps(
+            {columna: _valor_json(valor) for columna, valor in zip(columnas, fila)},
+            ensure_ascii=False
+        )
+        partes.append(texto)
+        tamano += len(texto)
+        separador = ','
+        if tamano >= TAMANO_BLOQUE:
+            yield ''.join(partes)
+            partes = []
+            tamano = 0
+    partes.append(']')
+    yield ''.join(partes)
+
+
+def respuesta_exportacion(consulta, formato, nombre_archivo):
+    # consulta: select() de columnas; los nombres de columna van en el encabezado
+    columnas = [columna.key for columna in consulta.selected_columns]
+
+    def filas():
+        resultado = db.session.execute(
+            consulta.execution_options(yield_per=FILAS_POR_LOTE)
+        )
+        try:
+            for fila in resultado:
+                yield fila
+        finally:
+            resultado.close()
+
+    if formato == 'json':
+        generador = _generar_json(filas(), columnas)
+        mimetype = 'application/json'
+    else:
+        generador = _generar_csv(filas(), columnas)
+        mimetype = 'text/csv'
+        formato = 'csv'
+
+    return Response(
+        stream_with_context(generador),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={nombre_archivo}.{formato}'}
+    )
@@ -0,0 +1,61 @@
+from flask import Response, current_app, request
+import gzip
+import hashlib
+import json
+
+# ========================
+# Respuestas JSON condicionales y comprimidas
+# ========================
+# El ETag se calcula a partir de las versiones de las tablas involucradas y
+# de los parámetros normalizados, sin leer los datos. Si el cliente envía el
+# mismo ETag en If-None-Match se responde 304 antes de consultar y serializar.
+# La variante comprimida lleva su propio ETag ('-gz'), como exige un ETag
+# fuerte por representación.
+
+GZIP_MINIMO = 1024
+
+
+def calcular_etag(*partes):
+    clave = json.dumps(partes, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(clave.encode()).hexdigest()
+
+
+def argumentos_normalizados(*excluir):
+    return sorted(
+        (clave, valor) for clave, valores in request.args.lists() if clave not in excluir
+        for valor in valores
+    )
+
+
+def _acepta_gzip():
+    return 'gzip' in request.headers.get('Accept-Encoding', '').lower()
+
+
+def respuesta_no_modificada(etag):
+    # Devuelve la respuesta 304 si el cliente ya tiene esta versión, o None
+    if not etag:
+        return None
+    if request.if_none_match.contains(etag) or request.if_none_match.contains(f'{etag}-gz'):
+        respuesta = Response(status=304)
+        respuesta.set_etag(f'{etag}-gz' if _acepta_gzip() else etag)
+        respuesta.headers['Cache-Control'] = 'no-cache'
+        respuesta.vary.add('Accept-Encoding')
+        return respuesta
+    return None
+
+
+def respuesta_json(datos, etag=None, estado=200):
+    cuerpo = json.dumps(datos, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+    respuesta = Response(cuerpo, status=estado, mimetype='application/json')
+    respuesta.vary.add('Accept-Encoding')
+
+    minimo = current_app.config.get('GZIP_MINIMO', GZIP_MINIMO)
+    comprimida = _acepta_gzip() and len(cuerpo) >= minimo
+    if comprimida:
+        respuesta.set_data(gzip.compress(cuerpo, compresslevel=6))
+        respuesta.headers['Content-Encoding'] = 'gzip'
+
+    if etag:
+        respuesta.set_etag(f'{etag}-gz' if comprimida else etag)
+        respuesta.headers['Cache-Control'] = 'no-cache'
+    return respuesta
@@ -0,0 +1,103 @@
+from app import db
+from sqlalchemy import and_, or_
+from datetime import datetime
+import base64
+import json
+
+# ========================
+# Paginación por cursor (keyset)
+# ========================
+# El cursor es la pareja (FechaCreacion, Id) de la última fila vista, así cada
+# página se resuelve con un rango sobre el índice y su costo no depende de
+# cuántas filas hay antes. Los NULL de FechaCreacion quedan al final del orden
+# descendente (comportamiento por defecto en SQL Server y SQLite).
+
+POR_PAGINA_DEFECTO = 50
+POR_PAGINA_MAXIMO = 200
+
+
+def codificar_cursor(fecha, id):
+    datos = [fecha.isoformat() if fecha else None, id]
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        fecha, id = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return (datetime.fromisoformat(fecha) if fecha else None), int(id)
+    except (ValueError, TypeError):
+        raise ValueError('Cursor inválido')
+
+
+def _mas_antiguos(columna_fecha, columna_id, fecha, id):
+    if fecha is None:
+        return and_(columna_fecha.is_(None), columna_id < id)
+    return or_(
+        columna_fecha < fecha,
+        and_(columna_fecha == fecha, columna_id < id),
+        columna_fecha.is_(None)
+    )
+
+
+def _mas_recientes(columna_fecha, columna_id, fecha, id):
+    if fecha is None:
+        return or_(columna_fecha.isnot(None), columna_id > id)
+    return or_(
+        columna_fecha > fecha,
+        and_(columna_fecha == fecha, columna_id > id)
+    )
+
+
+def leer_por_pagina(valor):
+    try:
+        por_pagina = int(valor)
+    except (TypeError, ValueError):
+        return POR_PAGINA_DEFECTO
+    return max(1, min(por_pagina, POR_PAGINA_MAXIMO))
+
+
+def paginar_keyset(consulta, columna_fecha, columna_id, cursor=None,
+                   direccion='siguiente', por_pagina=POR_PAGINA_DEFECTO):
+    # Devuelve (filas, cursor_siguiente, cursor_anterior) en orden descendente
+    posicion = decodificar_cursor(cursor) if cursor else None
+    retroceder = posicion is not None and direccion == 'anterior'
+
+    if posicion is not None:
+        filtro = _mas_recientes if retroceder else _mas_antiguos
+        consulta = consulta.where(filtro(columna_fecha, columna_id, *posicion))
+
+    if retroceder:
+        consulta = consulta.order_by(columna_fecha.asc(), columna_id.asc())
+    else:
+        consulta = consulta.order_by(columna_fecha.desc(), columna_id.desc())
+
+    filas = db.session.execute(consulta.limit(por_pagina + 1)).all()
+    hay_mas = len(filas) > por_pagina
+    filas = filas[:por_pagina]
+
+    def cursor_de(fila):
+        return codificar_cursor(getattr(fila, columna_fecha.key), getattr(fila, columna_id.key))
+
+    if retroceder:
+        filas.reverse()
+        siguiente = cursor_de(filas[-1]) if filas else cursor
+        anterior = cursor_de(filas[0]) if filas and hay_mas else None
+    else:
+        siguiente = cursor_de(filas[-1]) if filas and hay_mas else None
+        anterior = cursor_de(filas[0]) if filas and posicion is not None else None
+
+    return filas, siguiente, anterior
+
+
+def paginar_por_id(consulta, columna_id, cursor=None, por_pagina=POR_PAGINA_DEFECTO):
+    # Paginación ascendente por Id; devuelve (filas, cursor_siguiente)
+    if cursor:
+        _, ultimo_id = decodificar_cursor(cursor)
+        consulta = consulta.where(columna_id > ultimo_id)
+
+    filas = db.session.execute(consulta.order_by(columna_id.asc()).limit(por_pagina + 1)).all()
+    hay_mas = len(filas) > por_pagina
+    filas = filas[:por_pagina]
+    siguiente = codificar_cursor(None, getattr(filas[-1], columna_id.key)) if hay_mas else None
+    return filas, siguiente
@@ -0,0 +1,86 @@
+"""Latencia del índice de búsqueda de productos con un catálogo sintético.
+
+Uso:
+    python -m benchmarks.busqueda --productos 100000 --consultas 5000
+"""
+from app import create_app
+from app.services.busqueda import IndiceBusqueda
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PALABRAS = [
+    'tortilla', 'maíz', 'harina', 'carne', 'res', 'pollo', 'queso', 'cheddar', 'salsa',
+    'picante', 'frijol', 'lechuga', 'tomate', 'cebolla', 'crema', 'aguacate', 'jalapeño',
+    'arroz', 'papas', 'aceite', 'vaso', 'tapa', 'servilleta', 'bolsa', 'refresco', 'hielo'
+]
+
+
+def catalogo(productos, semilla):
+    aleatorio = random.Random(semilla)
+    for i in range(1, productos + 1):
+        nombre = ' '.join(aleatorio.sample(PALABRAS, 3)).title()
+        yield i, True, (f'{nombre} {i}', f'SKU-{i:07d}')
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--productos', type=int, default=100_000)
+    parser.add_argument('--consultas', type=int, default=2000)
+    parser.add_argument('--semilla', type=int, default=7)
+    parser.add_argument('--memoria', action='store_true',
+                        help='mide la memoria con tracemalloc (hace la construcción más lenta)')
+    args = parser.parse_args()
+
+    ruta = os.path.join(tempfile.gettempdir(), 'inventario_busqueda.db')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{ruta}',
+        'BUSQUEDA_CONSTRUIR_AL_INICIO': False,
+        'BUSQUEDA_REFRESCO': 10 ** 9,
+    })
+
+    indice = IndiceBusqueda('benchmark', lambda: catalogo(args.productos, args.semilla))
+    if args.memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    indice.construir()
+    construccion = time.perf_counter() - inicio
+    memoria = None
+    if args.memoria:
+        _, memoria = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    aleatorio = random.Random(args.semilla)
+    consultas = []
+    for _ in range(args.consultas):
+        palabra = aleatorio.choice(PALABRAS)
+        consultas.append(aleatorio.choice([
+            palabra[:2], palabra[:4], palabra, f'sku-{aleatorio.randint(1, args.productos):07d}'[:8]
+        ]))
+
+    latencias = []
+    with app.app_context():
+        for consulta in consultas:
+            inicio = time.perf_counter()
+            indice.buscar(consulta, limite=10, solo_activos=True)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    print(f'construcción: {args.productos:,} productos en {construccion:.2f}s')
+    if memoria is not None:
+        print(f'memoria pico del índice: {memoria / 1024 / 1024:,.0f} MB')
+    print(f'typeahead: p50={percentil(latencias, 0.50):.2f}ms '
+          f'p99={percentil(latencias, 0.99):.2f}ms max={max(latencias):.2f}ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Tiempo de la conciliación de stock contra el libro de movimientos.
+
+Genera (o reutiliza) una base sintética, desvía CantidadActual en una parte
+de los productos y mide la conciliación con distintos números de hilos.
+
+Uso:
+    python -m benchmarks.conciliacion --productos 100000 --movimientos 10000000
+    python -m benchmarks.conciliacion --reusar --trabajadores 1 2 4
+"""
+from app import create_app, db
+from app.models.productos import Producto
+from app.services.conciliacion import conciliar
+from benchmarks.generador import generar
+from sqlalchemy import update
+import argparse
+import os
+import sys
+import tempfile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--productos', type=int, default=100_000)
+    parser.add_argument('--movimientos', type=int, default=10_000_000)
+    parser.add_argument('--bloque', type=int, default=1_000_000)
+    parser.add_argument('--trabajadores', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--desviados', type=int, default=100, help='productos con CantidadActual alterada')
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'inventario_conciliacion.db'))
+    parser.add_argument('--reusar', action='store_true', help='usa la base de datos generada antes')
+    args = parser.parse_args()
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{args.db}',
+        'BUSQUEDA_CONSTRUIR_AL_INICIO': False,
+        'METRICAS_ACTIVAS': False,
+    })
+
+    with app.app_context():
+        if not args.reusar:
+            generar(categorias=100, proveedores=500, productos=args.productos,
+                    movimientos=args.movimientos)
+            # Simula ediciones manuales que sobrescriben el stock
+            db.session.execute(
+                update(Producto).where(Producto.Id % (args.productos // args.desviados) == 0)
+                .values(CantidadActual=Producto.CantidadActual + 3)
+            )
+            db.session.commit()
+
+        for trabajadores in args.trabajadores:
+            resultado = conciliar(tamano_bloque=args.bloque, trabajadores=trabajadores)
+            print(f'{trabajadores} hilo(s): {resultado.productos} productos, movimientos hasta '
+                  f'{resultado.movimientos_hasta}, {len(resultado.diferencias)} diferencias '
+                  f'en {resultado.segundos:.2f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Tiempo de un conteo físico: carga, diferencias y cierre en una transacción.
+
+Genera productos sintéticos, abre un conteo con --skus productos (la mitad
+con diferencia contra el sistema), y mide la carga de cantidades, el cálculo
+de diferencias y el cierre. Para el cierre se informa además el tiempo
+pasado dentro de la base de datos (suma de las sentencias ejecutadas).
+Al final concilia el stock contra el libro de movimientos.
+
+Uso:
+    python -m benchmarks.conteos --skus 5000
+    python -m benchmarks.conteos --productos 20000 --skus 10000
+"""
+from app import create_app, db
+from app.models.productos import Producto
+from app.services.conciliacion import conciliar
+from app.services.conteos import abrir_conteo, registrar_conteos, diferencias_conteo, cerrar_conteo
+from benchmarks.generador import generar
+from sqlalchemy import event, select
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+class TiempoSQL:
+    def __init__(self, engine):
+        self.sentencias = 0
+        self.segundos = 0.0
+        event.listen(engine, 'before_cursor_execute', self._antes)
+        event.listen(engine, 'after_cursor_execute', self._despues)
+
+    def _antes(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info['inicio_sentencia'] = time.perf_counter()
+
+    def _despues(self, conn, cursor, statement, parameters, context, executemany):
+        self.sentencias += 1
+        self.segundos += time.perf_counter() - conn.info.pop('inicio_sentencia')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--productos', type=int, default=10_000)
+    parser.add_argument('--movimientos', type=int, default=200_000)
+    parser.add_argument('--skus', type=int, default=5_000)
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'inventario_conteos.db'))
+    args = parser.parse_args()
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{args.db}',
+        'BUSQUEDA_CONSTRUIR_AL_INICIO': False,
+        'METRICAS_ACTIVAS': False,
+    })
+
+    with app.app_context():
+        generar(categorias=20, proveedores=50, productos=args.productos,
+                movimientos=args.movimientos, dias=90)
+
+        aleatorio = random.Random(42)
+        existencias = db.session.execute(select(Producto.Id, Producto.CantidadActual)
+                                         .where(Producto.Activo == True)).all()
+        muestra = aleatorio.sample(existencias, min(args.skus, len(existencias)))
+        conteos = [
+            (producto_id, max(0.0, round((cantidad or 0) + aleatorio.choice([0, aleatorio.uniform(-5, 5)]), 2)))
+            for producto_id, cantidad in muestra
+        ]
+
+        conteo = abrir_conteo('Benchmark')
+        inicio = time.perf_counter()
+        resultado = registrar_conteos(conteo.Id, conteos)
+        print(f'Carga de {resultado.guardadas} cantidades: {time.perf_counter() - inicio:.2f}s')
+
+        inicio = time.perf_counter()
+        _, resumen = diferencias_conteo(conteo.Id)
+        print(f'Diferencias de {resumen.lineas} líneas ({resumen.con_diferencia} con diferencia): '
+              f'{(time.perf_counter() - inicio) * 1000:.0f} ms')
+
+        tiempo = TiempoSQL(db.engine)
+        cierre = cerrar_conteo(conteo.Id, usuario='Benchmark')
+        print(f'Cierre: {cierre.ajustes} ajustes en {cierre.segundos:.2f}s '
+              f'({tiempo.sentencias} sentencias, {tiempo.segundos:.2f}s en la base de datos)')
+
+        diferencias = conciliar().diferencias
+        print(f'Conciliación después del cierre: {len(diferencias)} productos con diferencias')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Prueba de estrés del motor de stock con escritores concurrentes.
+
+Uso:
+    python -m benchmarks.estres_stock --hilos 8 --movimientos 250
+
+Lanza varios hilos que registran entradas y salidas sobre los mismos productos
+contra una base SQLite local y verifica que no se pierdan actualizaciones ni
+se venda más stock del disponible. El último escenario pone a cada hilo sobre
+su propio producto: no comparten la fila del producto, solo la versión de
+Movimientos en VersionesDatos, y mide cuánto cuesta esa fila compartida.
+"""
+from app import create_app, db
+from app.models.categorias import Categoria
+from app.models.proveedores import Proveedor
+from app.models.productos import Producto
+from app.models.movimientos import Movimiento, cantidad_firmada
+from app.services.stock import registrar_movimiento, StockInsuficienteError
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import func
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+
+def preparar_datos(app, stock_sobreventa, hilos):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        categoria = Categoria(Nombre='Estrés', FechaCreacion=datetime.utcnow())
+        proveedor = Proveedor(Nombre='Estrés')
+        db.session.add_all([categoria, proveedor])
+        db.session.flush()
+
+        mixto = Producto(Nombre='Mixto', CodigoSKU='EST-MIXTO', CantidadActual=0,
+                         UnidadMedida='u', StockMinimo=0, PrecioUnitario=1,
+                         CategoriaId=categoria.Id, ProveedorId=proveedor.Id)
+        sobreventa = Producto(Nombre='Sobreventa', CodigoSKU='EST-SOBREVENTA',
+                              CantidadActual=stock_sobreventa, UnidadMedida='u',
+                              StockMinimo=0, PrecioUnitario=1,
+                              CategoriaId=categoria.Id, ProveedorId=proveedor.Id)
+        propios = [
+            Producto(Nombre=f'Propio {i}', CodigoSKU=f'EST-PROPIO-{i}', CantidadActual=0,
+                     UnidadMedida='u', StockMinimo=0, PrecioUnitario=1,
+                     CategoriaId=categoria.Id, ProveedorId=proveedor.Id)
+            for i in range(hilos)
+        ]
+        db.session.add_all([mixto, sobreventa] + propios)
+        db.session.commit()
+        return mixto.Id, sobreventa.Id, [p.Id for p in propios]
+
+
+def trabajador(app, producto_id, movimientos, alternar):
+    exitos = rechazos = 0
+    with app.app_context():
+        for i in range(movimientos):
+            if alternar and i % 2 == 0:
+                tipo, cantidad = 'entrada', 2
+            else:
+                tipo, cantidad = 'salida', 1
+            try:
+                registrar_movimiento(producto_id, tipo, cantidad, 'Estrés', usuario='estres')
+                exitos += 1
+            except StockInsuficienteError:
+                rechazos += 1
+    return exitos, rechazos
+
+
+def ejecutar(app, producto_ids, hilos, movimientos, alternar):
+    # producto_ids: un Id para todos los hilos o una lista con uno por hilo
+    if not isinstance(producto_ids, list):
+        producto_ids = [producto_ids] * hilos
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        futuros = [pool.submit(trabajador, app, producto_id, movimientos, alternar)
+                   for producto_id in producto_ids]
+        resultados = [f.result() for f in futuros]
+    duracion = time.perf_counter() - inicio
+    exitos = sum(r[0] for r in resultados)
+    rechazos = sum(r[1] for r in resultados)
+    return exitos, rechazos, duracion
+
+
+def saldo_libro(producto_id):
+    return float(db.session.query(func.coalesce(func.sum(cantidad_firmada()), 0))
+                 .filter(Movimiento.ProductoId == producto_id).scalar())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--movimientos', type=int, default=250, help='movimientos por hilo')
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'inventario_estres.db'))
+    args = parser.parse_args()
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{args.db}',
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 60}},
+    })
+
+    total = args.hilos * args.movimientos
+    stock_sobreventa = total // 2
+    mixto_id, sobreventa_id, propios_ids = preparar_datos(app, stock_sobreventa, args.hilos)
+
+    errores = []
+
+    # Escenario 1: entradas y salidas alternadas sobre el mismo producto
+    exitos, rechazos, duracion = ejecutar(app, mixto_id, args.hilos, args.movimientos, True)
+    with app.app_context():
+        actual = db.session.get(Producto, mixto_id).CantidadActual
+        libro = saldo_libro(mixto_id)
+    print(f'[mixto] {exitos} movimientos ({rechazos} rechazados) en {duracion:.2f}s '
+          f'-> {exitos / duracion:,.0f} mov/s | stock={actual} libro={libro}')
+    if actual != libro or actual < 0:
+        errores.append(f'mixto: stock {actual} no coincide con el libro {libro}')
+
+    # Escenario 2: más salidas que stock disponible
+    exitos, rechazos, duracion = ejecutar(app, sobreventa_id, args.hilos, args.movimientos, False)
+    with app.app_context():
+        actual = db.session.get(Producto, sobreventa_id).CantidadActual
+    print(f'[sobreventa] {exitos} salidas aceptadas, {rechazos} rechazadas en {duracion:.2f}s '
+          f'-> {(exitos + rechazos) / duracion:,.0f} intentos/s | stock final={actual}')
+    if exitos != stock_sobreventa or actual != 0:
+        errores.append(f'sobreventa: {exitos} salidas aceptadas con stock inicial {stock_sobreventa}, '
+                       f'stock final {actual}')
+
+    # Escenario 3: cada hilo sobre su propio producto
+    exitos, rechazos, duracion = ejecutar(app, propios_ids, args.hilos, args.movimientos, True)
+    with app.app_context():
+        descuadrados = [i for i in propios_ids if db.session.get(Producto, i).CantidadActual != saldo_libro(i)]
+    print(f'[distintos] {exitos} movimientos ({rechazos} rechazados) en {duracion:.2f}s '
+          f'-> {exitos / duracion:,.0f} mov/s')
+    if descuadrados:
+        errores.append(f'distintos: {len(descuadrados)} productos no coinciden con el libro')
+
+    for error in errores:
+        print(f'ERROR {error}', file=sys.stderr)
+    return 1 if errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
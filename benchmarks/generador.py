@@ -0,0 +1,157 @@
+"""Genera datos sintéticos reproducibles para los benchmarks.
+
+Llena Categorias, Proveedores, Productos y Movimientos con inserciones por
+lotes (executemany). Los movimientos se generan en orden cronológico y nunca
+dejan un saldo negativo, así CantidadActual coincide con la suma del libro.
+
+Uso:
+    python -m benchmarks.generador --escala pequena --db /tmp/inventario_bench.db
+    python -m benchmarks.generador --productos 100000 --movimientos 10000000
+"""
+from app import create_app, db
+from app.models.categorias import Categoria
+from app.models.proveedores import Proveedor
+from app.models.productos import Producto
+from app.models.movimientos import Movimiento
+from benchmarks.busqueda import PALABRAS
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update, bindparam
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ESCALAS = {
+    'pequena': {'categorias': 20, 'proveedores': 50, 'productos': 1_000, 'movimientos': 100_000},
+    'mediana': {'categorias': 50, 'proveedores': 200, 'productos': 10_000, 'movimientos': 1_000_000},
+    'grande': {'categorias': 100, 'proveedores': 500, 'productos': 100_000, 'movimientos': 10_000_000},
+}
+
+UNIDADES = ('kg', 'lt', 'pz', 'caja', 'bolsa')
+MOTIVOS_ENTRADA = ('Compra a proveedor', 'Devolución', 'Ajuste de inventario')
+MOTIVOS_SALIDA = ('Consumo en cocina', 'Merma', 'Venta', 'Ajuste de inventario')
+
+
+def _insertar(modelo, filas, lote):
+    for i in range(0, len(filas), lote):
+        db.session.execute(insert(modelo), filas[i:i + lote])
+        db.session.commit()
+
+
+def generar(categorias=20, proveedores=50, productos=1_000, movimientos=100_000,
+            dias=365, semilla=42, lote=10_000, salida=print):
+    # Debe llamarse dentro de un contexto de aplicación; borra las tablas
+    aleatorio = random.Random(semilla)
+    ahora = datetime.utcnow().replace(microsecond=0)
+    inicio = ahora - timedelta(days=dias)
+
+    db.drop_all()
+    db.create_all()
+
+    t = time.perf_counter()
+    _insertar(Categoria, [
+        {'Id': i, 'Nombre': f'Categoría {i}', 'Descripcion': f'Categoría sintética {i}',
+         'Activo': i % 10 != 0, 'FechaCreacion': inicio}
+        for i in range(1, categorias + 1)
+    ], lote)
+    _insertar(Proveedor, [
+        {'Id': i, 'Nombre': f'Proveedor {i}', 'Contacto': f'Contacto {i}',
+         'Telefono': f'555-{i:04d}', 'Email': f'proveedor{i}@ejemplo.com',
+         'Activo': i % 10 != 0, 'FechaCreacion': inicio}
+        for i in range(1, proveedores + 1)
+    ], lote)
+
+    filas = []
+    for i in range(1, productos + 1):
+        filas.append({
+            'Id': i,
+            'Nombre': f"{' '.join(aleatorio.sample(PALABRAS, 3)).title()} {i}",
+            'Descripcion': None,
+            'CodigoSKU': f'SKU-{i:07d}',
+            'CantidadActual': 0,
+            'UnidadMedida': aleatorio.choice(UNIDADES),
+            'StockMinimo': aleatorio.choice((0, 5, 10, 20, 50)),
+            'PrecioUnitario': round(aleatorio.uniform(1, 500), 2),
+            'CategoriaId': aleatorio.randint(1, categorias),
+            'ProveedorId': aleatorio.randint(1, proveedores),
+            'Activo': aleatorio.random() > 0.05,
+            'FechaCreacion': inicio
+        })
+    _insertar(Producto, filas, lote)
+    salida(f'{categorias} categorías, {proveedores} proveedores, {productos} productos '
+           f'en {time.perf_counter() - t:.1f}s')
+
+    # Movimientos en orden cronológico; una salida que dejaría saldo negativo
+    # se convierte en entrada
+    t = time.perf_counter()
+    saldos = [0.0] * (productos + 1)
+    paso = dias * 86400 / max(movimientos, 1)
+    segundos = 0.0
+    filas = []
+    for i in range(1, movimientos + 1):
+        producto_id = aleatorio.randint(1, productos)
+        cantidad = aleatorio.randint(1, 20)
+        tipo = 'salida' if aleatorio.random() < 0.45 and saldos[producto_id] >= cantidad else 'entrada'
+        saldos[producto_id] += cantidad if tipo == 'entrada' else -cantidad
+        segundos += paso
+        filas.append({
+            'Id': i,
+            'ProductoId': producto_id,
+            'Tipo': tipo,
+            'Cantidad': cantidad,
+            'Motivo': aleatorio.choice(MOTIVOS_ENTRADA if tipo == 'entrada' else MOTIVOS_SALIDA),
+            'Notas': None,
+            'Usuario': 'Generador',
+            'FechaCreacion': inicio + timedelta(seconds=int(segundos))
+        })
+        if len(filas) >= lote:
+            _insertar(Movimiento, filas, lote)
+            filas = []
+    if filas:
+        _insertar(Movimiento, filas, lote)
+    salida(f'{movimientos} movimientos en {time.perf_counter() - t:.1f}s')
+
+    stmt = update(Producto).where(Producto.Id == bindparam('producto_id')).values(
+        CantidadActual=bindparam('cantidad')
+    ).execution_options(synchronize_session=False)
+    filas = [{'producto_id': i, 'cantidad': saldos[i]} for i in range(1, productos + 1)]
+    for i in range(0, len(filas), lote):
+        db.session.connection().execute(stmt, filas[i:i + lote])
+        db.session.commit()
+
+    return {'categorias': categorias, 'proveedores': proveedores,
+            'productos': productos, 'movimientos': movimientos, 'semilla': semilla}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escala', choices=sorted(ESCALAS), default='pequena')
+    parser.add_argument('--categorias', type=int)
+    parser.add_argument('--proveedores', type=int)
+    parser.add_argument('--productos', type=int)
+    parser.add_argument('--movimientos', type=int)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--lote', type=int, default=10_000)
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'inventario_bench.db'))
+    args = parser.parse_args()
+
+    tamanos = dict(ESCALAS[args.escala])
+    for clave in tamanos:
+        if getattr(args, clave) is not None:
+            tamanos[clave] = getattr(args, clave)
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{args.db}',
+        'BUSQUEDA_CONSTRUIR_AL_INICIO': False,
+    })
+    inicio = time.perf_counter()
+    with app.app_context():
+        generar(semilla=args.semilla, lote=args.lote, **tamanos)
+    print(f'Base de datos {args.db} generada en {time.perf_counter() - inicio:.1f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
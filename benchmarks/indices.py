@@ -0,0 +1,124 @@
+"""Efecto de los índices de la migración 0002 en las listas y el dashboard.
+
+Mide las rutas con y sin los índices IX_* sobre la misma base de datos
+sintética y muestra el plan de consulta de SQLite de cada sentencia.
+
+Uso:
+    python -m benchmarks.indices --escala mediana --repeticiones 20
+"""
+from app import create_app, db
+from benchmarks.generador import ESCALAS, generar
+from benchmarks.rutas import percentil
+from sqlalchemy import event, text
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+RUTAS = [
+    ('inicio', '/'),
+    ('movimientos', '/movimientos/'),
+    ('movimientos_producto', '/movimientos/?producto_id=7'),
+    ('movimientos_salidas', '/movimientos/?tipo=salida'),
+    ('productos_bajo_stock', '/productos/?estado=bajo'),
+]
+
+
+def indices_de_consulta():
+    return [indice for tabla in db.metadata.sorted_tables for indice in tabla.indexes
+            if indice.name.startswith('IX_') and indice.table.name != 'SnapshotsStock']
+
+
+def capturar_sentencias(cliente, url):
+    capturadas = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            capturadas.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capturar)
+    try:
+        cliente.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capturar)
+    return capturadas
+
+
+def planes(sentencias):
+    # Una vez por sentencia distinta (las cargas perezosas se repiten)
+    lineas = []
+    vistas = set()
+    with db.engine.connect() as conexion:
+        for statement, parameters in sentencias:
+            if statement in vistas:
+                continue
+            vistas.add(statement)
+            plan = conexion.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+            lineas.extend(f'    {fila[-1]}' for fila in plan)
+    return lineas
+
+
+def medir(cliente, repeticiones):
+    resultados = {}
+    for nombre, url in RUTAS:
+        cliente.get(url)
+        latencias = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            cliente.get(url)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        resultados[nombre] = (percentil(latencias, 0.5), percentil(latencias, 0.9),
+                              planes(capturar_sentencias(cliente, url)))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escala', choices=sorted(ESCALAS), default='pequena')
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'inventario_indices.db'))
+    parser.add_argument('--planes', action='store_true', help='muestra los planes de consulta')
+    args = parser.parse_args()
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{args.db}',
+        'BUSQUEDA_CONSTRUIR_AL_INICIO': False,
+        # KPIs sin snapshot para medir la consulta en cada request
+        'DASHBOARD_KPI_TTL': 0,
+        'METRICAS_ACTIVAS': False,
+    })
+    cliente = app.test_client()
+
+    with app.app_context():
+        generar(**ESCALAS[args.escala])
+        indices = indices_de_consulta()
+
+        for indice in indices:
+            indice.drop(db.engine)
+        with db.engine.begin() as conexion:
+            conexion.execute(text('ANALYZE'))
+        sin_indices = medir(cliente, args.repeticiones)
+
+        inicio = time.perf_counter()
+        for indice in indices:
+            indice.create(db.engine)
+        with db.engine.begin() as conexion:
+            conexion.execute(text('ANALYZE'))
+        print(f'{len(indices)} índices creados en {time.perf_counter() - inicio:.2f}s')
+        con_indices = medir(cliente, args.repeticiones)
+
+    print(f"\n{'ruta':24} {'p50 sin':>10} {'p50 con':>10} {'p90 sin':>10} {'p90 con':>10} {'mejora':>8}")
+    for nombre, _ in RUTAS:
+        p50_sin, p90_sin, plan_sin = sin_indices[nombre]
+        p50_con, p90_con, plan_con = con_indices[nombre]
+        print(f'{nombre:24} {p50_sin:10.2f} {p50_con:10.2f} {p90_sin:10.2f} {p90_con:10.2f} '
+              f'{p50_sin / p50_con:7.1f}x')
+        if args.planes:
+            print('  sin índices:', *plan_sin, sep='\n')
+            print('  con índices:', *plan_con, sep='\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Compara 1.000 movimientos enviados por formulario contra un solo lote JSON.
+
+Uso:
+    python -m benchmarks.lote_vs_formulario --lineas 1000 --productos 50
+"""
+from app import create_app, db
+from app.models.categorias import Categoria
+from app.models.proveedores import Proveedor
+from app.models.productos import Producto
+from datetime import datetime
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+def preparar_datos(app, productos):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        categoria = Categoria(Nombre='Benchmark', FechaCreacion=datetime.utcnow())
+        proveedor = Proveedor(Nombre='Benchmark')
+        db.session.add_all([categoria, proveedor])
+        db.session.flush()
+        nuevos = [
+            Producto(Nombre=f'Ingrediente {i}', CodigoSKU=f'BEN-{i:05d}', CantidadActual=1_000_000,
+                     UnidadMedida='u', StockMinimo=10, PrecioUnitario=1,
+                     CategoriaId=categoria.Id, ProveedorId=proveedor.Id)
+            for i in range(productos)
+        ]
+        db.session.add_all(nuevos)
+        db.session.commit()
+        return [p.Id for p in nuevos]
+
+
+def generar_lineas(ids, cantidad, semilla):
+    aleatorio = random.Random(semilla)
+    return [
+        {
+            'producto_id': aleatorio.choice(ids),
+            'tipo': aleatorio.choice(('entrada', 'salida')),
+            'cantidad': aleatorio.randint(1, 5),
+            'motivo': 'Benchmark',
+            'clave': f'{semilla}-{i}'
+        }
+        for i in range(cantidad)
+    ]
+
+
+def por_formulario(cliente, lineas):
+    inicio = time.perf_counter()
+    for linea in lineas:
+        respuesta = cliente.post(f"/movimientos/{linea['tipo']}", data={
+            'producto_id': linea['producto_id'],
+            'cantidad': linea['cantidad'],
+            'motivo': linea['motivo'],
+        })
+        if respuesta.status_code != 302:
+            raise RuntimeError(f'Formulario rechazado: {respuesta.status_code}')
+    return time.perf_counter() - inicio
+
+
+def por_lote(cliente, lineas):
+    inicio = time.perf_counter()
+    respuesta = cliente.post('/movimientos/api/lote', json={'movimientos': lineas})
+    duracion = time.perf_counter() - inicio
+    if respuesta.status_code != 201:
+        raise RuntimeError(f'Lote rechazado: {respuesta.status_code} {respuesta.get_json()}')
+    return duracion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lineas', type=int, default=1000)
+    parser.add_argument('--productos', type=int, default=50)
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'inventario_lote.db'))
+    args = parser.parse_args()
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{args.db}'})
+    ids = preparar_datos(app, args.productos)
+    cliente = app.test_client()
+
+    t_formulario = por_formulario(cliente, generar_lineas(ids, args.lineas, 1))
+    t_lote = por_lote(cliente, generar_lineas(ids, args.lineas, 2))
+
+    # Reintento del mismo lote: todas las líneas deben salir como duplicadas
+    t_reintento = time.perf_counter()
+    respuesta = cliente.post('/movimientos/api/lote', json={'movimientos': generar_lineas(ids, args.lineas, 2)})
+    t_reintento = time.perf_counter() - t_reintento
+    duplicadas = len(respuesta.get_json()['duplicadas'])
+
+    print(f'formulario: {args.lineas} POST en {t_formulario:.3f}s ({args.lineas / t_formulario:,.0f} mov/s)')
+    print(f'lote:       1 POST en {t_lote:.3f}s ({args.lineas / t_lote:,.0f} mov/s)')
+    print(f'reintento:  {duplicadas} líneas duplicadas omitidas en {t_reintento:.3f}s')
+    print(f'aceleración: {t_formulario / t_lote:.1f}x')
+    return 0 if duplicadas == args.lineas else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
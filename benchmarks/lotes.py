@@ -0,0 +1,92 @@
+"""Asignación FEFO: entradas con vencimiento, salidas en lote y lotes por vencer.
+
+Genera productos sintéticos, pasa su stock a un lote inicial sin vencimiento
+(como la migración 0010) y registra --lotes entradas con fecha de
+vencimiento por producto. Luego mide un lote de --salidas salidas (una
+sentencia de asignación por bloque de productos) y la consulta de lotes por
+vencer. Al final verifica que la suma de los lotes de cada producto sea su
+CantidadActual.
+
+Uso:
+    python -m benchmarks.lotes --productos 5000 --salidas 2000
+    python -m benchmarks.lotes --lotes 20 --salidas 5000
+"""
+from app import create_app, db
+from app.models.lotes import Lote
+from app.models.productos import Producto
+from app.services.lotes import consulta_por_vencer
+from app.services.stock import registrar_lote, LineaMovimiento
+from benchmarks.generador import generar
+from datetime import date, timedelta
+from sqlalchemy import select, func, text
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--productos', type=int, default=5_000)
+    parser.add_argument('--lotes', type=int, default=10, help='entradas con vencimiento por producto')
+    parser.add_argument('--salidas', type=int, default=2_000)
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'inventario_lotes.db'))
+    args = parser.parse_args()
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{args.db}',
+        'BUSQUEDA_CONSTRUIR_AL_INICIO': False,
+        'METRICAS_ACTIVAS': False,
+    })
+
+    with app.app_context():
+        generar(categorias=20, proveedores=50, productos=args.productos, movimientos=0, dias=90)
+        db.session.execute(text(
+            'INSERT INTO Lotes (ProductoId, FechaVencimiento, CantidadInicial, CantidadDisponible, FechaCreacion) '
+            'SELECT Id, NULL, CantidadActual, CantidadActual, CURRENT_TIMESTAMP FROM Productos WHERE CantidadActual > 0'
+        ))
+        db.session.commit()
+
+        aleatorio = random.Random(42)
+        hoy = date.today()
+        ids = db.session.execute(select(Producto.Id).where(Producto.Activo == True)).scalars().all()
+
+        entradas = [
+            LineaMovimiento(producto_id, 'entrada', round(aleatorio.uniform(1, 20), 2), 'Compra', None, None,
+                            hoy + timedelta(days=aleatorio.randint(0, 60)))
+            for producto_id in ids for _ in range(args.lotes)
+        ]
+        inicio = time.perf_counter()
+        for desde in range(0, len(entradas), 5_000):
+            registrar_lote(entradas[desde:desde + 5_000], usuario='Benchmark')
+        print(f'{len(entradas)} entradas con vencimiento en {time.perf_counter() - inicio:.2f}s')
+
+        # Cada salida supera en promedio un lote de entrada: recorre varios lotes
+        salidas = [
+            LineaMovimiento(ids[i % len(ids)], 'salida', round(aleatorio.uniform(1, 25), 2), 'Uso', None, None)
+            for i in range(args.salidas)
+        ]
+        inicio = time.perf_counter()
+        resultado = registrar_lote(salidas, usuario='Benchmark')
+        print(f'Lote de {resultado.aplicadas} salidas ({len(resultado.saldos)} productos) '
+              f'con asignación FEFO: {time.perf_counter() - inicio:.2f}s')
+
+        inicio = time.perf_counter()
+        por_vencer = db.session.execute(consulta_por_vencer(7, hoy)).all()
+        print(f'Lotes por vencer en 7 días: {len(por_vencer)} en {(time.perf_counter() - inicio) * 1000:.0f} ms')
+
+        suma = select(Lote.ProductoId, func.sum(Lote.CantidadDisponible).label('Disponible'))\
+            .group_by(Lote.ProductoId).subquery()
+        diferentes = db.session.execute(
+            select(func.count()).select_from(Producto)
+            .outerjoin(suma, suma.c.ProductoId == Producto.Id)
+            .where(func.abs(func.coalesce(Producto.CantidadActual, 0) - func.coalesce(suma.c.Disponible, 0)) > 0.005)
+        ).scalar()
+        print(f'Productos cuyo stock no coincide con sus lotes: {diferentes}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
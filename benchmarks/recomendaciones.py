@@ -0,0 +1,63 @@
+"""Tiempo del cálculo de puntos de reorden (consulta agrupada + NumPy).
+
+Genera productos y movimientos sintéticos sobre el periodo pedido y mide la
+consulta de salidas por (producto, día), el cálculo vectorizado y, aparte, el
+cálculo sobre una matriz densa del mismo tamaño (todos los productos con
+salidas todos los días, el peor caso para NumPy).
+
+Uso:
+    python -m benchmarks.recomendaciones --productos 10000 --movimientos 2000000 --dias 730
+    python -m benchmarks.recomendaciones --reusar --dias 730
+"""
+from app import create_app, db
+from app.services.recomendaciones import calcular_recomendaciones, calcular_puntos_reorden
+from benchmarks.generador import generar
+import argparse
+import numpy as np
+import os
+import sys
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--productos', type=int, default=10_000)
+    parser.add_argument('--movimientos', type=int, default=2_000_000)
+    parser.add_argument('--dias', type=int, default=730)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'inventario_recomendaciones.db'))
+    parser.add_argument('--reusar', action='store_true', help='usa la base de datos generada antes')
+    args = parser.parse_args()
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{args.db}',
+        'BUSQUEDA_CONSTRUIR_AL_INICIO': False,
+        'METRICAS_ACTIVAS': False,
+    })
+
+    with app.app_context():
+        if not args.reusar:
+            generar(categorias=50, proveedores=200, productos=args.productos,
+                    movimientos=args.movimientos, dias=args.dias)
+
+        for _ in range(args.repeticiones):
+            inicio = time.perf_counter()
+            resultado = calcular_recomendaciones(dias=args.dias)
+            total = time.perf_counter() - inicio
+            print(f'{resultado.productos} productos × {resultado.dias} días: '
+                  f'consulta {resultado.segundos_consulta:.2f}s, cálculo {resultado.segundos_calculo:.2f}s, '
+                  f'total con escritura {total:.2f}s')
+
+    # Solo NumPy, matriz densa
+    aleatorio = np.random.default_rng(42)
+    matriz = aleatorio.gamma(2.0, 3.0, size=(args.productos, args.dias))
+    existencias = aleatorio.uniform(0, 100, size=args.productos)
+    inicio = time.perf_counter()
+    calcular_puntos_reorden(matriz, existencias, 2, 7, 1.65)
+    print(f'NumPy, matriz densa {args.productos} × {args.dias}: {(time.perf_counter() - inicio) * 1000:.1f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
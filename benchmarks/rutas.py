@@ -0,0 +1,167 @@
+"""Latencia, sentencias SQL y memoria pico de las rutas principales.
+
+Ejecuta cada ruta con el cliente de pruebas de Flask contra una base SQLite
+generada con benchmarks.generador y guarda los resultados en JSON. Con
+--comparar se muestran las diferencias contra una ejecución anterior.
+
+Uso:
+    python -m benchmarks.rutas --escala pequena --salida resultados.json
+    python -m benchmarks.rutas --db /tmp/inventario_bench.db --no-generar --comparar anterior.json
+"""
+from app import create_app, db
+from benchmarks.generador import ESCALAS, generar
+from datetime import datetime
+from sqlalchemy import event
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RUTAS = [
+    ('inicio', '/'),
+    ('listar_productos', '/productos/'),
+    ('listar_productos_busqueda', '/productos/?search=queso'),
+    ('listar_productos_bajo_stock', '/productos/?estado=bajo'),
+    ('listar_movimientos', '/movimientos/'),
+    ('listar_movimientos_filtrados', '/movimientos/?tipo=salida'),
+    ('api_productos', '/productos/api/productos'),
+]
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+class ContadorSQL:
+    def __init__(self, engine):
+        self.sentencias = 0
+        event.listen(engine, 'before_cursor_execute', self._contar)
+
+    def _contar(self, conn, cursor, statement, parameters, context, executemany):
+        self.sentencias += 1
+
+
+def medir_ruta(cliente, contador, url, repeticiones, calentamiento):
+    for _ in range(calentamiento):
+        cliente.get(url)
+
+    latencias = []
+    sentencias = []
+    estado = None
+    for _ in range(repeticiones):
+        antes = contador.sentencias
+        inicio = time.perf_counter()
+        respuesta = cliente.get(url)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        sentencias.append(contador.sentencias - antes)
+        estado = respuesta.status_code
+
+    # Memoria pico en una ejecución aparte: tracemalloc distorsiona la latencia
+    tracemalloc.start()
+    cliente.get(url)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'url': url,
+        'estado': estado,
+        'repeticiones': repeticiones,
+        'latencia_ms': {
+            'p50': percentil(latencias, 0.50),
+            'p90': percentil(latencias, 0.90),
+            'p99': percentil(latencias, 0.99),
+            'media': statistics.fmean(latencias),
+            'min': min(latencias),
+            'max': max(latencias),
+        },
+        'sentencias_sql': {
+            'media': statistics.fmean(sentencias),
+            'max': max(sentencias),
+        },
+        'memoria_pico_kb': pico / 1024,
+    }
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual, anterior):
+    print(f"\n{'ruta':32} {'p50 antes':>10} {'p50 ahora':>10} {'cambio':>8} {'SQL antes':>10} {'SQL ahora':>10}")
+    for nombre, datos in actual['rutas'].items():
+        previo = anterior.get('rutas', {}).get(nombre)
+        if not previo:
+            continue
+        antes = previo['latencia_ms']['p50']
+        ahora = datos['latencia_ms']['p50']
+        cambio = (ahora - antes) / antes * 100 if antes else 0.0
+        print(f"{nombre:32} {antes:10.2f} {ahora:10.2f} {cambio:+7.1f}% "
+              f"{previo['sentencias_sql']['media']:10.1f} {datos['sentencias_sql']['media']:10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escala', choices=sorted(ESCALAS), default='pequena')
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'inventario_bench.db'))
+    parser.add_argument('--no-generar', action='store_true',
+                        help='usa la base de datos existente sin regenerarla')
+    parser.add_argument('--repeticiones', type=int, default=30)
+    parser.add_argument('--calentamiento', type=int, default=3)
+    parser.add_argument('--salida', default='resultados_rutas.json')
+    parser.add_argument('--comparar', help='JSON de una ejecución anterior')
+    args = parser.parse_args()
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{args.db}',
+        'BUSQUEDA_CONSTRUIR_AL_INICIO': False,
+    })
+
+    with app.app_context():
+        if args.no_generar:
+            tamanos = None
+        else:
+            tamanos = generar(**ESCALAS[args.escala])
+        contador = ContadorSQL(db.engine)
+
+    cliente = app.test_client()
+    resultados = {}
+    for nombre, url in RUTAS:
+        resultados[nombre] = medir_ruta(cliente, contador, url, args.repeticiones, args.calentamiento)
+        datos = resultados[nombre]
+        print(f"{nombre:32} p50={datos['latencia_ms']['p50']:8.2f}ms "
+              f"p99={datos['latencia_ms']['p99']:8.2f}ms "
+              f"sql={datos['sentencias_sql']['media']:5.1f} "
+              f"mem={datos['memoria_pico_kb']:9.0f}KB [{datos['estado']}]")
+
+    informe = {
+        'fecha': datetime.utcnow().isoformat(),
+        'commit': _commit_actual(),
+        'python': platform.python_version(),
+        'escala': None if args.no_generar else args.escala,
+        'tamanos': tamanos,
+        'rutas': resultados,
+    }
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(informe, archivo, indent=2, ensure_ascii=False)
+    print(f'Resultados guardados en {args.salida}')
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            comparar(informe, json.load(archivo))
+
+    return 0 if all(r['estado'] == 200 for r in resultados.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Esquema inicial
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 09:00:00
+
+Las cuatro tablas de la aplicación original. Bases existentes (creadas antes
+por db.create_all): marcar esta revisión con 'flask db stamp 0001' y luego
+'flask db upgrade'.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('Categorias',
+    sa.Column('Id', sa.Integer(), nullable=False),
+    sa.Column('Nombre', sa.String(length=100), nullable=False),
+    sa.Column('Descripcion', sa.String(length=200), nullable=True),
+    sa.Column('Activo', sa.Boolean(), nullable=True),
+    sa.Column('FechaCreacion', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('Id'),
+    sa.UniqueConstraint('Nombre')
+    )
+    op.create_table('Proveedores',
+    sa.Column('Id', sa.Integer(), nullable=False),
+    sa.Column('Nombre', sa.String(length=150), nullable=False),
+    sa.Column('Contacto', sa.String(length=100), nullable=True),
+    sa.Column('Telefono', sa.String(length=20), nullable=True),
+    sa.Column('Email', sa.String(length=150), nullable=True),
+    sa.Column('Direccion', sa.Text(), nullable=True),
+    sa.Column('Activo', sa.Boolean(), nullable=True),
+    sa.Column('FechaCreacion', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('Id')
+    )
+    op.create_table('Productos',
+    sa.Column('Id', sa.Integer(), nullable=False),
+    sa.Column('Nombre', sa.String(length=150), nullable=False),
+    sa.Column('Descripcion', sa.Text(), nullable=True),
+    sa.Column('CodigoSKU', sa.String(length=50), nullable=False),
+    sa.Column('CantidadActual', sa.Float(), nullable=True),
+    sa.Column('UnidadMedida', sa.String(length=20), nullable=False),
+    sa.Column('StockMinimo', sa.Float(), nullable=True),
+    sa.Column('PrecioUnitario', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('CategoriaId', sa.Integer(), nullable=True),
+    sa.Column('ProveedorId', sa.Integer(), nullable=True),
+    sa.Column('Activo', sa.Boolean(), nullable=True),
+    sa.Column('FechaCreacion', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['CategoriaId'], ['Categorias.Id'], ),
+    sa.ForeignKeyConstraint(['ProveedorId'], ['Proveedores.Id'], ),
+    sa.PrimaryKeyConstraint('Id'),
+    sa.UniqueConstraint('CodigoSKU')
+    )
+    op.create_table('Movimientos',
+    sa.Column('Id', sa.Integer(), nullable=False),
+    sa.Column('ProductoId', sa.Integer(), nullable=False),
+    sa.Column('Tipo', sa.String(length=20), nullable=False),
+    sa.Column('Cantidad', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('Motivo', sa.String(length=200), nullable=True),
+    sa.Column('Notas', sa.Text(), nullable=True),
+    sa.Column('Usuario', sa.String(length=100), nullable=True),
+    sa.Column('FechaCreacion', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['ProductoId'], ['Productos.Id'], ),
+    sa.PrimaryKeyConstraint('Id')
+    )
+
+
+def downgrade():
+    op.drop_table('Movimientos')
+    op.drop_table('Productos')
+    op.drop_table('Proveedores')
+    op.drop_table('Categorias')
@@ -0,0 +1,71 @@
+"""Tablas de soporte
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:15:00
+
+- ClavesIdempotencia: claves de los formularios ya procesados.
+- VersionesDatos: contador por tabla para invalidar cachés, con una fila por
+  tabla de referencia y la de Movimientos (que arranca en el Id máximo
+  actual para que la versión no retroceda).
+- SnapshotsStock: cortes de stock por producto y fecha.
+- Movimientos.EsAjuste: marca los ajustes de saldo (alta, edición, conteos y
+  conciliación) para distinguirlos de las entradas y salidas reales; los
+  movimientos que ya existen quedan como no ajuste.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ClavesIdempotencia',
+    sa.Column('Clave', sa.String(length=100), nullable=False),
+    sa.Column('FechaCreacion', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('Clave')
+    )
+    versiones = op.create_table('VersionesDatos',
+    sa.Column('Tabla', sa.String(length=50), nullable=False),
+    sa.Column('Version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('Tabla')
+    )
+    op.create_table('SnapshotsStock',
+    sa.Column('Id', sa.Integer(), nullable=False),
+    sa.Column('ProductoId', sa.Integer(), nullable=False),
+    sa.Column('FechaCorte', sa.DateTime(), nullable=False),
+    sa.Column('Cantidad', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['ProductoId'], ['Productos.Id'], ),
+    sa.PrimaryKeyConstraint('Id'),
+    sa.UniqueConstraint('ProductoId', 'FechaCorte', name='UQ_SnapshotsStock_Producto_Fecha')
+    )
+    op.create_index('IX_SnapshotsStock_FechaCorte', 'SnapshotsStock', ['FechaCorte'], unique=False)
+
+    op.add_column('Movimientos',
+                  sa.Column('EsAjuste', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+    # Filas de versión (ver app/services/versiones.py)
+    op.bulk_insert(versiones, [
+        {'Tabla': 'Categorias', 'Version': 0},
+        {'Tabla': 'Proveedores', 'Version': 0},
+        {'Tabla': 'Productos', 'Version': 0},
+    ])
+    op.execute(
+        "INSERT INTO VersionesDatos (Tabla, Version) "
+        "SELECT 'Movimientos', COALESCE(MAX(Id), 0) FROM Movimientos"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('Movimientos') as batch_op:
+        batch_op.drop_column('EsAjuste', mssql_drop_default=True)
+    op.drop_index('IX_SnapshotsStock_FechaCorte', table_name='SnapshotsStock')
+    op.drop_table('SnapshotsStock')
+    op.drop_table('VersionesDatos')
+    op.drop_table('ClavesIdempotencia')
@@ -0,0 +1,49 @@
+"""Índices de las consultas frecuentes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:30:00
+
+- Movimientos(ProductoId, FechaCreacion DESC): historial por producto.
+- Movimientos(Tipo, FechaCreacion): filtro por tipo en la lista y exportación.
+- Movimientos(FechaCreacion, Id): paginación por cursor sin filtros.
+- Productos(Activo, CantidadActual, StockMinimo): KPIs y bajo stock del dashboard.
+- Índices filtrados (Activo = 1) por Nombre en las tablas con baja lógica:
+  listas y desplegables de registros activos.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+SOLO_ACTIVOS = {'mssql_where': sa.text('Activo = 1'), 'sqlite_where': sa.text('Activo = 1')}
+
+
+def upgrade():
+    op.create_index('IX_Movimientos_ProductoId_FechaCreacion', 'Movimientos',
+                    ['ProductoId', sa.text('FechaCreacion DESC')], unique=False)
+    op.create_index('IX_Movimientos_Tipo_FechaCreacion', 'Movimientos',
+                    ['Tipo', 'FechaCreacion'], unique=False)
+    op.create_index('IX_Movimientos_FechaCreacion_Id', 'Movimientos',
+                    ['FechaCreacion', 'Id'], unique=False)
+    op.create_index('IX_Productos_Activo_CantidadActual_StockMinimo', 'Productos',
+                    ['Activo', 'CantidadActual', 'StockMinimo'], unique=False)
+    op.create_index('IX_Productos_Nombre_Activos', 'Productos', ['Nombre'], unique=False, **SOLO_ACTIVOS)
+    op.create_index('IX_Categorias_Nombre_Activos', 'Categorias', ['Nombre'], unique=False, **SOLO_ACTIVOS)
+    op.create_index('IX_Proveedores_Nombre_Activos', 'Proveedores', ['Nombre'], unique=False, **SOLO_ACTIVOS)
+
+
+def downgrade():
+    op.drop_index('IX_Proveedores_Nombre_Activos', table_name='Proveedores')
+    op.drop_index('IX_Categorias_Nombre_Activos', table_name='Categorias')
+    op.drop_index('IX_Productos_Nombre_Activos', table_name='Productos')
+    op.drop_index('IX_Productos_Activo_CantidadActual_StockMinimo', table_name='Productos')
+    op.drop_index('IX_Movimientos_FechaCreacion_Id', table_name='Movimientos')
+    op.drop_index('IX_Movimientos_Tipo_FechaCreacion', table_name='Movimientos')
+    op.drop_index('IX_Movimientos_ProductoId_FechaCreacion', table_name='Movimientos')
@@ -0,0 +1,38 @@
+"""Registro de cambios para sincronización incremental
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('Cambios',
+    sa.Column('Secuencia', sa.Integer(), nullable=False),
+    sa.Column('Numero', sa.Integer(), nullable=False),
+    sa.Column('Tabla', sa.String(length=30), nullable=False),
+    sa.Column('RegistroId', sa.Integer(), nullable=False),
+    sa.Column('Operacion', sa.String(length=20), nullable=False),
+    sa.Column('FechaCreacion', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('Secuencia'),
+    sqlite_autoincrement=True
+    )
+    op.create_index('IX_Cambios_Numero_Secuencia', 'Cambios', ['Numero', 'Secuencia'], unique=False)
+    # Contador de confirmaciones que numera los cambios (ver app/services/cambios.py)
+    op.execute("INSERT INTO VersionesDatos (Tabla, Version) VALUES ('Cambios', 0)")
+
+
+def downgrade():
+    op.execute("DELETE FROM VersionesDatos WHERE Tabla = 'Cambios'")
+    op.drop_index('IX_Cambios_Numero_Secuencia', table_name='Cambios')
+    op.drop_table('Cambios')
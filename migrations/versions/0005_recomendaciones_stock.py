@@ -0,0 +1,41 @@
+"""Recomendaciones de stock mínimo calculadas a partir del consumo
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('RecomendacionesStock',
+    sa.Column('Id', sa.Integer(), nullable=False),
+    sa.Column('ProductoId', sa.Integer(), nullable=False),
+    sa.Column('FechaCalculo', sa.DateTime(), nullable=False),
+    sa.Column('DiasHistoria', sa.Integer(), nullable=False),
+    sa.Column('ConsumoDiario', sa.Float(), nullable=False),
+    sa.Column('DesviacionDiaria', sa.Float(), nullable=False),
+    sa.Column('StockMinimoActual', sa.Float(), nullable=True),
+    sa.Column('PuntoReorden', sa.Float(), nullable=False),
+    sa.Column('CantidadSugerida', sa.Float(), nullable=False),
+    sa.Column('Estado', sa.String(length=20), nullable=False),
+    sa.Column('FechaAplicacion', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['ProductoId'], ['Productos.Id'], ),
+    sa.PrimaryKeyConstraint('Id')
+    )
+    op.create_index('IX_RecomendacionesStock_Estado_ProductoId', 'RecomendacionesStock',
+                    ['Estado', 'ProductoId'], unique=False)
+
+
+def downgrade():
+    op.drop_index('IX_RecomendacionesStock_Estado_ProductoId', table_name='RecomendacionesStock')
+    op.drop_table('RecomendacionesStock')
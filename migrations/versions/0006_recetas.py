@@ -0,0 +1,43 @@
+"""Recetas (platillos) y sus ingredientes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('Recetas',
+    sa.Column('Id', sa.Integer(), nullable=False),
+    sa.Column('Nombre', sa.String(length=150), nullable=False),
+    sa.Column('Descripcion', sa.String(length=200), nullable=True),
+    sa.Column('Activo', sa.Boolean(), nullable=True),
+    sa.Column('FechaCreacion', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('Id'),
+    sa.UniqueConstraint('Nombre')
+    )
+    op.create_table('RecetaIngredientes',
+    sa.Column('Id', sa.Integer(), nullable=False),
+    sa.Column('RecetaId', sa.Integer(), nullable=False),
+    sa.Column('ProductoId', sa.Integer(), nullable=False),
+    sa.Column('CantidadPorPorcion', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['ProductoId'], ['Productos.Id'], ),
+    sa.ForeignKeyConstraint(['RecetaId'], ['Recetas.Id'], ),
+    sa.PrimaryKeyConstraint('Id'),
+    sa.UniqueConstraint('RecetaId', 'ProductoId', name='UQ_RecetaIngredientes_Receta_Producto')
+    )
+
+
+def downgrade():
+    op.drop_table('RecetaIngredientes')
+    op.drop_table('Recetas')
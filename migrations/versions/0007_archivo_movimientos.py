@@ -0,0 +1,54 @@
+"""Archivo de movimientos antiguos y saldos de apertura
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('MovimientosArchivo',
+    sa.Column('Periodo', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('Id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('ProductoId', sa.Integer(), nullable=False),
+    sa.Column('Tipo', sa.String(length=20), nullable=False),
+    sa.Column('Cantidad', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('Motivo', sa.String(length=200), nullable=True),
+    sa.Column('Notas', sa.Text(), nullable=True),
+    sa.Column('Usuario', sa.String(length=100), nullable=True),
+    sa.Column('FechaCreacion', sa.DateTime(), nullable=False),
+    sa.Column('EsAjuste', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['ProductoId'], ['Productos.Id'], ),
+    sa.PrimaryKeyConstraint('Periodo', 'Id')
+    )
+    op.create_index('IX_MovimientosArchivo_ProductoId_FechaCreacion', 'MovimientosArchivo', ['ProductoId', 'FechaCreacion'], unique=False)
+    op.create_index('IX_MovimientosArchivo_FechaCreacion_Id', 'MovimientosArchivo', ['FechaCreacion', 'Id'], unique=False)
+    op.create_table('SaldosApertura',
+    sa.Column('ProductoId', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('Cantidad', sa.Float(), nullable=False),
+    sa.Column('FechaCorte', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['ProductoId'], ['Productos.Id'], ),
+    sa.PrimaryKeyConstraint('ProductoId')
+    )
+
+    # En SQL Server el archivo se guarda con compresión de página: se escribe
+    # una vez por mes y casi no se lee
+    if op.get_bind().dialect.name == 'mssql':
+        op.execute('ALTER TABLE MovimientosArchivo REBUILD WITH (DATA_COMPRESSION = PAGE)')
+
+
+def downgrade():
+    op.drop_table('SaldosApertura')
+    op.drop_index('IX_MovimientosArchivo_FechaCreacion_Id', table_name='MovimientosArchivo')
+    op.drop_index('IX_MovimientosArchivo_ProductoId_FechaCreacion', table_name='MovimientosArchivo')
+    op.drop_table('MovimientosArchivo')
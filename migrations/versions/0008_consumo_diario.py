@@ -0,0 +1,34 @@
+"""Consumo diario por producto (rollup para reportes)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 17:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ConsumoDiario',
+    sa.Column('ProductoId', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('Dia', sa.Date(), nullable=False),
+    sa.Column('Entradas', sa.Float(), nullable=False),
+    sa.Column('Salidas', sa.Float(), nullable=False),
+    sa.Column('Movimientos', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ProductoId'], ['Productos.Id'], ),
+    sa.PrimaryKeyConstraint('ProductoId', 'Dia')
+    )
+    op.create_index('IX_ConsumoDiario_Dia_ProductoId', 'ConsumoDiario', ['Dia', 'ProductoId'], unique=False)
+
+
+def downgrade():
+    op.drop_index('IX_ConsumoDiario_Dia_ProductoId', table_name='ConsumoDiario')
+    op.drop_table('ConsumoDiario')
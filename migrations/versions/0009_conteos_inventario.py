@@ -0,0 +1,49 @@
+"""Conteos físicos de inventario
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 18:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ConteosInventario',
+    sa.Column('Id', sa.Integer(), nullable=False),
+    sa.Column('Nombre', sa.String(length=150), nullable=False),
+    sa.Column('Estado', sa.String(length=20), nullable=False),
+    sa.Column('Usuario', sa.String(length=100), nullable=True),
+    sa.Column('FechaCreacion', sa.DateTime(), nullable=False),
+    sa.Column('FechaCierre', sa.DateTime(), nullable=True),
+    sa.Column('Ajustes', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('Id')
+    )
+    op.create_index('IX_ConteosInventario_Estado_FechaCreacion', 'ConteosInventario', ['Estado', 'FechaCreacion'], unique=False)
+    op.create_table('ConteosDetalle',
+    sa.Column('Id', sa.Integer(), nullable=False),
+    sa.Column('ConteoId', sa.Integer(), nullable=False),
+    sa.Column('ProductoId', sa.Integer(), nullable=False),
+    sa.Column('CantidadContada', sa.Float(), nullable=False),
+    sa.Column('CantidadSistema', sa.Float(), nullable=True),
+    sa.Column('Diferencia', sa.Float(), nullable=True),
+    sa.Column('FechaConteo', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['ConteoId'], ['ConteosInventario.Id'], ),
+    sa.ForeignKeyConstraint(['ProductoId'], ['Productos.Id'], ),
+    sa.PrimaryKeyConstraint('Id'),
+    sa.UniqueConstraint('ConteoId', 'ProductoId', name='UQ_ConteosDetalle_Conteo_Producto')
+    )
+
+
+def downgrade():
+    op.drop_table('ConteosDetalle')
+    op.drop_index('IX_ConteosInventario_Estado_FechaCreacion', table_name='ConteosInventario')
+    op.drop_table('ConteosInventario')
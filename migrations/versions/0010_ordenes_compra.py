@@ -0,0 +1,50 @@
+"""Órdenes de compra por proveedor
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 20:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('OrdenesCompra',
+    sa.Column('Id', sa.Integer(), nullable=False),
+    sa.Column('ProveedorId', sa.Integer(), nullable=False),
+    sa.Column('Estado', sa.String(length=20), nullable=False),
+    sa.Column('Usuario', sa.String(length=100), nullable=True),
+    sa.Column('FechaCreacion', sa.DateTime(), nullable=False),
+    sa.Column('FechaRecepcion', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['ProveedorId'], ['Proveedores.Id'], ),
+    sa.PrimaryKeyConstraint('Id')
+    )
+    op.create_index('IX_OrdenesCompra_Estado_FechaCreacion', 'OrdenesCompra', ['Estado', 'FechaCreacion'], unique=False)
+    op.create_table('OrdenesCompraLineas',
+    sa.Column('Id', sa.Integer(), nullable=False),
+    sa.Column('OrdenId', sa.Integer(), nullable=False),
+    sa.Column('ProductoId', sa.Integer(), nullable=False),
+    sa.Column('Cantidad', sa.Float(), nullable=False),
+    sa.Column('CantidadRecibida', sa.Float(), nullable=True),
+    sa.Column('PrecioUnitario', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['OrdenId'], ['OrdenesCompra.Id'], ),
+    sa.ForeignKeyConstraint(['ProductoId'], ['Productos.Id'], ),
+    sa.PrimaryKeyConstraint('Id'),
+    sa.UniqueConstraint('OrdenId', 'ProductoId', name='UQ_OrdenesCompraLineas_Orden_Producto')
+    )
+    op.create_index('IX_OrdenesCompraLineas_ProductoId', 'OrdenesCompraLineas', ['ProductoId'], unique=False)
+
+
+def downgrade():
+    op.drop_index('IX_OrdenesCompraLineas_ProductoId', table_name='OrdenesCompraLineas')
+    op.drop_table('OrdenesCompraLineas')
+    op.drop_index('IX_OrdenesCompra_Estado_FechaCreacion', table_name='OrdenesCompra')
+    op.drop_table('OrdenesCompra')
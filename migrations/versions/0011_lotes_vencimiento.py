@@ -0,0 +1,54 @@
+"""Lotes con fecha de vencimiento (asignación FEFO)
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 21:00:00
+
+- Lotes(ProductoId, FechaVencimiento, Id) filtrado por saldo: lote que
+  vence primero de cada producto.
+- Lotes(FechaVencimiento, ProductoId) filtrado por saldo y vencimiento:
+  lotes próximos a vencer.
+- El stock actual de cada producto pasa a un lote inicial sin vencimiento.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+CON_SALDO = 'CantidadDisponible > 0'
+POR_VENCER = 'CantidadDisponible > 0 AND FechaVencimiento IS NOT NULL'
+
+
+def upgrade():
+    op.create_table('Lotes',
+    sa.Column('Id', sa.Integer(), nullable=False),
+    sa.Column('ProductoId', sa.Integer(), nullable=False),
+    sa.Column('FechaVencimiento', sa.Date(), nullable=True),
+    sa.Column('CantidadInicial', sa.Float(), nullable=False),
+    sa.Column('CantidadDisponible', sa.Float(), nullable=False),
+    sa.Column('MovimientoId', sa.Integer(), nullable=True),
+    sa.Column('FechaCreacion', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['ProductoId'], ['Productos.Id'], ),
+    sa.PrimaryKeyConstraint('Id')
+    )
+    op.create_index('IX_Lotes_ProductoId_FechaVencimiento', 'Lotes', ['ProductoId', 'FechaVencimiento', 'Id'],
+                    unique=False, mssql_where=sa.text(CON_SALDO), sqlite_where=sa.text(CON_SALDO))
+    op.create_index('IX_Lotes_FechaVencimiento', 'Lotes', ['FechaVencimiento', 'ProductoId'],
+                    unique=False, mssql_where=sa.text(POR_VENCER), sqlite_where=sa.text(POR_VENCER))
+
+    op.execute(
+        'INSERT INTO Lotes (ProductoId, FechaVencimiento, CantidadInicial, CantidadDisponible, FechaCreacion) '
+        'SELECT Id, NULL, CantidadActual, CantidadActual, CURRENT_TIMESTAMP FROM Productos WHERE CantidadActual > 0'
+    )
+
+
+def downgrade():
+    op.drop_index('IX_Lotes_FechaVencimiento', table_name='Lotes')
+    op.drop_index('IX_Lotes_ProductoId_FechaVencimiento', table_name='Lotes')
+    op.drop_table('Lotes')
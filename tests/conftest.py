@@ -0,0 +1,29 @@
+import os
+
+# Perfil local: las pruebas corren contra una base SQLite temporal
+os.environ.setdefault('INVENTARIO_PERFIL', 'sqlite')
+
+from app import create_app, db
+from app.models.categorias import Categoria
+from app.models.proveedores import Proveedor
+from datetime import datetime
+import pytest
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'inventario.db'}",
+        'BUSQUEDA_CONSTRUIR_AL_INICIO': False,
+        'METRICAS_ACTIVAS': False,
+        'TESTING': True,
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Categoria(Nombre='Verduras', FechaCreacion=datetime.utcnow()),
+            Proveedor(Nombre='Mercado Central', FechaCreacion=datetime.utcnow()),
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
@@ -0,0 +1,59 @@
+from app import db
+from app.models.categorias import Categoria
+from app.services.cambios import registrar_cambios, cambios_desde, purgar_cambios
+from datetime import datetime, timedelta
+
+
+def confirmar(tabla, ids, operacion='alta'):
+    registrar_cambios(tabla, ids, operacion)
+    db.session.commit()
+
+
+def test_cambio_visible_al_confirmar(app):
+    confirmar('Productos', [1, 2])
+
+    resultado = cambios_desde(0)
+
+    assert resultado.cambios == {'Productos': {1: 'alta', 2: 'alta'}}
+    assert (resultado.hasta, resultado.mas, resultado.reinicio) == (1, False, False)
+    assert cambios_desde(resultado.hasta).cambios == {}
+
+
+def test_cambios_revertidos_no_se_registran(app):
+    db.session.add(Categoria(Nombre='Frutas', FechaCreacion=datetime.utcnow()))
+    db.session.flush()
+    registrar_cambios('Categorias', [2], 'alta')
+    db.session.rollback()
+    confirmar('Categorias', [7], 'edicion')
+
+    assert cambios_desde(0).cambios == {'Categorias': {7: 'edicion'}}
+
+
+def test_limite_no_corta_una_transaccion(app):
+    confirmar('Productos', [1, 2])
+    confirmar('Movimientos', [10, 11, 12])
+    confirmar('Productos', [3])
+
+    primera = cambios_desde(0, limite=3)
+    assert primera.cambios == {'Productos': {1: 'alta', 2: 'alta'}}
+    assert (primera.hasta, primera.mas) == (1, True)
+
+    # Una transacción más grande que el límite se entrega entera
+    segunda = cambios_desde(primera.hasta, limite=2)
+    assert segunda.cambios == {'Movimientos': {10: 'alta', 11: 'alta', 12: 'alta'}}
+    assert (segunda.hasta, segunda.mas) == (2, True)
+
+    tercera = cambios_desde(segunda.hasta, limite=2)
+    assert tercera.cambios == {'Productos': {3: 'alta'}}
+    assert (tercera.hasta, tercera.mas) == (3, False)
+
+
+def test_cliente_atrasado_tras_purga_reinicia(app):
+    confirmar('Productos', [1])
+    confirmar('Productos', [2])
+
+    assert purgar_cambios(datetime.utcnow() + timedelta(seconds=1)) == 2
+
+    resultado = cambios_desde(1)
+    assert (resultado.cambios, resultado.hasta, resultado.reinicio) == ({}, 2, True)
+    assert cambios_desde(2).reinicio is False
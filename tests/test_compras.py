@@ -0,0 +1,41 @@
+from app import db
+from app.models.categorias import Categoria
+from app.models.compras import OrdenCompra
+from app.models.productos import Producto
+from app.models.proveedores import Proveedor
+from datetime import datetime
+from sqlalchemy import select
+import pytest
+
+
+@pytest.fixture
+def orden_id(app):
+    # Un producto bajo su mínimo genera una orden en borrador
+    producto = Producto(Nombre='Tomate', CodigoSKU='TOM-1', CantidadActual=2, UnidadMedida='kg',
+                        StockMinimo=10, PrecioUnitario=1.2, Activo=True, FechaCreacion=datetime.utcnow(),
+                        CategoriaId=db.session.execute(select(Categoria.Id)).scalar(),
+                        ProveedorId=db.session.execute(select(Proveedor.Id)).scalar())
+    db.session.add(producto)
+    db.session.commit()
+    respuesta = app.test_client().post('/compras/api/generar', json={'factor_objetivo': 2})
+    assert respuesta.status_code == 201
+    return db.session.execute(select(OrdenCompra.Id)).scalar()
+
+
+@pytest.mark.parametrize('factor', ['inf', 'nan', 0.5])
+def test_generar_rechaza_factor_invalido(app, factor):
+    respuesta = app.test_client().post('/compras/api/generar', json={'factor_objetivo': factor})
+
+    assert respuesta.status_code == 400
+
+
+@pytest.mark.parametrize('cantidad', ['inf', 'nan', -1])
+def test_recibir_rechaza_cantidad_invalida(app, orden_id, cantidad):
+    producto_id = db.session.execute(select(Producto.Id)).scalar()
+    respuesta = app.test_client().post(f'/compras/api/{orden_id}/recibir', json={
+        'recibidas': [{'producto_id': producto_id, 'cantidad': cantidad}]
+    })
+
+    assert respuesta.status_code == 409
+    assert db.session.get(Producto, producto_id).CantidadActual == 2
+    assert db.session.get(OrdenCompra, orden_id).Estado == 'borrador'
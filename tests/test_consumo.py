@@ -0,0 +1,50 @@
+from app import db
+from app.models.categorias import Categoria
+from app.models.consumo import ConsumoDiario
+from app.models.productos import Producto
+from app.services.conteos import abrir_conteo, registrar_conteos, cerrar_conteo
+from app.services.consumo import reconstruir_consumo
+from app.services.stock import registrar_movimiento, registrar_en_libro, ajustar_stock, MOTIVO_SALDO_INICIAL, MOTIVO_EDICION
+from datetime import datetime
+from sqlalchemy import select
+import pytest
+
+
+@pytest.fixture
+def producto_id(app):
+    producto = Producto(Nombre='Tomate', CodigoSKU='TOM-1', CantidadActual=50, UnidadMedida='kg',
+                        StockMinimo=5, PrecioUnitario=1.2, Activo=True, FechaCreacion=datetime.utcnow(),
+                        CategoriaId=db.session.execute(select(Categoria.Id)).scalar())
+    db.session.add(producto)
+    db.session.flush()
+    registrar_en_libro([(producto.Id, 'entrada', 50, MOTIVO_SALDO_INICIAL)])
+    db.session.commit()
+    registrar_movimiento(producto.Id, 'entrada', 8)
+    registrar_movimiento(producto.Id, 'salida', 4)
+    return producto.Id
+
+
+def rollup():
+    return db.session.execute(
+        select(ConsumoDiario.ProductoId, ConsumoDiario.Entradas, ConsumoDiario.Salidas, ConsumoDiario.Movimientos)
+    ).all()
+
+
+def test_ajustes_no_entran_al_rollup(producto_id):
+    ajustar_stock(producto_id, -10, MOTIVO_EDICION)
+    db.session.commit()
+    conteo = abrir_conteo('Cierre de mes')
+    registrar_conteos(conteo.Id, [(producto_id, 30)])
+    cerrar_conteo(conteo.Id)
+
+    assert rollup() == [(producto_id, 8.0, 4.0, 2)]
+
+
+def test_reconstruir_coincide_con_el_rollup_incremental(producto_id):
+    ajustar_stock(producto_id, 5, MOTIVO_EDICION)
+    db.session.commit()
+    incremental = rollup()
+
+    reconstruir_consumo()
+
+    assert rollup() == incremental
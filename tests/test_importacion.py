@@ -0,0 +1,39 @@
+from app import db
+from app.models.movimientos import Movimiento
+from app.models.productos import Producto
+from app.services.importacion import importar_productos_csv
+from sqlalchemy import select, func
+import io
+import pytest
+
+ENCABEZADO = 'codigo_sku,nombre,descripcion,cantidad_actual,unidad_medida,stock_minimo,precio_unitario,categoria,proveedor\n'
+
+
+def importar(*filas):
+    rechazos = io.StringIO()
+    resultado = importar_productos_csv(io.StringIO(ENCABEZADO + ''.join(f + '\n' for f in filas)), rechazos=rechazos)
+    return resultado, rechazos.getvalue()
+
+
+def test_importa_filas_validas(app):
+    resultado, _ = importar('TOM-1,Tomate,,12.5,kg,2,1.20,Verduras,Mercado Central')
+
+    assert (resultado.insertadas, resultado.rechazadas) == (1, 0)
+    assert db.session.execute(select(Producto.CantidadActual).where(Producto.CodigoSKU == 'TOM-1')).scalar() == 12.5
+
+
+@pytest.mark.parametrize('cantidad,minimo,precio', [
+    ('nan', '2', '1.20'),
+    ('inf', '2', '1.20'),
+    ('5', 'NaN', '1.20'),
+    ('5', '-inf', '1.20'),
+    ('5', '2', 'Infinity'),
+    ('5', '2', 'nan'),
+])
+def test_rechaza_valores_no_finitos(app, cantidad, minimo, precio):
+    resultado, rechazos = importar(f'TOM-1,Tomate,,{cantidad},kg,{minimo},{precio},Verduras,Mercado Central')
+
+    assert (resultado.insertadas, resultado.rechazadas) == (0, 1)
+    assert 'no son números válidos' in rechazos
+    assert db.session.execute(select(func.count()).select_from(Producto)).scalar() == 0
+    assert db.session.execute(select(func.count()).select_from(Movimiento)).scalar() == 0
@@ -0,0 +1,38 @@
+from app import db
+from app.models.categorias import Categoria
+from app.models.productos import Producto
+from app.models.recetas import Receta
+from datetime import datetime
+from sqlalchemy import select, func
+import pytest
+
+
+@pytest.fixture
+def producto_id(app):
+    producto = Producto(Nombre='Tortilla', CodigoSKU='TOR-1', CantidadActual=100, UnidadMedida='u',
+                        StockMinimo=10, PrecioUnitario=0.5, Activo=True, FechaCreacion=datetime.utcnow(),
+                        CategoriaId=db.session.execute(select(Categoria.Id)).scalar())
+    db.session.add(producto)
+    db.session.commit()
+    return producto.Id
+
+
+def crear(app, cantidad, producto_id):
+    return app.test_client().post('/recetas/api', json={
+        'nombre': 'Taco', 'ingredientes': [{'producto_id': producto_id, 'cantidad_por_porcion': cantidad}]
+    })
+
+
+def test_crea_receta(app, producto_id):
+    respuesta = crear(app, '1.5', producto_id)
+
+    assert respuesta.status_code == 201
+
+
+@pytest.mark.parametrize('cantidad', ['inf', '-inf', 'nan', 'Infinity', 0, -1])
+def test_rechaza_cantidad_por_porcion_invalida(app, producto_id, cantidad):
+    respuesta = crear(app, cantidad, producto_id)
+
+    assert respuesta.status_code == 400
+    assert 'mayor a 0' in respuesta.get_json()['errores'][0]
+    assert db.session.execute(select(func.count()).select_from(Receta)).scalar() == 0
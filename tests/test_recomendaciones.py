@@ -0,0 +1,62 @@
+from app import db
+from app.models.categorias import Categoria
+from app.models.productos import Producto
+from app.models.recomendaciones import RecomendacionStock
+from app.services.conteos import abrir_conteo, registrar_conteos, cerrar_conteo
+from app.services.recomendaciones import calcular_recomendaciones
+from app.services.stock import registrar_movimiento, registrar_en_libro, ajustar_stock, MOTIVO_SALDO_INICIAL, MOTIVO_EDICION
+from datetime import datetime, timedelta
+from sqlalchemy import select
+import pytest
+
+
+@pytest.fixture
+def producto_id(app):
+    # Alta con saldo inicial y dos salidas reales
+    producto = Producto(Nombre='Tomate', CodigoSKU='TOM-1', CantidadActual=50, UnidadMedida='kg',
+                        StockMinimo=5, PrecioUnitario=1.2, Activo=True, FechaCreacion=datetime.utcnow(),
+                        CategoriaId=db.session.execute(select(Categoria.Id)).scalar())
+    db.session.add(producto)
+    db.session.flush()
+    registrar_en_libro([(producto.Id, 'entrada', 50, MOTIVO_SALDO_INICIAL)])
+    db.session.commit()
+    registrar_movimiento(producto.Id, 'salida', 4)
+    registrar_movimiento(producto.Id, 'salida', 6)
+    return producto.Id
+
+
+def recomendacion():
+    # Consumo y punto de reorden; no dependen del stock actual
+    calcular_recomendaciones(dias=30, hasta=datetime.utcnow() + timedelta(days=1))
+    fila = db.session.execute(
+        select(RecomendacionStock.ConsumoDiario, RecomendacionStock.DesviacionDiaria, RecomendacionStock.PuntoReorden)
+        .where(RecomendacionStock.Estado == 'pendiente')
+    ).one()
+    return tuple(fila)
+
+
+def test_consumo_cuenta_solo_salidas_reales(producto_id):
+    consumo, _, _ = recomendacion()
+
+    assert consumo == pytest.approx(10 / 30, abs=1e-4)
+
+
+def test_ajuste_por_edicion_no_cambia_la_recomendacion(producto_id):
+    antes = recomendacion()
+
+    ajustar_stock(producto_id, -15, MOTIVO_EDICION)
+    db.session.commit()
+
+    assert recomendacion() == antes
+
+
+def test_cierre_de_conteo_no_cambia_la_recomendacion(producto_id):
+    antes = recomendacion()
+
+    conteo = abrir_conteo('Cierre de mes')
+    registrar_conteos(conteo.Id, [(producto_id, 12)])
+    resultado = cerrar_conteo(conteo.Id)
+
+    assert resultado.ajustes == 1
+    assert db.session.get(Producto, producto_id).CantidadActual == 12
+    assert recomendacion() == antes